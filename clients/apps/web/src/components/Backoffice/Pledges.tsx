@@ -12,7 +12,7 @@ const Pledges = () => {
 
   const issueList = useMemo(() => {
     const byIssue =
-      pledges.data?.reduce(
+      pledges.data?.pages.flat().reduce(
         (hash: Record<string, Array<BackofficePledge>>, obj) => ({
           ...hash,
           [obj.issue.id]: (hash[obj.issue.id] || []).concat(obj),
@@ -93,6 +93,15 @@ const Pledges = () => {
           </div>
         </div>
       ))}
+      {pledges.hasNextPage && (
+        <ThinButton
+          color="gray"
+          onClick={() => pledges.fetchNextPage()}
+          loading={pledges.isFetchingNextPage}
+        >
+          <span>Load more</span>
+        </ThinButton>
+      )}
     </div>
   )
 }
@@ -20,7 +20,7 @@ const Page: NextLayoutComponentType & { theme?: string } = () => {
   const issue = useBackofficeIssue(typeof id === 'string' ? id : undefined)
 
   const rewards = useBackofficeRewards(typeof id === 'string' ? id : undefined)
-  const rewardsData = rewards.data?.items || []
+  const rewardsData = rewards.data?.pages.flatMap((p) => p.items || []) || []
 
   const pledgeRewardCreateTransfer = useBackofficePledgeRewardTransfer()
 
@@ -122,6 +122,15 @@ const Page: NextLayoutComponentType & { theme?: string } = () => {
             )}
           </div>
         ))}
+        {rewards.hasNextPage && (
+          <ThinButton
+            color="gray"
+            onClick={() => rewards.fetchNextPage()}
+            loading={rewards.isFetchingNextPage}
+          >
+            <span>Load more</span>
+          </ThinButton>
+        )}
       </div>
     </div>
   )
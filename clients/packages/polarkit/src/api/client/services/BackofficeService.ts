@@ -11,6 +11,7 @@ import type { Issue } from '../models/Issue';
 import type { ListResource_BackofficeReward_ } from '../models/ListResource_BackofficeReward_';
 import type { OrganizationPrivateRead } from '../models/OrganizationPrivateRead';
 import type { PledgeRewardTransfer } from '../models/PledgeRewardTransfer';
+import type { PledgeState } from '../models/PledgeState';
 
 import type { CancelablePromise } from '../core/CancelablePromise';
 import type { BaseHttpRequest } from '../core/BaseHttpRequest';
@@ -24,10 +25,41 @@ export class BackofficeService {
    * @returns BackofficePledge Successful Response
    * @throws ApiError
    */
-  public pledges(): CancelablePromise<Array<BackofficePledge>> {
+  public pledges({
+    state,
+    createdAfter,
+    createdBefore,
+    beforeCreatedAt,
+    beforeId,
+    limit = 100,
+  }: {
+    state?: Array<PledgeState>,
+    createdAfter?: string,
+    createdBefore?: string,
+    /**
+     * created_at of the last pledge of the previous page
+     */
+    beforeCreatedAt?: string,
+    /**
+     * id of the last pledge of the previous page
+     */
+    beforeId?: string,
+    limit?: number,
+  }): CancelablePromise<Array<BackofficePledge>> {
     return this.httpRequest.request({
       method: 'GET',
       url: '/api/v1/backoffice/pledges',
+      query: {
+        'state': state,
+        'created_after': createdAfter,
+        'created_before': createdBefore,
+        'before_created_at': beforeCreatedAt,
+        'before_id': beforeId,
+        'limit': limit,
+      },
+      errors: {
+        422: `Validation Error`,
+      },
     });
   }
 
@@ -38,14 +70,35 @@ export class BackofficeService {
    */
   public rewards({
     issueId,
+    beforePledgeCreatedAt,
+    beforePledgeId,
+    beforeIssueRewardId,
+    limit = 100,
   }: {
     issueId?: string,
+    /**
+     * pledge.created_at of the last reward of the previous page
+     */
+    beforePledgeCreatedAt?: string,
+    /**
+     * pledge.id of the last reward of the previous page
+     */
+    beforePledgeId?: string,
+    /**
+     * issue_reward_id of the last reward of the previous page
+     */
+    beforeIssueRewardId?: string,
+    limit?: number,
   }): CancelablePromise<ListResource_BackofficeReward_> {
     return this.httpRequest.request({
       method: 'GET',
       url: '/api/v1/backoffice/rewards',
       query: {
         'issue_id': issueId,
+        'before_pledge_created_at': beforePledgeCreatedAt,
+        'before_pledge_id': beforePledgeId,
+        'before_issue_reward_id': beforeIssueRewardId,
+        'limit': limit,
       },
       errors: {
         422: `Validation Error`,
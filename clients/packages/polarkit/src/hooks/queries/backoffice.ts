@@ -1,25 +1,71 @@
-import { useMutation, useQuery } from '@tanstack/react-query'
+import { useInfiniteQuery, useMutation, useQuery } from '@tanstack/react-query'
 import { api, queryClient } from '../../api'
 import { BackofficeBadge } from '../../api/client'
 import { defaultRetry } from './retry'
 
+// Pages are fetched with keyset pagination, continuing after the last item
+const backofficePageSize = 100
+
 export const useBackofficeAllPledges = () =>
-  useQuery(['backofficeAllPledges'], () => api.backoffice.pledges(), {
+  useInfiniteQuery({
+    queryKey: ['backofficeAllPledges'],
+    queryFn: ({ signal, pageParam }) => {
+      const promise = api.backoffice.pledges({
+        beforeCreatedAt: pageParam?.created_at,
+        beforeId: pageParam?.id,
+        limit: backofficePageSize,
+      })
+
+      signal?.addEventListener('abort', () => {
+        promise.cancel()
+      })
+
+      return promise
+    },
+    getNextPageParam: (lastPage, pages) => {
+      // A short page is the last one
+      if (lastPage.length < backofficePageSize) {
+        return undefined
+      }
+      const last = lastPage[lastPage.length - 1]
+      return { created_at: last.created_at, id: last.id }
+    },
     retry: defaultRetry,
   })
 
 export const useBackofficeRewards = (issueId?: string) =>
-  useQuery(
-    ['useBackofficeRewards', issueId],
-    () =>
-      api.backoffice.rewards({
+  useInfiniteQuery({
+    queryKey: ['useBackofficeRewards', issueId],
+    queryFn: ({ signal, pageParam }) => {
+      const promise = api.backoffice.rewards({
         issueId,
-      }),
-    {
-      retry: defaultRetry,
-      enabled: !!issueId,
+        beforePledgeCreatedAt: pageParam?.pledge_created_at,
+        beforePledgeId: pageParam?.pledge_id,
+        beforeIssueRewardId: pageParam?.issue_reward_id,
+        limit: backofficePageSize,
+      })
+
+      signal?.addEventListener('abort', () => {
+        promise.cancel()
+      })
+
+      return promise
     },
-  )
+    getNextPageParam: (lastPage, pages) => {
+      const items = lastPage.items || []
+      if (items.length < backofficePageSize) {
+        return undefined
+      }
+      const last = items[items.length - 1]
+      return {
+        pledge_created_at: last.pledge.created_at,
+        pledge_id: last.pledge.id,
+        issue_reward_id: last.issue_reward_id,
+      }
+    },
+    retry: defaultRetry,
+    enabled: !!issueId,
+  })
 
 export const useBackofficeIssue = (issueId?: string) =>
   useQuery(
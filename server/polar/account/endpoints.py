@@ -46,11 +46,7 @@ async def search(
     )
 
     return ListResource(
-        items=[
-            Account.from_db(a)
-            for a in accs
-            if await authz.can(auth.user, AccessType.read, a)
-        ]
+        items=[Account.from_db(a) for a in await authz.filter_readable(auth.user, accs)]
     )
 
 
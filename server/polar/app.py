@@ -6,10 +6,14 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.routing import BaseRoute
 
 from polar import receivers  # noqa
+
+# Registers the queue of each task, used when enqueuing jobs
+from polar import tasks  # noqa
 from polar.api import router
 from polar.config import settings
 from polar.health.endpoints import router as health_router
 from polar.logging import configure as configure_logging
+from polar.posthog import posthog
 from polar.sentry import configure_sentry
 from polar.tags.api import Tags
 
@@ -42,6 +46,9 @@ def create_app() -> FastAPI:
 
     app.include_router(router)
 
+    # Send the analytics events still buffered
+    app.add_event_handler("shutdown", posthog.flush)
+
     return app
 
 
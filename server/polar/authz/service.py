@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Self
+from typing import Any, Self, Sequence, TypeVar
 from uuid import UUID
 
 from fastapi import Depends
@@ -9,9 +9,11 @@ from polar.models.account import Account
 from polar.models.issue import Issue
 from polar.models.issue_reward import IssueReward
 from polar.models.organization import Organization
+from polar.models.pledge import Pledge
 from polar.models.repository import Repository
 from polar.models.user import User
-from polar.organization.service import organization as organization_service
+from polar.models.user_organization import UserOrganization
+from polar.pledge.service import pledge as pledge_service
 from polar.postgres import AsyncSession, get_db_session
 from polar.user_organization.service import (
     user_organization as user_organization_service,
@@ -30,14 +32,25 @@ class AccessType(str, Enum):
     write = "write"
 
 
-Object = User | Organization | Repository | Account | IssueReward
+Object = User | Organization | Repository | Issue | Pledge | Account | IssueReward
+
+ObjectT = TypeVar("ObjectT", bound=Object)
 
 
 class Authz:
+    """
+    Authorization checks, for the lifetime of a request.
+
+    The memberships of a user are loaded once and kept on the instance, so that
+    checking many objects doesn't query them again for each object.
+    """
+
     session: AsyncSession
 
     def __init__(self, session: AsyncSession):
         self.session = session
+        # User id -> organization id -> membership
+        self._memberships_cache: dict[UUID, dict[UUID, UserOrganization]] = {}
 
     @classmethod
     async def authz(cls, session: AsyncSession = Depends(get_db_session)) -> Self:
@@ -46,19 +59,25 @@ class Authz:
     async def can(
         self, subject: Subject, accessType: AccessType, object: Object
     ) -> bool:
+        if accessType == AccessType.read and isinstance(object, Repository):
+            return await self._can_read_repository(subject, object)
+
+        if accessType == AccessType.read and isinstance(object, Issue):
+            return await self._can_read_issue(subject, object)
+
         if (
             isinstance(subject, User)
             and accessType == AccessType.read
-            and isinstance(object, Repository)
+            and isinstance(object, Pledge)
         ):
-            return self._can_user_read_repository(subject, object)
+            return await self._can_user_read_pledge(subject, object)
 
         if (
             isinstance(subject, User)
             and accessType == AccessType.write
             and isinstance(object, Repository)
         ):
-            return self._can_user_write_repository(subject, object)
+            return await self._can_user_write_repository(subject, object)
 
         if (
             isinstance(subject, User)
@@ -90,19 +109,156 @@ class Authz:
 
         raise Exception("Unknown subject action or object.")
 
-    def _can_user_read_repository(self, subject: User, object: Repository) -> bool:
-        if object.is_private is False:
+    #
+    # Batch authorization.
+    #
+    # Related objects are loaded once per call, instead of once per object as
+    # when calling can() in a loop.
+    #
+
+    async def filter_readable(
+        self, subject: Subject, objects: Sequence[ObjectT]
+    ) -> list[ObjectT]:
+        """
+        Keep the objects that the subject can read, in their original order.
+
+        Objects of different types can be mixed, each type is checked in bulk.
+        """
+        by_type: dict[type, list[Any]] = {}
+        for o in objects:
+            by_type.setdefault(type(o), []).append(o)
+
+        readable: set[int] = set()
+        for object_type, of_type in by_type.items():
+            readable.update(
+                id(o)
+                for o in await self._filter_readable_of_type(
+                    subject, object_type, of_type
+                )
+            )
+
+        return [o for o in objects if id(o) in readable]
+
+    async def _filter_readable_of_type(
+        self, subject: Subject, object_type: type, objects: list[Any]
+    ) -> Sequence[Object]:
+        if issubclass(object_type, Repository):
+            return await self.filter_readable_repositories(subject, objects)
+        if issubclass(object_type, Issue):
+            return await self.filter_readable_issues(subject, objects)
+        if issubclass(object_type, Pledge):
+            return await self.filter_readable_pledges(subject, objects)
+        if issubclass(object_type, Account):
+            return await self.filter_readable_accounts(subject, objects)
+        if issubclass(object_type, IssueReward):
+            return await self.filter_readable_issue_rewards(subject, objects)
+
+        raise Exception("Unknown subject action or object.")
+
+    async def filter_readable_repositories(
+        self, subject: Subject, repositories: Sequence[Repository]
+    ) -> list[Repository]:
+        member_of = await self._member_organization_ids(subject)
+        return [
+            r
+            for r in repositories
+            if self._is_repository_readable(r, member_of=member_of)
+        ]
+
+    async def filter_readable_issues(
+        self, subject: Subject, issues: Sequence[Issue]
+    ) -> list[Issue]:
+        """
+        Requires Issue.repository to be loaded.
+        """
+        member_of = await self._member_organization_ids(subject)
+        return [
+            i
+            for i in issues
+            if self._is_repository_readable(i.repository, member_of=member_of)
+        ]
+
+    async def filter_readable_pledges(
+        self, subject: Subject, pledges: Sequence[Pledge]
+    ) -> list[Pledge]:
+        if not isinstance(subject, User):
+            return []
+
+        memberships = await self._memberships(subject)
+        return [
+            p
+            for p in pledges
+            if pledge_service.user_can_read_pledge(subject, p, memberships)
+        ]
+
+    async def filter_readable_accounts(
+        self, subject: Subject, accounts: Sequence[Account]
+    ) -> list[Account]:
+        if not isinstance(subject, User):
+            return []
+
+        member_of = await self._member_organization_ids(subject)
+        return [
+            a
+            for a in accounts
+            # Owned by self, or by a member organization
+            if (a.user_id and a.user_id == subject.id)
+            or (a.organization_id and a.organization_id in member_of)
+        ]
+
+    async def filter_readable_issue_rewards(
+        self, subject: Subject, rewards: Sequence[IssueReward]
+    ) -> list[IssueReward]:
+        if not isinstance(subject, User):
+            return []
+
+        memberships = await self._memberships_by_organization(subject.id)
+
+        def is_recipient(reward: IssueReward) -> bool:
+            # Rewarded to this user, or to a member organization
+            return bool(
+                (reward.user_id and reward.user_id == subject.id)
+                or (reward.organization_id and reward.organization_id in memberships)
+            )
+
+        # The other rewards are readable to the admins of the organization owning
+        # the issue, resolved for all the issues at once.
+        issue_organization_ids = await issue_service.get_organization_ids(
+            self.session,
+            list({r.issue_id for r in rewards if not is_recipient(r)}),
+        )
+
+        def is_issue_admin(reward: IssueReward) -> bool:
+            organization_id = issue_organization_ids.get(reward.issue_id)
+            membership = memberships.get(organization_id) if organization_id else None
+            return membership is not None and membership.is_admin
+
+        return [r for r in rewards if is_recipient(r) or is_issue_admin(r)]
+
+    async def _can_read_repository(self, subject: Subject, object: Repository) -> bool:
+        return len(await self.filter_readable_repositories(subject, [object])) > 0
+
+    async def _can_read_issue(self, subject: Subject, object: Issue) -> bool:
+        return len(await self.filter_readable_issues(subject, [object])) > 0
+
+    async def _can_user_read_pledge(self, subject: User, object: Pledge) -> bool:
+        return len(await self.filter_readable_pledges(subject, [object])) > 0
+
+    def _is_repository_readable(
+        self, repository: Repository, *, member_of: set[UUID]
+    ) -> bool:
+        if repository.is_private is False:
             return True
 
-        if object.organization_id and self._is_member(
-            subject.id, object.organization_id
-        ):
+        if repository.organization_id and repository.organization_id in member_of:
             return True
 
         return False
 
-    def _can_user_write_repository(self, subject: User, object: Repository) -> bool:
-        if object.organization_id and self._is_member_and_admin(
+    async def _can_user_write_repository(
+        self, subject: User, object: Repository
+    ) -> bool:
+        if object.organization_id and await self._is_member_and_admin(
             subject.id, object.organization_id
         ):
             return True
@@ -116,17 +272,7 @@ class Authz:
         return False
 
     async def _can_user_read_account(self, subject: User, object: Account) -> bool:
-        # Can read if owned by self
-        if object.user_id and subject.id == object.user_id:
-            return True
-
-        # Can read if owned by member org
-        if object.organization_id and await self._is_member(
-            subject.id, object.organization_id
-        ):
-            return True
-
-        return False
+        return len(await self.filter_readable_accounts(subject, [object])) > 0
 
     def _can_user_write_account(self, subject: User, object: Account) -> bool:
         # Can write if owned by self
@@ -140,52 +286,38 @@ class Authz:
         return False
 
     async def _can_user_write_issue(self, subject: User, object: Issue) -> bool:
-        org = await organization_service.get(self.session, object.organization_id)
-        if not org:
-            return False
-        if await self._can_user_write_organization(
-            subject,
-            org,
-        ):
-            return True
-        return False
+        return await self._is_member_and_admin(subject.id, object.organization_id)
 
     async def _can_read_issue_reward(self, subject: User, object: IssueReward) -> bool:
-        # If rewarded to this user
-        if object.user_id and object.user_id == subject.id:
-            return True
-
-        # If member of rewarded org
-        if object.organization_id and await self._is_member(
-            subject.id, object.organization_id
-        ):
-            return True
-
-        # Can read reward if can write issue
-        issue = await issue_service.get(self.session, object.issue_id)
-        if issue and await self._can_user_write_issue(subject, issue):
-            return True
-
-        return False
-
-    async def _is_member(self, user_id: UUID, organization_id: UUID) -> bool:
-        memberships = await user_organization_service.list_by_user_id(
-            self.session, user_id
-        )
-
-        for m in memberships:
-            if m.organization_id == organization_id:
-                return True
-
-        return False
+        return len(await self.filter_readable_issue_rewards(subject, [object])) > 0
+
+    async def _memberships_by_organization(
+        self, user_id: UUID
+    ) -> dict[UUID, UserOrganization]:
+        memberships = self._memberships_cache.get(user_id)
+        if memberships is None:
+            memberships = {
+                m.organization_id: m
+                for m in await user_organization_service.list_by_user_id(
+                    self.session, user_id
+                )
+            }
+            self._memberships_cache[user_id] = memberships
+        return memberships
+
+    async def _memberships(self, subject: Subject) -> Sequence[UserOrganization]:
+        if not isinstance(subject, User):
+            return []
+
+        return list((await self._memberships_by_organization(subject.id)).values())
+
+    async def _member_organization_ids(self, subject: Subject) -> set[UUID]:
+        if not isinstance(subject, User):
+            return set()
+
+        return set(await self._memberships_by_organization(subject.id))
 
     async def _is_member_and_admin(self, user_id: UUID, organization_id: UUID) -> bool:
-        memberships = await user_organization_service.list_by_user_id(
-            self.session, user_id
-        )
-
-        for m in memberships:
-            if m.organization_id == organization_id and m.is_admin:
-                return True
-
-        return False
+        memberships = await self._memberships_by_organization(user_id)
+        membership = memberships.get(organization_id)
+        return membership is not None and membership.is_admin
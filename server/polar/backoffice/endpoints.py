@@ -1,7 +1,8 @@
+from datetime import datetime
 from uuid import UUID
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from polar.auth.dependencies import Auth
 from polar.enums import Platforms
@@ -23,6 +24,7 @@ from polar.models.pledge import Pledge as PledgeModel
 from polar.models.pledge_transaction import PledgeTransaction as PledgeTransactionModel
 from polar.organization.endpoints import OrganizationPrivateRead
 from polar.organization.service import organization as organization_service
+from polar.pledge.schemas import PledgeState
 from polar.pledge.service import pledge as pledge_service
 from polar.postgres import AsyncSession, get_db_session
 from polar.reward.endpoints import to_resource as reward_to_resource
@@ -34,6 +36,7 @@ from .schemas import (
     BackofficeBadge,
     BackofficeBadgeResponse,
     BackofficePledge,
+    BackofficePledgeTotals,
     BackofficeReward,
 )
 
@@ -44,10 +47,45 @@ log = structlog.get_logger()
 
 @router.get("/pledges", response_model=list[BackofficePledge])
 async def pledges(
+    state: list[PledgeState] | None = Query(None),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    before_created_at: datetime
+    | None = Query(
+        None, description="created_at of the last pledge of the previous page"
+    ),
+    before_id: UUID
+    | None = Query(None, description="id of the last pledge of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
     auth: Auth = Depends(Auth.backoffice_user),
     session: AsyncSession = Depends(get_db_session),
 ) -> list[BackofficePledge]:
-    return await bo_pledges_service.list_pledges(session)
+    return await bo_pledges_service.list_pledges(
+        session,
+        states=state,
+        created_after=created_after,
+        created_before=created_before,
+        before=(before_created_at, before_id)
+        if before_created_at and before_id
+        else None,
+        limit=limit,
+    )
+
+
+@router.get("/pledges/totals", response_model=BackofficePledgeTotals)
+async def pledges_totals(
+    state: list[PledgeState] | None = Query(None),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    auth: Auth = Depends(Auth.backoffice_user),
+    session: AsyncSession = Depends(get_db_session),
+) -> BackofficePledgeTotals:
+    return await bo_pledges_service.get_totals(
+        session,
+        states=state,
+        created_after=created_after,
+        created_before=created_before,
+    )
 
 
 def r(
@@ -69,10 +107,30 @@ def r(
 @router.get("/rewards", response_model=ListResource[BackofficeReward])
 async def rewards(
     issue_id: UUID | None = None,
+    before_pledge_created_at: datetime
+    | None = Query(
+        None, description="pledge.created_at of the last reward of the previous page"
+    ),
+    before_pledge_id: UUID
+    | None = Query(
+        None, description="pledge.id of the last reward of the previous page"
+    ),
+    before_issue_reward_id: UUID
+    | None = Query(
+        None, description="issue_reward_id of the last reward of the previous page"
+    ),
+    limit: int = Query(100, ge=1, le=1000),
     auth: Auth = Depends(Auth.backoffice_user),
     session: AsyncSession = Depends(get_db_session),
 ) -> ListResource[BackofficeReward]:
-    rewards = await reward_service.list(session, issue_id=issue_id)
+    rewards = await reward_service.list(
+        session,
+        issue_id=issue_id,
+        before=(before_pledge_created_at, before_pledge_id, before_issue_reward_id)
+        if before_pledge_created_at and before_pledge_id and before_issue_reward_id
+        else None,
+        limit=limit,
+    )
 
     return ListResource(
         items=[
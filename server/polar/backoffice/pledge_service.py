@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
 import structlog
-from sqlalchemy import desc
+from sqlalchemy import desc, func, tuple_
 from sqlalchemy.orm import (
     joinedload,
 )
 
-from polar.backoffice.schemas import BackofficePledge
+from polar.backoffice.schemas import (
+    BackofficePledge,
+    BackofficePledgeOrganizationTotal,
+    BackofficePledgeStateTotal,
+    BackofficePledgeTotals,
+)
 from polar.kit.extensions.sqlalchemy import sql
-from polar.models.account import Account
 from polar.models.issue import Issue
 from polar.models.organization import Organization
 from polar.models.pledge import Pledge
@@ -20,7 +28,45 @@ log = structlog.get_logger()
 
 
 class BackofficePledgeService:
-    async def list_pledges(self, session: AsyncSession) -> list[BackofficePledge]:
+    def _filter(
+        self,
+        stmt: sql.Select[Any],
+        *,
+        states: list[PledgeState] | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> sql.Select[Any]:
+        # Initiated pledges are abandoned or ongoing checkouts, never listed. This
+        # condition matches the partial indexes on pledges.
+        stmt = stmt.where(Pledge.state != PledgeState.initiated)
+
+        if states:
+            stmt = stmt.where(Pledge.state.in_(states))
+
+        if created_after:
+            stmt = stmt.where(Pledge.created_at >= created_after)
+
+        if created_before:
+            stmt = stmt.where(Pledge.created_at < created_before)
+
+        return stmt
+
+    async def list_pledges(
+        self,
+        session: AsyncSession,
+        *,
+        states: list[PledgeState] | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        before: tuple[datetime, UUID] | None = None,
+        limit: int = 100,
+    ) -> list[BackofficePledge]:
+        """
+        List pledges, most recent first.
+
+        Paginated with a keyset: pass the (created_at, id) of the last pledge of a
+        page as `before` to get the next one.
+        """
         stmt = sql.select(Pledge).options(
             joinedload(Pledge.by_organization),
             joinedload(Pledge.to_organization),
@@ -30,17 +76,83 @@ class BackofficePledgeService:
             .joinedload(Repository.organization),
         )
 
-        stmt = stmt.join(
-            Account, Account.organization_id == Pledge.organization_id, isouter=True
+        stmt = self._filter(
+            stmt,
+            states=states,
+            created_after=created_after,
+            created_before=created_before,
         )
 
-        stmt = stmt.where(Pledge.state != PledgeState.initiated)
+        if before:
+            stmt = stmt.where(tuple_(Pledge.created_at, Pledge.id) < before)
 
-        stmt = stmt.order_by(desc(Pledge.created_at))
+        stmt = stmt.order_by(desc(Pledge.created_at), desc(Pledge.id)).limit(limit)
 
         res = await session.execute(stmt)
         pledges = res.scalars().unique().all()
         return [BackofficePledge.from_db(p) for p in pledges]
 
+    async def get_totals(
+        self,
+        session: AsyncSession,
+        *,
+        states: list[PledgeState] | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        organizations_limit: int = 50,
+    ) -> BackofficePledgeTotals:
+        """
+        Count and sum pledges by state, and by receiving organization (the ones
+        with the largest sums first).
+        """
+        by_state = self._filter(
+            sql.select(
+                Pledge.state,
+                func.count(Pledge.id),
+                func.coalesce(func.sum(Pledge.amount), 0),
+            ).group_by(Pledge.state),
+            states=states,
+            created_after=created_after,
+            created_before=created_before,
+        )
+
+        amount = func.coalesce(func.sum(Pledge.amount), 0)
+        by_organization = (
+            self._filter(
+                sql.select(
+                    Pledge.organization_id,
+                    Organization.name,
+                    func.count(Pledge.id),
+                    amount,
+                )
+                .join(Organization, Organization.id == Pledge.organization_id)
+                .group_by(Pledge.organization_id, Organization.name),
+                states=states,
+                created_after=created_after,
+                created_before=created_before,
+            )
+            .order_by(desc(amount))
+            .limit(organizations_limit)
+        )
+
+        state_rows = (await session.execute(by_state)).all()
+        organization_rows = (await session.execute(by_organization)).all()
+
+        return BackofficePledgeTotals(
+            by_state=[
+                BackofficePledgeStateTotal(state=state, count=count, amount=amount)
+                for state, count, amount in state_rows
+            ],
+            by_organization=[
+                BackofficePledgeOrganizationTotal(
+                    organization_id=organization_id,
+                    organization_name=name,
+                    count=count,
+                    amount=amount,
+                )
+                for organization_id, name, count, amount in organization_rows
+            ],
+        )
+
 
 bo_pledges_service = BackofficePledgeService()
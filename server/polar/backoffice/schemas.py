@@ -44,6 +44,24 @@ class BackofficePledge(PledgeSchema):
         )
 
 
+class BackofficePledgeStateTotal(Schema):
+    state: str
+    count: int
+    amount: int
+
+
+class BackofficePledgeOrganizationTotal(Schema):
+    organization_id: UUID
+    organization_name: str
+    count: int
+    amount: int
+
+
+class BackofficePledgeTotals(Schema):
+    by_state: list[BackofficePledgeStateTotal]
+    by_organization: list[BackofficePledgeOrganizationTotal]
+
+
 class BackofficeBadge(Schema):
     org_slug: str
     repo_slug: str
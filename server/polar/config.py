@@ -16,6 +16,11 @@ class EmailSender(str, Enum):
     sendgrid = "sendgrid"
 
 
+class PostHogSink(str, Enum):
+    posthog = "posthog"
+    file = "file"
+
+
 class Settings(BaseSettings):
     ENV: Environment = Environment.development
     DEBUG: bool = False
@@ -52,6 +57,12 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "127.0.0.1"
     REDIS_PORT: int = 6379
 
+    # Worker, concurrent jobs per queue
+    WORKER_MAX_JOBS_DEFAULT: int = 10
+    WORKER_MAX_JOBS_WEBHOOKS: int = 20
+    WORKER_MAX_JOBS_CRAWLS: int = 4
+    WORKER_MAX_JOBS_NOTIFICATIONS: int = 10
+
     # Github App
     GITHUB_APP_IDENTIFIER: str = ""
     GITHUB_APP_WEBHOOK_SECRET: str = ""
@@ -84,6 +95,16 @@ class Settings(BaseSettings):
     SENDGRID_API_KEY: str = ""
 
     POSTHOG_PROJECT_API_KEY: str = ""
+    # Where analytics events go. The file sink writes them as JSON lines to
+    # POSTHOG_FILE_SINK_PATH, e.g. for load testing.
+    POSTHOG_SINK: PostHogSink = PostHogSink.posthog
+    POSTHOG_FILE_SINK_PATH: str = "posthog_events.jsonl"
+    # Share of the anonymous events that are captured
+    POSTHOG_ANONYMOUS_SAMPLE_RATE: float = 0.1
+    # Events buffered in memory before being dropped, and flushed per batch
+    POSTHOG_QUEUE_SIZE: int = 10000
+    POSTHOG_BATCH_SIZE: int = 100
+    POSTHOG_FLUSH_INTERVAL_SECONDS: float = 5.0
 
     # Default organization setting for minimum pledge amount ($20)
     MINIMUM_ORG_PLEDGE_AMOUNT: int = 2000
@@ -1,7 +1,7 @@
 from typing import Any, Dict, List, Sequence, Union
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import joinedload
 
 from polar.auth.dependencies import Auth
@@ -20,6 +20,7 @@ from polar.dashboard.schemas import (
 from polar.enums import Platforms
 from polar.issue.schemas import IssueRead, IssueReferenceRead
 from polar.issue.service import issue
+from polar.kit.responses import FastJSONResponse
 from polar.models.issue import Issue
 from polar.models.organization import Organization
 from polar.models.repository import Repository
@@ -41,6 +42,7 @@ router = APIRouter(tags=["dashboard"])
 @router.get(
     "/dashboard/personal",
     response_model=IssueListResponse,
+    response_class=FastJSONResponse,
 )
 async def get_personal_dashboard(
     issue_list_type: IssueListType = IssueListType.issues,
@@ -52,24 +54,27 @@ async def get_personal_dashboard(
     page: int = Query(default=1),
     auth: Auth = Depends(Auth.current_user),
     session: AsyncSession = Depends(get_db_session),
-) -> IssueListResponse:
-    return await dashboard(
-        session=session,
-        issue_list_type=issue_list_type,
-        status=status,
-        q=q,
-        sort=sort,
-        in_repos=[],
-        page=page,
-        for_user=auth.user,
-        only_pledged=only_pledged,
-        only_badged=only_badged,
+) -> Response:
+    return FastJSONResponse(
+        await dashboard(
+            session=session,
+            issue_list_type=issue_list_type,
+            status=status,
+            q=q,
+            sort=sort,
+            in_repos=[],
+            page=page,
+            for_user=auth.user,
+            only_pledged=only_pledged,
+            only_badged=only_badged,
+        )
     )
 
 
 @router.get(
     "/dashboard/{platform}/{org_name}",
     response_model=IssueListResponse,
+    response_class=FastJSONResponse,
 )
 async def get_dashboard(
     platform: Platforms,
@@ -84,7 +89,7 @@ async def get_dashboard(
     page: int = Query(default=1),
     auth: Auth = Depends(Auth.user_with_org_access),
     session: AsyncSession = Depends(get_db_session),
-) -> IssueListResponse:
+) -> Response:
     repositories: Sequence[Repository] = []
 
     # if repo name is set, use that repository
@@ -123,18 +128,20 @@ async def get_dashboard(
     if auth.user.username == org_name:
         show_pledges_for_user = auth.user
 
-    return await dashboard(
-        session=session,
-        in_repos=repositories,
-        issue_list_type=issue_list_type,
-        status=status,
-        q=q,
-        sort=sort,
-        for_org=auth.organization,
-        for_user=show_pledges_for_user,
-        only_pledged=only_pledged,
-        only_badged=only_badged,
-        page=page,
+    return FastJSONResponse(
+        await dashboard(
+            session=session,
+            in_repos=repositories,
+            issue_list_type=issue_list_type,
+            status=status,
+            q=q,
+            sort=sort,
+            for_org=auth.organization,
+            for_user=show_pledges_for_user,
+            only_pledged=only_pledged,
+            only_badged=only_badged,
+            page=page,
+        )
     )
 
 
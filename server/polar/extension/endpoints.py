@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, Request
 from polar.auth.dependencies import Auth
 from polar.kit import utils
 from polar.extension.schemas import IssueExtensionRead
+from polar.extension.service import extension_telemetry
 from polar.issue.schemas import IssueReferenceRead
 from polar.enums import Platforms
 from polar.models.issue_reference import IssueReference
@@ -32,21 +33,21 @@ async def list_issues_for_extension(
     auth: Auth = Depends(Auth.user_with_org_and_repo_access),
     session: AsyncSession = Depends(get_db_session),
 ) -> list[IssueExtensionRead]:
-    # Update when we last saw this user and on which extension version
-    version = "unknown"
-    auth.user.last_seen_at_extension = utils.utc_now()
+    # Buffer when we last saw this user and on which extension version, it's
+    # written to the database in bulk by cron_flush_extension_telemetry.
+    version = None
     if request.headers.get("x-polar-agent"):
         parts = request.headers["x-polar-agent"].split("/")
         if len(parts) == 2:
             version = parts[1]
-            auth.user.last_version_extension = version
 
-    await auth.user.save(session=session)
+    await extension_telemetry.record(auth.user.id, utils.utc_now(), version)
+
     posthog.user_event(
         auth.user,
         "Extension GitHub Issues Load",
         {
-            "extension_version": version,
+            "extension_version": version or "unknown",
             "org": org_name,
             "repo": repo_name,
             "numbers": numbers,
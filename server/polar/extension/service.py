@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, cast
+from uuid import UUID
+
+import structlog
+from redis.exceptions import ResponseError
+from sqlalchemy import String, column, values
+from sqlalchemy.types import TIMESTAMP
+
+from polar.kit.extensions.sqlalchemy import PostgresUUID
+from polar.models.user import User
+from polar.postgres import AsyncSession, sql
+from polar.redis import Redis, redis
+
+log = structlog.get_logger()
+
+
+class ExtensionTelemetryService:
+    """
+    Write-behind buffer for when (and on which version) users last used the
+    browser extension.
+
+    The extension endpoints are hit on every GitHub page load, so instead of
+    updating the users table on every request, the latest sighting per user is
+    buffered in a Redis hash and flushed to Postgres in bulk by a cron job.
+    """
+
+    buffer_key = "extension:last_seen"
+    flushing_key = "extension:last_seen:flushing"
+
+    record_script = """
+    local value = cjson.decode(ARGV[2])
+    if value["version"] == cjson.null then
+        local previous = redis.call("HGET", KEYS[1], ARGV[1])
+        if previous then
+            value["version"] = cjson.decode(previous)["version"]
+        end
+    end
+    return redis.call("HSET", KEYS[1], ARGV[1], cjson.encode(value))
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    async def record(
+        self, user_id: UUID, seen_at: datetime, version: str | None = None
+    ) -> None:
+        """
+        Buffer a sighting of the user.
+
+        A sighting without a version keeps the version already buffered.
+        """
+        value = json.dumps({"seen_at": seen_at.isoformat(), "version": version})
+        await self.redis.eval(
+            self.record_script, 1, self.buffer_key, str(user_id), value
+        )
+
+    async def flush(self, session: AsyncSession) -> int:
+        # Swap out the buffer so that sightings recorded while flushing end up in
+        # the next batch. A leftover flushing key means that a previous flush
+        # failed, retry it before taking new sightings.
+        if not await self.redis.exists(self.flushing_key):
+            try:
+                await self.redis.rename(self.buffer_key, self.flushing_key)
+            except ResponseError:
+                # Nothing has been buffered since the last flush
+                return 0
+
+        # Responses are decoded, see polar.redis
+        buffered = cast(dict[str, str], await self.redis.hgetall(self.flushing_key))
+        if buffered:
+            rows: list[tuple[Any, ...]] = []
+            for user_id, raw in buffered.items():
+                value = json.loads(raw)
+                rows.append(
+                    (
+                        UUID(user_id),
+                        datetime.fromisoformat(value["seen_at"]),
+                        value["version"],
+                    )
+                )
+
+            sightings = values(
+                column("id", PostgresUUID),
+                column("seen_at", TIMESTAMP(timezone=True)),
+                column("version", String),
+                name="sightings",
+            ).data(rows)
+
+            stmt = (
+                sql.update(User)
+                .where(User.id == sightings.c.id)
+                .values(
+                    last_seen_at_extension=sightings.c.seen_at,
+                    last_version_extension=sql.func.coalesce(
+                        sightings.c.version, User.last_version_extension
+                    ),
+                )
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+        await self.redis.delete(self.flushing_key)
+
+        log.info("extension.telemetry.flushed", count=len(buffered))
+        return len(buffered)
+
+
+extension_telemetry = ExtensionTelemetryService(redis)
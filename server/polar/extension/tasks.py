@@ -0,0 +1,14 @@
+import structlog
+
+from polar.postgres import AsyncSessionLocal
+from polar.worker import JobContext, interval
+
+from .service import extension_telemetry
+
+log = structlog.get_logger()
+
+
+@interval(second={0, 30})
+async def cron_flush_extension_telemetry(ctx: JobContext) -> None:
+    async with AsyncSessionLocal() as session:
+        await extension_telemetry.flush(session)
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Sequence
+from uuid import UUID
+
+import structlog
+from githubkit.exception import RequestFailed
+from pydantic import BaseModel
+
+from polar.eventstream.service import publish
+from polar.models import Issue, Organization, Repository
+from polar.kit.extensions.sqlalchemy import sql
+from polar.postgres import AsyncSession, AsyncSessionLocal
+from polar.redis import Redis, redis
+
+from .badge import GithubBadge
+from .service.issue import BadgeCandidatesCursor, github_issue
+
+log = structlog.get_logger()
+
+# Issues loaded, edited and checkpointed at a time
+CHUNK_SIZE = 100
+
+# Concurrent issue edits per installation. Bursts of content-creating requests
+# trip GitHub's secondary rate limits, so keep it low.
+INSTALLATION_CONCURRENCY = 4
+
+# A run stops and schedules its continuation after this long, to stay well
+# within the worker job timeout.
+RUN_BUDGET_SECONDS = 60 * 3
+
+# Delay before resuming after being rate limited
+RATE_LIMITED_RETRY_DELAY = timedelta(minutes=1)
+
+# Delay before retrying when another run of the job holds the lock
+LOCKED_RETRY_DELAY = timedelta(seconds=30)
+
+CHECKPOINT_TTL_SECONDS = 60 * 60 * 24 * 7
+
+_installation_semaphores: dict[int, asyncio.Semaphore] = {}
+
+
+def installation_semaphore(installation_id: int) -> asyncio.Semaphore:
+    """
+    Edit budget shared by all the badge jobs of an installation in this worker.
+    """
+    semaphore = _installation_semaphores.get(installation_id)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(INSTALLATION_CONCURRENCY)
+        _installation_semaphores[installation_id] = semaphore
+    return semaphore
+
+
+def is_rate_limited(e: Exception) -> bool:
+    return isinstance(e, RequestFailed) and e.response.status_code in (403, 429)
+
+
+class BadgeAction(str, Enum):
+    embed = "embed"
+    remove = "remove"
+
+
+class BadgeJobProgress(BaseModel):
+    repository_id: UUID
+    action: BadgeAction
+    processed: int = 0
+    updated: int = 0
+    failed: int = 0
+    completed: bool = False
+    after_created_at: datetime | None = None
+    after_id: UUID | None = None
+
+    @property
+    def after(self) -> BadgeCandidatesCursor | None:
+        if self.after_created_at is None or self.after_id is None:
+            return None
+        return (self.after_created_at, self.after_id)
+
+
+class RepositoryBadgeJob:
+    """
+    Embeds badges in (or removes them from) all the issues of a repository.
+
+    Issues are processed in chunks, each chunk's GitHub edits running
+    concurrently within the installation's budget. After every chunk, the issues
+    are updated in bulk and a checkpoint is saved, so that a job that is stopped
+    (out of time budget, rate limited or crashed) resumes where it left off.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        action: BadgeAction,
+        organization: Organization,
+        repository: Repository,
+    ) -> None:
+        self.redis = redis
+        self.action = action
+        self.organization = organization
+        self.repository = repository
+
+    @property
+    def checkpoint_key(self) -> str:
+        return f"github:badge_job:{self.action.value}:{self.repository.id}"
+
+    async def get_checkpoint(self) -> BadgeJobProgress:
+        value = await self.redis.get(self.checkpoint_key)
+        if value is None:
+            return BadgeJobProgress(
+                repository_id=self.repository.id, action=self.action
+            )
+        return BadgeJobProgress.parse_raw(value)
+
+    async def save_checkpoint(self, progress: BadgeJobProgress) -> None:
+        await self.redis.set(
+            self.checkpoint_key, progress.json(), ex=CHECKPOINT_TTL_SECONDS
+        )
+
+    def candidates_statement(
+        self, after: BadgeCandidatesCursor | None
+    ) -> sql.Select[tuple[Issue]] | None:
+        if self.action == BadgeAction.embed:
+            return github_issue.badge_add_candidates_statement(
+                self.organization, self.repository, after=after
+            )
+        return github_issue.badge_remove_candidates_statement(
+            self.organization, self.repository, after=after
+        )
+
+    async def run(
+        self, session: AsyncSession, *, budget_seconds: float = RUN_BUDGET_SECONDS
+    ) -> timedelta | None:
+        """
+        Process chunks until done or out of budget.
+
+        Returns None when the job is completed, or the delay after which it
+        should be continued. If another run holds the lock, it's retried shortly
+        rather than dropped, since it may have been requested after that run
+        went past the issues it would change.
+        """
+        # Only one run at a time per repository and action, a concurrent run
+        # would edit the same issues. The lock outlives the run budget by the time
+        # needed to finish the last chunk.
+        lock = self.redis.lock(
+            f"{self.checkpoint_key}:lock", timeout=budget_seconds + 60 * 5
+        )
+        if not await lock.acquire(blocking=False):
+            log.info(
+                "github.badge.job.already_running",
+                action=self.action.value,
+                repository_id=self.repository.id,
+            )
+            return LOCKED_RETRY_DELAY
+
+        try:
+            return await self._run(session, budget_seconds)
+        finally:
+            await lock.release()
+
+    async def _run(
+        self, session: AsyncSession, budget_seconds: float
+    ) -> timedelta | None:
+        started_at = time.monotonic()
+        progress = await self.get_checkpoint()
+
+        statement = self.candidates_statement(progress.after)
+        if statement is not None:
+            # Candidates are streamed in a dedicated session, since the updates
+            # are committed on `session` as the chunks are processed.
+            async with AsyncSessionLocal() as read_session:
+                async for issues in github_issue.stream_badge_candidates(
+                    read_session, statement, chunk_size=CHUNK_SIZE
+                ):
+                    if time.monotonic() - started_at > budget_seconds:
+                        return timedelta(0)
+
+                    if not await self.process_chunk(session, issues, progress):
+                        return RATE_LIMITED_RETRY_DELAY
+
+        progress.completed = True
+        await self.redis.delete(self.checkpoint_key)
+        await self.publish(progress)
+        return None
+
+    async def process_chunk(
+        self,
+        session: AsyncSession,
+        issues: Sequence[Issue],
+        progress: BadgeJobProgress,
+    ) -> bool:
+        """
+        Edit the issues of the chunk and save the checkpoint after it.
+
+        Returns False if rate limited, in which case the checkpoint stays before
+        the chunk: the issues that were edited are recorded and won't be edited
+        again, the other ones will be retried. Failures are only counted once the
+        checkpoint is past them, so that retried ones aren't counted twice.
+        """
+        results = await asyncio.gather(
+            *[self.apply(issue) for issue in issues], return_exceptions=True
+        )
+
+        updated: list[UUID] = []
+        failed = 0
+        rate_limited = False
+        for issue, result in zip(issues, results):
+            if isinstance(result, Exception):
+                if is_rate_limited(result):
+                    rate_limited = True
+                else:
+                    failed += 1
+                log.error(
+                    "github.badge.job.edit_failed",
+                    action=self.action.value,
+                    issue_id=issue.id,
+                    error=str(result),
+                )
+                continue
+
+            progress.processed += 1
+            updated.append(issue.id)
+
+        await github_issue.set_badges_embedded(
+            session, updated, embedded=self.action == BadgeAction.embed
+        )
+        progress.updated += len(updated)
+
+        if not rate_limited:
+            progress.failed += failed
+            progress.processed += failed
+            last = issues[-1]
+            progress.after_created_at = last.created_at
+            progress.after_id = last.id
+
+        await self.save_checkpoint(progress)
+        await self.publish(progress)
+        return not rate_limited
+
+    async def apply(self, issue: Issue) -> None:
+        badge = GithubBadge(
+            organization=self.organization, repository=self.repository, issue=issue
+        )
+        async with installation_semaphore(self.organization.installation_id or 0):
+            if self.action == BadgeAction.embed:
+                await badge.embed()
+            else:
+                await badge.remove()
+
+    async def publish(self, progress: BadgeJobProgress) -> None:
+        key = (
+            "repository.badge.completed"
+            if progress.completed
+            else "repository.badge.progress"
+        )
+        log.info(
+            key,
+            action=self.action.value,
+            repository_id=self.repository.id,
+            processed=progress.processed,
+            updated=progress.updated,
+            failed=progress.failed,
+        )
+        await publish(
+            key,
+            progress.dict(exclude={"after_created_at", "after_id"}),
+            organization_id=self.organization.id,
+        )
+
+
+def repository_badge_job(
+    action: BadgeAction, organization: Organization, repository: Repository
+) -> RepositoryBadgeJob:
+    return RepositoryBadgeJob(redis, action, organization, repository)
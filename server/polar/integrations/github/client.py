@@ -1,5 +1,7 @@
+import asyncio
 import time
 from typing import Any, Union
+from uuid import UUID
 
 import structlog
 from fastapi.encoders import jsonable_encoder
@@ -14,13 +16,17 @@ from githubkit import (
     utils,
     webhooks,
 )
+from githubkit.exception import RequestFailed
 from pydantic import Field
+from redis.exceptions import LockError
 
 from polar.config import settings
 from polar.enums import Platforms
 from polar.integrations.github.cache import RedisCache
-from polar.models.user import User
-from polar.postgres import AsyncSession
+from polar.integrations.github.rate_limit import installation_rate_limits
+from polar.models.user import OAuthAccount, User
+from polar.postgres import AsyncSession, AsyncSessionLocal
+from polar.redis import redis
 
 log = structlog.get_logger()
 
@@ -114,6 +120,21 @@ class RefreshAccessToken(rest.GitHubRestModel):
     token_type: str = Field(default=...)  # Always "bearer"
 
 
+# Tokens expiring within this delay are refreshed when getting a user client
+REFRESH_THRESHOLD_SECONDS = 60 * 30
+
+# In-process refreshes, by user, see refresh_user_token
+_refreshing: dict[UUID, asyncio.Future[None]] = {}
+
+
+def token_expires_within(oauth: OAuthAccount, seconds: int) -> bool:
+    return bool(
+        oauth.expires_at
+        and oauth.refresh_token
+        and oauth.expires_at <= (time.time() + seconds)
+    )
+
+
 async def get_user_client(
     session: AsyncSession, user: User
 ) -> GitHub[TokenAuthStrategy]:
@@ -122,38 +143,84 @@ async def get_user_client(
         raise Exception("no github oauth account found")
 
     # if token expires within 30 minutes, refresh it
-    if (
-        oauth.expires_at
-        and oauth.refresh_token
-        and oauth.expires_at <= (time.time() + 60 * 30)
-    ):
-        refresh = await GitHub().arequest(
-            method="POST",
-            url="https://github.com/login/oauth/access_token",
-            params={
-                "client_id": settings.GITHUB_CLIENT_ID,
-                "client_secret": settings.GITHUB_CLIENT_SECRET,
-                "refresh_token": oauth.refresh_token,
-                "grant_type": "refresh_token",
-            },
-            headers={"Accept": "application/json"},
-            response_model=RefreshAccessToken,
-        )
+    if token_expires_within(oauth, REFRESH_THRESHOLD_SECONDS):
+        await refresh_user_token(session, user, oauth)
 
-        if refresh:
-            r = refresh.parsed_data
-            # update
-            oauth.access_token = r.access_token
-            oauth.expires_at = int(time.time()) + r.expires_in
-            if r.refresh_token:
-                oauth.refresh_token = r.refresh_token
+    return get_client(oauth.access_token)
 
-            log.info("github.auth.refresh.succeeded", user=user.id)
-            await oauth.save(session)
-        else:
-            log.error("github.auth.refresh.failed", user=user.id)
 
-    return get_client(oauth.access_token)
+async def refresh_user_token(
+    session: AsyncSession,
+    user: User,
+    oauth: OAuthAccount,
+    *,
+    threshold_seconds: int = REFRESH_THRESHOLD_SECONDS,
+) -> None:
+    """
+    Refresh the user token, at most once at a time per user.
+
+    GitHub invalidates the previous refresh token on each refresh, so concurrent
+    refreshes would leave all but one caller with a revoked token. Callers within
+    the same process wait for the ongoing refresh, and a Redis lock serializes
+    refreshes across processes.
+
+    The refresh runs on its own session, as it outlives any cancelled caller.
+    """
+    ongoing = _refreshing.get(user.id)
+    if ongoing is None:
+        ongoing = asyncio.ensure_future(
+            _refresh_user_token_locked(user.id, oauth.id, threshold_seconds)
+        )
+        _refreshing[user.id] = ongoing
+        ongoing.add_done_callback(lambda _: _refreshing.pop(user.id, None))
+
+    await asyncio.shield(ongoing)
+    # Read the tokens written by the refresh
+    await session.refresh(oauth)
+
+
+async def _refresh_user_token_locked(
+    user_id: UUID,
+    oauth_id: UUID,
+    threshold_seconds: int,
+) -> None:
+    try:
+        async with redis.lock(
+            f"github:oauth_refresh:{user_id}", timeout=30, blocking_timeout=30
+        ), AsyncSessionLocal() as session:
+            # Another process might have refreshed it while we waited for the lock
+            oauth = await session.get(OAuthAccount, oauth_id)
+            if oauth is None or not token_expires_within(oauth, threshold_seconds):
+                return
+
+            refresh = await GitHub().arequest(
+                method="POST",
+                url="https://github.com/login/oauth/access_token",
+                params={
+                    "client_id": settings.GITHUB_CLIENT_ID,
+                    "client_secret": settings.GITHUB_CLIENT_SECRET,
+                    "refresh_token": oauth.refresh_token,
+                    "grant_type": "refresh_token",
+                },
+                headers={"Accept": "application/json"},
+                response_model=RefreshAccessToken,
+            )
+
+            if refresh:
+                r = refresh.parsed_data
+                # update
+                oauth.access_token = r.access_token
+                oauth.expires_at = int(time.time()) + r.expires_in
+                if r.refresh_token:
+                    oauth.refresh_token = r.refresh_token
+
+                log.info("github.auth.refresh.succeeded", user=user_id)
+                await oauth.save(session)
+            else:
+                log.error("github.auth.refresh.failed", user=user_id)
+    except LockError:
+        # Go on with the current token, it's not expired yet
+        log.error("github.auth.refresh.lock_failed", user=user_id)
 
 
 def get_client(access_token: str) -> GitHub[TokenAuthStrategy]:
@@ -182,6 +249,27 @@ def get_app_client() -> GitHub[AppAuthStrategy]:
     )
 
 
+class InstallationGitHub(GitHub[AppInstallationAuthStrategy]):
+    """
+    Records the rate limit of the installation from the headers of every
+    response, see `installation_rate_limits`.
+    """
+
+    async def arequest(self, *args: Any, **kwargs: Any) -> Response[Any]:
+        try:
+            response = await super().arequest(*args, **kwargs)
+        except RequestFailed as e:
+            await installation_rate_limits.record(
+                self.auth.installation_id, e.response.headers
+            )
+            raise
+
+        await installation_rate_limits.record(
+            self.auth.installation_id, response.headers
+        )
+        return response
+
+
 def get_app_installation_client(
     installation_id: int,
 ) -> GitHub[AppInstallationAuthStrategy]:
@@ -191,7 +279,7 @@ def get_app_installation_client(
     # Using the RedisCache() below to cache generated JWTs
     # This improves ETag/If-None-Match cache hits over the default in-memory cache, as
     # they can be reused across restarts of the python process and by multiple workers.
-    return GitHub(
+    return InstallationGitHub(
         AppInstallationAuthStrategy(
             app_id=settings.GITHUB_APP_IDENTIFIER,
             private_key=settings.GITHUB_APP_PRIVATE_KEY,
@@ -208,6 +296,7 @@ __all__ = [
     "get_app_client",
     "get_app_installation_client",
     "get_user_client",
+    "refresh_user_token",
     "webhooks",
     "rest",
     "GitHub",
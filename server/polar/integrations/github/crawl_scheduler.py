@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, and_, literal_column, not_, or_
+
+from polar.kit.extensions.sqlalchemy import sql
+from polar.models import Issue, Organization, Repository
+from polar.postgres import AsyncSession
+
+
+class CrawlKind(str, Enum):
+    issues = "issues"
+    timelines = "timelines"
+
+    @property
+    def fetched_at(self) -> Any:
+        if self == CrawlKind.issues:
+            return Issue.github_issue_fetched_at
+        return Issue.github_timeline_fetched_at
+
+
+class CrawlTier(str, Enum):
+    """
+    Issues are refreshed at a cadence depending on their tier, the tiers being
+    crawled in this order of priority.
+    """
+
+    # Pledged, or with the badge embedded
+    hot = "hot"
+    # Open and updated recently
+    active = "active"
+    cold = "cold"
+
+
+TIER_INTERVALS = {
+    CrawlTier.hot: datetime.timedelta(minutes=15),
+    CrawlTier.active: datetime.timedelta(hours=1),
+    CrawlTier.cold: datetime.timedelta(hours=24),
+}
+
+# Open issues updated within this window are active
+ACTIVE_WINDOW = datetime.timedelta(days=30)
+
+# Share of a sweep's budget kept for the cold tier, so that it's not starved
+COLD_TIER_SHARE = 0.1
+
+# Crawls enqueued for an organization per sweep, at most
+MAX_CRAWLS_PER_SWEEP = 100
+
+# GitHub requests made by a crawl, roughly. Timelines are paginated.
+CRAWL_COST = {
+    CrawlKind.issues: 1,
+    CrawlKind.timelines: 2,
+}
+
+
+def hot_clause() -> ColumnElement[bool]:
+    # Literals, rather than bound parameters, so that the planner matches the
+    # predicate of the partial indexes on the hot tier.
+    return or_(
+        Issue.pledged_amount_sum > literal_column("0"),
+        Issue.pledge_badge_currently_embedded,
+    )
+
+
+def active_clause(now: datetime.datetime) -> ColumnElement[bool]:
+    return and_(
+        not_(hot_clause()),
+        Issue.issue_closed_at.is_(None),
+        Issue.issue_modified_at >= now - ACTIVE_WINDOW,
+    )
+
+
+def cold_clause(now: datetime.datetime) -> ColumnElement[bool]:
+    return and_(
+        not_(hot_clause()),
+        not_(
+            and_(
+                Issue.issue_closed_at.is_(None),
+                Issue.issue_modified_at.is_not(None),
+                Issue.issue_modified_at >= now - ACTIVE_WINDOW,
+            )
+        ),
+    )
+
+
+def tier_clause(tier: CrawlTier, now: datetime.datetime) -> ColumnElement[bool]:
+    if tier == CrawlTier.hot:
+        return hot_clause()
+    if tier == CrawlTier.active:
+        return active_clause(now)
+    return cold_clause(now)
+
+
+def crawl_budget(kind: CrawlKind, requests_available: int | None) -> int:
+    """
+    Crawls that an organization can afford in a sweep, given the requests it can
+    spend, None if unknown.
+    """
+    if requests_available is None:
+        return MAX_CRAWLS_PER_SWEEP
+    return max(0, min(MAX_CRAWLS_PER_SWEEP, requests_available // CRAWL_COST[kind]))
+
+
+@dataclass
+class ScheduledCrawl:
+    issue_id: UUID
+    tier: CrawlTier
+    # When the issue was last refreshed, None if never
+    fetched_at: datetime.datetime | None
+
+
+@dataclass
+class TierFreshness:
+    """
+    Freshness of the due issues of a tier, as seen by a sweep.
+    """
+
+    tier: CrawlTier
+    scheduled: int
+    never_fetched: int
+    # Of the stalest scheduled issue fetched before, None if there is none
+    staleness: datetime.timedelta | None
+
+
+def get_freshness(
+    crawls: list[ScheduledCrawl], now: datetime.datetime
+) -> list[TierFreshness]:
+    """
+    Freshness per tier of the crawls scheduled by a sweep.
+
+    Due issues are scheduled stalest first, so this tells how far behind each tier
+    is without scanning all the issues.
+    """
+    freshness = []
+    for tier in CrawlTier:
+        fetched_at = [c.fetched_at for c in crawls if c.tier == tier]
+        fetched = [f for f in fetched_at if f is not None]
+        freshness.append(
+            TierFreshness(
+                tier=tier,
+                scheduled=len(fetched_at),
+                never_fetched=len(fetched_at) - len(fetched),
+                staleness=now - min(fetched) if fetched else None,
+            )
+        )
+    return freshness
+
+
+class CrawlScheduler:
+    """
+    Picks the issues of an organization to refresh from GitHub.
+
+    Within the budget of the organization, due issues of the hot tier come first,
+    the most pledged first, then the active and the cold ones, the stalest first.
+    A share of the budget is kept for the cold tier, and handed back to the other
+    tiers when it has fewer due issues.
+    """
+
+    async def schedule(
+        self,
+        session: AsyncSession,
+        kind: CrawlKind,
+        organization: Organization,
+        budget: int,
+    ) -> list[ScheduledCrawl]:
+        now = datetime.datetime.utcnow()
+
+        # Reserved first, so that what the cold tier doesn't need goes to the others
+        cold_reserved = int(budget * COLD_TIER_SHARE)
+        cold = await self._list_due(
+            session, kind, organization, CrawlTier.cold, now, cold_reserved
+        )
+
+        scheduled: list[ScheduledCrawl] = []
+        for tier in (CrawlTier.hot, CrawlTier.active):
+            limit = budget - len(cold) - len(scheduled)
+            scheduled += await self._list_due(
+                session, kind, organization, tier, now, limit
+            )
+
+        # The budget left by the other tiers goes to the cold one
+        limit = budget - len(scheduled)
+        if len(cold) == cold_reserved and limit > len(cold):
+            cold = await self._list_due(
+                session, kind, organization, CrawlTier.cold, now, limit
+            )
+
+        return scheduled + cold
+
+    async def _list_due(
+        self,
+        session: AsyncSession,
+        kind: CrawlKind,
+        organization: Organization,
+        tier: CrawlTier,
+        now: datetime.datetime,
+        limit: int,
+    ) -> list[ScheduledCrawl]:
+        if limit <= 0:
+            return []
+
+        stmt = self.due_statement(kind, organization, tier, now, limit)
+        res = await session.execute(stmt)
+        return [
+            ScheduledCrawl(issue_id=id, tier=tier, fetched_at=fetched_at)
+            for id, fetched_at in res.all()
+        ]
+
+    def due_statement(
+        self,
+        kind: CrawlKind,
+        organization: Organization,
+        tier: CrawlTier,
+        now: datetime.datetime,
+        limit: int,
+    ) -> sql.Select[tuple[UUID, datetime.datetime | None]]:
+        fetched_at = kind.fetched_at
+        # The hot tier is small, sorting it by pledges is cheap
+        order_by = [fetched_at.asc().nulls_first()]
+        if tier == CrawlTier.hot:
+            order_by.insert(0, Issue.pledged_amount_sum.desc())
+
+        return (
+            sql.select(Issue.id, fetched_at)
+            .join(Issue.repository)
+            .where(
+                Issue.organization_id == organization.id,
+                Issue.deleted_at.is_(None),
+                Repository.deleted_at.is_(None),
+                tier_clause(tier, now),
+                or_(fetched_at.is_(None), fetched_at < now - TIER_INTERVALS[tier]),
+            )
+            .order_by(*order_by)
+            .limit(limit)
+        )
+
+
+crawl_scheduler = CrawlScheduler()
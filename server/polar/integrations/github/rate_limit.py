@@ -0,0 +1,61 @@
+import time
+from collections.abc import Mapping
+
+from polar.kit.schemas import Schema
+from polar.redis import Redis, redis
+
+
+class RateLimit(Schema):
+    limit: int
+    remaining: int
+    used: int
+    reset: int
+
+
+class InstallationRateLimits:
+    """
+    Rate limits of the installations, as last seen in the headers of GitHub's
+    responses.
+
+    This saves a dedicated `/rate_limit` request before deciding whether an
+    installation can afford more work. Responses handled concurrently may be
+    recorded out of order, so the value is an approximation.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    def _key(self, installation_id: int) -> str:
+        return f"github:rate_limit:installation:{installation_id}"
+
+    def from_headers(self, headers: Mapping[str, str]) -> RateLimit | None:
+        try:
+            return RateLimit(
+                limit=int(headers["x-ratelimit-limit"]),
+                remaining=int(headers["x-ratelimit-remaining"]),
+                used=int(headers.get("x-ratelimit-used", 0)),
+                reset=int(headers["x-ratelimit-reset"]),
+            )
+        except (KeyError, ValueError):
+            return None
+
+    async def record(self, installation_id: int, headers: Mapping[str, str]) -> None:
+        rate_limit = self.from_headers(headers)
+        if rate_limit is None:
+            return
+
+        # Expires along with the rate limit window, the quota is whole again after
+        ttl = max(1, rate_limit.reset - int(time.time()))
+        await self.redis.set(self._key(installation_id), rate_limit.json(), ex=ttl)
+
+    async def get(self, installation_id: int) -> RateLimit | None:
+        """
+        Returns None if no request was made in the current window.
+        """
+        value = await self.redis.get(self._key(installation_id))
+        if value is None:
+            return None
+        return RateLimit.parse_raw(value)
+
+
+installation_rate_limits = InstallationRateLimits(redis)
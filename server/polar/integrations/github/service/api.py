@@ -5,18 +5,11 @@ from githubkit.typing import QueryParamTypes
 from githubkit.utils import UNSET, exclude_unset
 from githubkit.rest.models import BasicError
 
-from polar.kit.schemas import Schema
+from polar.integrations.github.rate_limit import RateLimit
 
 T = TypeVar("T")
 
 
-class RateLimit(Schema):
-    limit: int
-    remaining: int
-    used: int
-    reset: int
-
-
 class GitHubApi:
     async def get_rate_limit(self, client: GitHub[Any]) -> RateLimit:
         r = await client.rest.rate_limit.async_get()
@@ -1,30 +1,42 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
+from typing import Any, Awaitable, Sequence, TypeVar
+
 import structlog
-import re
-from polar.exceptions import IntegrityError, ResourceNotFound
+from githubkit import GitHub, Response
 from githubkit.exception import RequestFailed
-from polar.integrations.github.client import (
-    get_app_installation_client,
-    GitHub,
-    AppInstallationAuthStrategy,
-)
-from polar.integrations.github import service
+from sqlalchemy import tuple_
+from sqlalchemy.orm import contains_eager
+
+from polar.enums import Platforms
+from polar.integrations.github import client as github
+from polar.integrations.github.client import get_app_installation_client
+from polar.integrations.github.schemas import GitHubIssue
+from polar.integrations.github.service.issue import github_issue
 from polar.integrations.github.service.organization import github_organization
+from polar.integrations.github.service.repository import github_repository
 from polar.issue.schemas import IssueCreate
+from polar.models import Issue, Organization, Repository
 from polar.models.issue_dependency import IssueDependency
 from polar.organization.schemas import OrganizationCreate
-from polar.enums import Platforms
-
-from polar.models import Organization, Repository, Issue
 from polar.postgres import AsyncSession, sql
 from polar.repository.schemas import RepositoryCreate
 
 from .url import github_url
 
-
 log = structlog.get_logger()
 
+T = TypeVar("T")
+
+# Maximum number of concurrent GitHub requests while resolving external issues
+MAX_CONCURRENT_REQUESTS = 8
+
+# (owner, repo) and (owner, repo, number), lowercased since names are CIText
+RepositoryKey = tuple[str, str]
+IssueKey = tuple[str, str, int]
+
 
 class GitHubIssueDependenciesService:
     async def sync_issue_dependencies(
@@ -44,79 +56,331 @@ class GitHubIssueDependenciesService:
             )
             return
 
+        # References to issues in the same org don't need to be synced
+        dependencies = [
+            dependency
+            for dependency in github_url.parse_urls(issue.body)
+            if dependency.owner is not None
+            and dependency.repo is not None
+            and dependency.owner.lower() != org.name.lower()
+        ]
+        if not dependencies:
+            return
+
         client = get_app_installation_client(org.installation_id)
         log.info(
             "github.sync_issue_dependencies",
             id=repo.id,
             name=repo.name,
             issue=issue.number,
+            dependencies=len(dependencies),
         )
 
-        for dependency in github_url.parse_urls(issue.body):
-            if (
-                dependency.owner is None
-                or dependency.owner == org.name
-                or dependency.repo is None
-            ):
-                # this is a reference to an issue in the same org, we don't need to
-                # sync it
-                continue
+        dependency_issues = await self.resolve_external_issues(
+            session, client=client, dependencies=dependencies
+        )
 
-            try:
-                (
-                    _,
-                    _,
-                    dependency_issue,
-                ) = await github_organization.sync_external_org_with_repo_and_issue(
-                    session,
-                    client=client,
-                    org_name=dependency.owner,
-                    repo_name=dependency.repo,
-                    issue_number=dependency.number,
+        await self.create_dependencies(
+            session,
+            [
+                IssueDependency(
+                    organization_id=org.id,
+                    repository_id=repo.id,
+                    dependent_issue_id=issue.id,
+                    dependency_issue_id=dependency_issue.id,
                 )
-            except ResourceNotFound as e:
+                for dependency_issue in dependency_issues
+            ],
+        )
+
+    async def resolve_external_issues(
+        self,
+        session: AsyncSession,
+        *,
+        client: GitHub[Any],
+        dependencies: Sequence[GitHubIssue],
+    ) -> list[Issue]:
+        """
+        Batched version of sync_external_org_with_repo_and_issue.
+
+        Organizations, repositories and issues already known are looked up with one
+        query each. The missing ones are fetched concurrently from GitHub and created.
+        References that can't be found on GitHub are skipped.
+        """
+        wanted: dict[IssueKey, GitHubIssue] = {}
+        for d in dependencies:
+            if d.owner is None or d.repo is None:
                 continue
+            wanted[(d.owner.lower(), d.repo.lower(), d.number)] = d
+
+        if not wanted:
+            return []
 
-            issue_dependency = IssueDependency(
-                organization_id=org.id,
-                repository_id=repo.id,
-                dependent_issue_id=issue.id,
-                dependency_issue_id=dependency_issue.id,
+        repositories = await self._get_repositories(
+            session, {(owner, repo) for (owner, repo, _) in wanted}
+        )
+
+        missing_repositories = {
+            (owner, repo) for (owner, repo, _) in wanted
+        } - repositories.keys()
+        if missing_repositories:
+            repositories |= await self._sync_repositories(
+                session, client=client, keys=missing_repositories
             )
-            await self.create_dependency(session, issue_dependency)
 
-    async def create_dependency(
-        self, session: AsyncSession, ref: IssueDependency
-    ) -> None:
-        nested = await session.begin_nested()
-        try:
-            session.add(ref)
-            await nested.commit()
-            await session.commit()
-            log.info(
-                "issue.create_dependency.created",
-                ref=ref,
+        issues = await self._get_issues(
+            session,
+            {
+                key: repositories[(key[0], key[1])]
+                for key in wanted
+                if (key[0], key[1]) in repositories
+            },
+        )
+
+        missing_issues = {
+            key: repositories[(key[0], key[1])]
+            for key in wanted
+            if key not in issues and (key[0], key[1]) in repositories
+        }
+        if missing_issues:
+            issues |= await self._sync_issues(
+                session, client=client, keys=missing_issues
             )
+
+        return [issues[key] for key in wanted if key in issues]
+
+    async def create_dependencies(
+        self, session: AsyncSession, dependencies: Sequence[IssueDependency]
+    ) -> None:
+        if not dependencies:
             return
-        except IntegrityError:
-            log.info(
-                "issue.create_dependency.already_exists",
-                ref=ref,
+
+        stmt = (
+            sql.insert(IssueDependency)
+            .values(
+                [
+                    dict(
+                        organization_id=d.organization_id,
+                        repository_id=d.repository_id,
+                        dependent_issue_id=d.dependent_issue_id,
+                        dependency_issue_id=d.dependency_issue_id,
+                    )
+                    for d in dependencies
+                ]
             )
-            await nested.rollback()
+            .on_conflict_do_nothing(
+                index_elements=[
+                    IssueDependency.dependent_issue_id,
+                    IssueDependency.dependency_issue_id,
+                ]
+            )
+        )
+        await session.execute(stmt)
+        await session.commit()
+
+        log.info(
+            "issue.create_dependencies",
+            count=len(dependencies),
+        )
 
-        # Update (there are no columns to update, though)
+    async def _get_repositories(
+        self, session: AsyncSession, keys: set[RepositoryKey]
+    ) -> dict[RepositoryKey, Repository]:
         stmt = (
-            sql.Update(IssueDependency)
+            sql.select(Repository)
+            .join(Repository.organization)
             .where(
-                IssueDependency.dependent_issue_id == ref.dependent_issue_id,
-                IssueDependency.dependency_issue_id == ref.dependency_issue_id,
+                Organization.platform == Platforms.github,
+                Organization.name.in_({owner for (owner, _) in keys}),
+                Repository.name.in_({repo for (_, repo) in keys}),
+                Repository.deleted_at.is_(None),
             )
-            .values()
+            .options(contains_eager(Repository.organization))
         )
+        res = await session.execute(stmt)
 
-        await session.execute(stmt)
-        await session.commit()
+        ret: dict[RepositoryKey, Repository] = {}
+        for repository in res.scalars().unique().all():
+            key = (repository.organization.name.lower(), repository.name.lower())
+            if key in keys:
+                ret[key] = repository
+        return ret
+
+    async def _get_issues(
+        self, session: AsyncSession, keys: dict[IssueKey, Repository]
+    ) -> dict[IssueKey, Issue]:
+        if not keys:
+            return {}
+
+        by_repository_and_number = {
+            (repository.id, key[2]): key for key, repository in keys.items()
+        }
+        stmt = sql.select(Issue).where(
+            tuple_(Issue.repository_id, Issue.number).in_(
+                list(by_repository_and_number.keys())
+            ),
+        )
+        res = await session.execute(stmt)
+
+        return {
+            by_repository_and_number[(i.repository_id, i.number)]: i
+            for i in res.scalars().unique().all()
+        }
+
+    async def _sync_repositories(
+        self,
+        session: AsyncSession,
+        *,
+        client: GitHub[Any],
+        keys: set[RepositoryKey],
+    ) -> dict[RepositoryKey, Repository]:
+        fetched = await self._gather_bounded(
+            {key: client.rest.repos.async_get(key[0], key[1]) for key in keys}
+        )
+        github_repos: dict[RepositoryKey, github.rest.FullRepository] = {
+            key: response.parsed_data for key, response in fetched.items()
+        }
+        if not github_repos:
+            return {}
+
+        # The repository might be known under another name (renamed or transferred),
+        # so match on external ids before creating anything.
+        owners = {r.owner.id: r.owner for r in github_repos.values()}
+        organizations_stmt = sql.select(Organization).where(
+            Organization.external_id.in_(owners.keys())
+        )
+        res = await session.execute(organizations_stmt)
+        organizations = {o.external_id: o for o in res.scalars().unique().all()}
+
+        for external_id, owner in owners.items():
+            if external_id in organizations:
+                continue
+
+            log.info(
+                "organization not found by external_id, creating it",
+                org_name=owner.login,
+                external_id=external_id,
+            )
+            organizations[external_id] = await github_organization.create(
+                session,
+                OrganizationCreate(
+                    platform=Platforms.github,
+                    name=owner.login,
+                    external_id=owner.id,
+                    avatar_url=owner.avatar_url,
+                    is_personal=owner.type.lower() == "user",
+                ),
+            )
+
+        repositories_stmt = sql.select(Repository).where(
+            Repository.external_id.in_({r.id for r in github_repos.values()})
+        )
+        repositories_res = await session.execute(repositories_stmt)
+        repositories = {
+            r.external_id: r for r in repositories_res.scalars().unique().all()
+        }
+
+        ret: dict[RepositoryKey, Repository] = {}
+        for key, github_repo in github_repos.items():
+            organization = organizations[github_repo.owner.id]
+            # A repository known under another organization has been transferred,
+            # it's kept where it is until its installation syncs it.
+            repository = repositories.get(github_repo.id)
+            if not repository:
+                log.info(
+                    "repository not found by external_id, creating it",
+                    organization_id=organization.id,
+                    repo_name=github_repo.name,
+                    external_id=github_repo.id,
+                )
+                repository = await github_repository.create(
+                    session,
+                    RepositoryCreate(
+                        platform=Platforms.github,
+                        external_id=github_repo.id,
+                        organization_id=organization.id,
+                        name=github_repo.name,
+                        is_private=github_repo.private,
+                    ),
+                )
+                repositories[github_repo.id] = repository
+
+            ret[key] = repository
+
+        return ret
+
+    async def _sync_issues(
+        self,
+        session: AsyncSession,
+        *,
+        client: GitHub[Any],
+        keys: dict[IssueKey, Repository],
+    ) -> dict[IssueKey, Issue]:
+        # Fetched by the referenced names, GitHub redirects renamed repositories
+        fetched = await self._gather_bounded(
+            {key: client.rest.issues.async_get(key[0], key[1], key[2]) for key in keys}
+        )
+        if not fetched:
+            return {}
+
+        schemas: dict[IssueKey, IssueCreate] = {}
+        for key, response in fetched.items():
+            repository = keys[key]
+            if repository.organization_id is None:
+                continue
+            schemas[key] = IssueCreate.from_github(
+                response.parsed_data,
+                organization_id=repository.organization_id,
+                repository_id=repository.id,
+            )
+
+        log.info("issues not found, creating them", count=len(schemas))
+        records = await github_issue.upsert_many(
+            session, list(schemas.values()), constraints=[Issue.external_id]
+        )
+        by_external_id = {r.external_id: r for r in records}
+
+        return {
+            key: by_external_id[schema.external_id]
+            for key, schema in schemas.items()
+            if schema.external_id in by_external_id
+        }
+
+    async def _gather_bounded(
+        self, requests: dict[T, Awaitable[Response[Any]]]
+    ) -> dict[T, Response[Any]]:
+        """
+        Run GitHub requests concurrently, at most MAX_CONCURRENT_REQUESTS at a time.
+        Requests failing with a 404 are left out of the result. Any other error
+        cancels the pending requests and is raised.
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async def run(request: Awaitable[Response[Any]]) -> Response[Any] | None:
+            async with semaphore:
+                try:
+                    return await request
+                except RequestFailed as e:
+                    if e.response.status_code == 404:
+                        return None
+                    # re-raise other status codes
+                    raise e
+
+        tasks = {k: asyncio.ensure_future(run(r)) for k, r in requests.items()}
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            # Requests that never started
+            for request in requests.values():
+                if inspect.iscoroutine(request):
+                    request.close()
+            raise
+
+        responses = {k: task.result() for k, task in tasks.items()}
+        return {k: r for k, r in responses.items() if r is not None}
 
 
 github_dependency = GitHubIssueDependenciesService()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import datetime
-from typing import Any, Sequence, Union
+from typing import Any, AsyncIterator, Sequence, Union
 from uuid import UUID
 
 import structlog
@@ -10,15 +10,17 @@ from githubkit.exception import RequestFailed
 from githubkit.rest.models import Issue as GitHubIssue
 from githubkit.rest.models import Label
 from githubkit.webhooks.models import Label as WebhookLabel
-from sqlalchemy import asc, or_
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
 
-from polar.dashboard.schemas import IssueListType, IssueSortBy
+from polar.config import settings
 from polar.enums import Platforms
 from polar.integrations.github import client as github
 from polar.integrations.github.service.api import github_api
 from polar.issue.hooks import IssueHook, issue_upserted
 from polar.issue.schemas import IssueCreate
 from polar.issue.service import IssueService
+from polar.kit.db.models.mixins import CopyUpsertResult
 from polar.kit.extensions.sqlalchemy import sql
 from polar.kit.utils import utc_now
 from polar.models import Issue, Organization, Repository
@@ -29,6 +31,9 @@ from ..badge import GithubBadge
 
 log = structlog.get_logger()
 
+# Position in the badge candidates of a repository: (created_at, id) of an issue
+BadgeCandidatesCursor = tuple[datetime.datetime, UUID]
+
 
 class GithubIssueService(IssueService):
     async def get_by_external_id(
@@ -90,6 +95,71 @@ class GithubIssueService(IssueService):
             )
 
         schemas = [parse(issue) for issue in data]
+        return await self._store_schemas(
+            session, schemas, organization=organization, repository=repository
+        )
+
+    async def store_payload(
+        self,
+        session: AsyncSession,
+        *,
+        data: dict[str, Any],
+        organization: Organization,
+        repository: Repository,
+    ) -> Issue:
+        """
+        Store the issue of a raw webhook payload, without parsing the event.
+        """
+        schema = IssueCreate.from_github_payload(
+            data, organization_id=organization.id, repository_id=repository.id
+        )
+        records = await self._store_schemas(
+            session, [schema], organization=organization, repository=repository
+        )
+        return records[0]
+
+    async def bulk_import(
+        self,
+        session: AsyncSession,
+        *,
+        data: list[dict[str, Any]],
+        organization: Organization,
+        repository: Repository,
+    ) -> CopyUpsertResult:
+        """
+        Store the issues of raw GitHub payloads with COPY, for backfills.
+
+        The issue_upserted hooks only run for the issues that were already stored
+        and changed: the new ones are to be followed up on in bulk by the caller.
+        """
+        rows = [
+            IssueCreate.from_github_payload(
+                issue, organization_id=organization.id, repository_id=repository.id
+            ).dict()
+            for issue in data
+        ]
+        result = await Issue.copy_upsert_many(
+            session, rows, constraints=[Issue.external_id], autocommit=False
+        )
+
+        if result.updated:
+            res = await session.execute(
+                sql.select(Issue).where(Issue.id.in_(result.updated))
+            )
+            for record in res.scalars().all():
+                await issue_upserted.call(IssueHook(session, record))
+
+        await session.commit()
+        return result
+
+    async def _store_schemas(
+        self,
+        session: AsyncSession,
+        schemas: list[IssueCreate],
+        *,
+        organization: Organization,
+        repository: Repository,
+    ) -> Sequence[Issue]:
         if not schemas:
             log.warning(
                 "github.issue",
@@ -103,7 +173,9 @@ class GithubIssueService(IssueService):
             session, schemas, constraints=[Issue.external_id]
         )
         for record in records:
-            await issue_upserted.call(IssueHook(session, record))
+            # Nothing to react to if a re-sync didn't change the issue
+            if record.was_created or record.was_updated:
+                await issue_upserted.call(IssueHook(session, record))
         return records
 
     async def set_issue_badge_custom_message(
@@ -288,67 +360,100 @@ class GithubIssueService(IssueService):
             issue.github_issue_etag = res.headers.get("etag", None)
             await issue.save(session)
 
-    async def list_issues_to_crawl_issue(
+    def _badge_candidates_statement(
         self,
-        session: AsyncSession,
-        organization: Organization,
-    ) -> Sequence[Issue]:
-        current_time = datetime.datetime.utcnow()
-        one_hour_ago = current_time - datetime.timedelta(hours=1)
-
-        stmt = (
+        repository: Repository,
+        *,
+        after: BadgeCandidatesCursor | None,
+    ) -> sql.Select[tuple[Issue]]:
+        statement = (
             sql.select(Issue)
-            .join(Issue.organization)
-            .join(Issue.repository)
             .where(
-                or_(
-                    Issue.github_issue_fetched_at.is_(None),
-                    Issue.github_issue_fetched_at < one_hour_ago,
-                ),
+                Issue.repository_id == repository.id,
                 Issue.deleted_at.is_(None),
-                Organization.deleted_at.is_(None),
-                Repository.deleted_at.is_(None),
-                Organization.installation_id.is_not(None),
-                Organization.id == organization.id,
             )
-            .order_by(asc(Issue.github_issue_fetched_at))
-            .limit(100)
+            .order_by(Issue.created_at, Issue.id)
+            # Only what's needed to render and edit the badge, and to resume
+            .options(
+                load_only(
+                    Issue.id,
+                    Issue.created_at,
+                    Issue.number,
+                    Issue.badge_custom_content,
+                    raiseload=True,
+                )
+            )
         )
 
-        res = await session.execute(stmt)
+        if after is not None:
+            statement = statement.where(tuple_(Issue.created_at, Issue.id) > after)
 
-        return res.scalars().unique().all()
+        return statement
 
-    async def list_issues_to_crawl_timeline(
+    def badge_add_candidates_statement(
         self,
-        session: AsyncSession,
         organization: Organization,
-    ) -> Sequence[Issue]:
-        current_time = datetime.datetime.utcnow()
-        one_hour_ago = current_time - datetime.timedelta(hours=1)
-
-        stmt = (
-            sql.select(Issue)
-            .join(Issue.organization)
-            .join(Issue.repository)
-            .where(
-                or_(
-                    Issue.github_timeline_fetched_at.is_(None),
-                    Issue.github_timeline_fetched_at < one_hour_ago,
-                ),
-                Issue.deleted_at.is_(None),
-                Organization.deleted_at.is_(None),
-                Repository.deleted_at.is_(None),
-                Organization.installation_id.is_not(None),
-                Organization.id == organization.id,
-            )
-            .order_by(asc(Issue.github_timeline_fetched_at))
-            .limit(100)
+        repository: Repository,
+        *,
+        after: BadgeCandidatesCursor | None = None,
+    ) -> sql.Select[tuple[Issue]] | None:
+        """
+        Issues to embed the badge in when auto-embed is on, in the order of
+        creation and starting after the given (created_at, id) cursor.
+
+        Same criteria as GithubBadge.should_add_badge (when not triggered from a
+        label), evaluated in SQL. None if no issue can match.
+        """
+        if (
+            not settings.GITHUB_BADGE_EMBED
+            or organization.onboarded_at is None
+            or not repository.pledge_badge_auto_embed
+        ):
+            return None
+
+        return self._badge_candidates_statement(repository, after=after).where(
+            Issue.pledge_badge_ever_embedded.is_(False)
         )
 
-        res = await session.execute(stmt)
+    def badge_remove_candidates_statement(
+        self,
+        organization: Organization,
+        repository: Repository,
+        *,
+        after: BadgeCandidatesCursor | None = None,
+    ) -> sql.Select[tuple[Issue]] | None:
+        """
+        Issues to remove the badge from when auto-embed is turned off, in the
+        order of creation and starting after the given (created_at, id) cursor.
+
+        Same criteria as GithubBadge.should_remove_badge (when not triggered from
+        a label), evaluated in SQL. None if no issue can match.
+        """
+        if not settings.GITHUB_BADGE_EMBED or organization.onboarded_at is None:
+            return None
+
+        return self._badge_candidates_statement(repository, after=after).where(
+            Issue.has_pledge_badge_label.is_(False)
+        )
 
-        return res.scalars().unique().all()
+    async def stream_badge_candidates(
+        self,
+        session: AsyncSession,
+        statement: sql.Select[tuple[Issue]],
+        *,
+        chunk_size: int,
+    ) -> AsyncIterator[Sequence[Issue]]:
+        """
+        Yield the candidates in chunks, read through a server-side cursor.
+
+        The cursor lives in the session's transaction: use a session dedicated to
+        reading, and don't commit it while iterating.
+        """
+        result = await session.stream_scalars(
+            statement.execution_options(yield_per=chunk_size)
+        )
+        async for chunk in result.partitions():
+            yield chunk
 
     async def list_issues_to_add_badge_to_auto(
         self,
@@ -356,25 +461,12 @@ class GithubIssueService(IssueService):
         organization: Organization,
         repository: Repository,
     ) -> Sequence[Issue]:
-        (issues, _) = await self.list_by_repository_type_and_status(
-            session=session,
-            repository_ids=[repository.id],
-            issue_list_type=IssueListType.issues,
-            sort_by=IssueSortBy.recently_updated,
-        )
-
-        def filter(issue: Issue) -> bool:
-            (should, _) = GithubBadge.should_add_badge(
-                organization=organization,
-                repository=repository,
-                issue=issue,
-                triggered_from_label=False,
-            )
-            return should
-
-        add_issues = [issue for issue in reversed(issues) if filter(issue)]
+        statement = self.badge_add_candidates_statement(organization, repository)
+        if statement is None:
+            return []
 
-        return add_issues
+        res = await session.execute(statement)
+        return res.scalars().all()
 
     async def list_issues_to_remove_badge_from_auto(
         self,
@@ -382,25 +474,32 @@ class GithubIssueService(IssueService):
         organization: Organization,
         repository: Repository,
     ) -> Sequence[Issue]:
-        (issues, _) = await self.list_by_repository_type_and_status(
-            session=session,
-            repository_ids=[repository.id],
-            issue_list_type=IssueListType.issues,
-            sort_by=IssueSortBy.recently_updated,
-        )
+        statement = self.badge_remove_candidates_statement(organization, repository)
+        if statement is None:
+            return []
 
-        def filter(issue: Issue) -> bool:
-            (should, _) = GithubBadge.should_remove_badge(
-                organization=organization,
-                repository=repository,
-                issue=issue,
-                triggered_from_label=False,
-            )
-            return should
+        res = await session.execute(statement)
+        return res.scalars().all()
 
-        remove_issues = [issue for issue in reversed(issues) if filter(issue)]
+    async def set_badges_embedded(
+        self, session: AsyncSession, issue_ids: Sequence[UUID], *, embedded: bool
+    ) -> None:
+        """
+        Record that the badge was embedded in, or removed from, the issues.
+        """
+        if not issue_ids:
+            return
 
-        return remove_issues
+        stmt = (
+            sql.update(Issue)
+            .values(
+                pledge_badge_embedded_at=utc_now() if embedded else None,
+                pledge_badge_ever_embedded=True,
+            )
+            .where(Issue.id.in_(issue_ids))
+        )
+        await session.execute(stmt)
+        await session.commit()
 
     async def set_labels(
         self,
@@ -70,7 +70,9 @@ class GithubPullRequestService(PullRequestService):
         )
 
         for r in res:
-            await pull_request_upserted.call(PullRequestHook(session, r))
+            # Nothing to react to if a re-sync didn't change the pull request
+            if r.was_created or r.was_updated:
+                await pull_request_upserted.call(PullRequestHook(session, r))
 
         return res
 
@@ -133,7 +135,9 @@ class GithubPullRequestService(PullRequestService):
         )
 
         for r in res:
-            await pull_request_upserted.call(PullRequestHook(session, r))
+            # Nothing to react to if a re-sync didn't change the pull request
+            if r.was_created or r.was_updated:
+                await pull_request_upserted.call(PullRequestHook(session, r))
 
         return res
 
@@ -1,4 +1,5 @@
 from typing import List, Literal, Callable, Any, Coroutine, Sequence
+from uuid import UUID
 
 import structlog
 from githubkit import Paginator, Response
@@ -12,7 +13,7 @@ from polar.models import Organization, Repository, Issue, PullRequest
 from polar.enums import Platforms
 from polar.postgres import AsyncSession
 from polar.repository.hooks import SyncCompletedHook, SyncedHook
-from polar.worker import enqueue_job
+from polar.worker import enqueue_job, enqueue_jobs
 from polar.repository.schemas import RepositoryCreate
 from polar.repository.service import RepositoryService
 from polar.repository.hooks import (
@@ -169,6 +170,112 @@ class GithubRepositoryService(RepositoryService):
         )
         return (synced, errors)
 
+    async def bulk_import_issues(
+        self,
+        session: AsyncSession,
+        *,
+        organization: Organization,
+        repository: Repository,
+        state: Literal["open", "closed", "all"] = "open",
+        per_page: int = 30,
+        crawl_with_installation_id: int
+        | None = None,  # Override which installation to use when crawling
+    ) -> tuple[SyncedCount, ErrorCount]:
+        """
+        First-time sync of the issues of a repository.
+
+        Pages of issues are requested as raw JSON and stored with COPY, instead of
+        an upsert and hooks per issue. The new issues are followed up on in bulk:
+        their dependencies are synced and the badge is embedded by the repository
+        badge job. Their references are synced for the whole repository, after
+        the pull requests. The public issues of the organization are invalidated
+        once, when the sync is completed.
+        """
+        installation_id = (
+            crawl_with_installation_id
+            if crawl_with_installation_id
+            else organization.installation_id
+        )
+
+        if not installation_id:
+            raise Exception("no github installation id found")
+
+        client = github.get_app_installation_client(installation_id)
+
+        synced = 0
+        created: list[UUID] = []
+        page = 1
+        while True:
+            response = await client.arequest(
+                "GET",
+                f"/repos/{organization.name}/{repository.name}/issues",
+                params={
+                    "state": state,
+                    "sort": "updated",
+                    "direction": "desc",
+                    "per_page": per_page,
+                    "page": page,
+                },
+                response_model=list[dict[str, Any]],
+            )
+            data = response.parsed_data
+            synced += len(data)
+
+            # We get PRs in the issues list too, they're synced separately
+            issues = [d for d in data if not d.get("pull_request")]
+            if issues:
+                result = await github_issue.bulk_import(
+                    session,
+                    data=issues,
+                    organization=organization,
+                    repository=repository,
+                )
+                created += result.created
+
+            await repository_issue_synced.call(
+                SyncedHook(
+                    repository=repository,
+                    organization=organization,
+                    record=None,
+                    synced=synced,
+                )
+            )
+
+            if len(data) < per_page:
+                break
+            page += 1
+
+        await enqueue_jobs(
+            "github.issue.sync.issue_dependencies",
+            [((issue_id,), {}) for issue_id in created],
+        )
+        if (
+            created
+            and github_issue.badge_add_candidates_statement(organization, repository)
+            is not None
+        ):
+            await enqueue_job(
+                "github.badge.embed_retroactively_on_repository",
+                organization.id,
+                repository.id,
+            )
+
+        log.info(
+            "issue.bulk_import.completed",
+            organization_id=organization.id,
+            repository_id=repository.id,
+            synced=synced,
+            created=len(created),
+        )
+        await repository_issues_sync_completed.call(
+            SyncCompletedHook(
+                repository=repository,
+                organization=organization,
+                synced=synced,
+            )
+        )
+        return (synced, 0)
+
     async def sync_pull_requests(
         self,
         session: AsyncSession,
@@ -216,12 +323,14 @@ class GithubRepositoryService(RepositoryService):
         repository: Repository,
         crawl_with_installation_id: int
         | None = None,  # Override which installation to use when crawling
+        bulk_import: bool = False,  # First-time sync, see bulk_import_issues
     ) -> None:
         await enqueue_job(
             "github.repo.sync.issues",
             repository.organization_id,
             repository.id,
             crawl_with_installation_id=crawl_with_installation_id,
+            bulk_import=bulk_import,
         )
         await enqueue_job(
             "github.repo.sync.pull_requests",
@@ -261,7 +370,7 @@ class GithubRepositoryService(RepositoryService):
 
         await session.commit()
         for installation in instances:
-            await self.enqueue_sync(installation)
+            await self.enqueue_sync(installation, bulk_import=True)
         return instances
 
 
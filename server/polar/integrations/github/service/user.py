@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any, List
 
 import structlog
@@ -9,6 +10,7 @@ from polar.models import OAuthAccount, User
 from polar.organization.service import organization
 from polar.postgres import AsyncSession
 from polar.posthog import posthog
+from polar.redis import redis
 from polar.user.service import UserService
 
 from .. import client as github
@@ -19,6 +21,12 @@ log = structlog.get_logger()
 
 GithubUser = github.rest.PrivateUser | github.rest.PublicUser
 
+# Maximum number of concurrent membership checks when syncing admin orgs
+MEMBERSHIP_CHECK_CONCURRENCY = 8
+
+# How long (in seconds) a positive membership check is cached
+MEMBERSHIP_CACHE_TTL = 300
+
 
 class GithubUserService(UserService):
     async def get_user_by_github_id(
@@ -205,6 +213,7 @@ class GithubUserService(UserService):
             log.error("sync_github_admin_orgs.no_platform_oauth_found", user_id=user.id)
             return org_count
 
+        accounts: dict[int, github.rest.SimpleUser] = {}
         for i in installations:
             if not i.account:
                 continue
@@ -213,55 +222,104 @@ class GithubUserService(UserService):
                 log.error("sync_github_admin_orgs.github_enterprise_not_supported")
                 continue
 
-            org = await organization.get_by_platform(
-                session, Platforms.github, i.account.id
+            accounts[i.id] = i.account
+
+        orgs = {
+            o.external_id: o
+            for o in await organization.list_by_platform(
+                session, Platforms.github, [a.id for a in accounts.values()]
             )
-            if not org:
-                log.error("sync_github_admin_orgs.org_not_found", id=i.id)
-                continue
+        }
+
+        for installation_id, account in accounts.items():
+            if account.id not in orgs:
+                log.error("sync_github_admin_orgs.org_not_found", id=installation_id)
+
+        personal_account_id = int(gh_oauth.account_id)
+        semaphore = asyncio.Semaphore(MEMBERSHIP_CHECK_CONCURRENCY)
 
+        async def is_admin(
+            installation_id: int, account: github.rest.SimpleUser
+        ) -> bool:
             # If installed on personal account, always admin
-            if i.account.id == int(gh_oauth.account_id):
-                log.info(
-                    "sync_github_admin_orgs.add_admin",
-                    org_id=org.id,
-                    user_id=user.id,
+            if account.id == personal_account_id:
+                return True
+
+            # If installed on github org, check access
+            async with semaphore:
+                return await self._is_installation_admin(
+                    user=user,
+                    github_user=github_user,
+                    installation_id=installation_id,
+                    account=account,
                 )
 
-                # Add as admin in Polar (or upgrade existing memeber to admin)
-                await organization.add_user(session, org, user, is_admin=True)
-                org_count += 1
+        checks = {
+            installation_id: is_admin(installation_id, account)
+            for installation_id, account in accounts.items()
+            if account.id in orgs
+        }
+        results = await asyncio.gather(*checks.values())
+
+        # The session can't be shared by concurrent tasks, so write sequentially
+        for installation_id, admin in zip(checks.keys(), results):
+            if not admin:
                 continue
 
-            # If installed on github org, check access
-            try:
-                client = github.get_app_installation_client(i.id)
-                membership = await client.rest.orgs.async_get_membership_for_user(
-                    i.account.login,
-                    github_user.login,
-                )
+            org = orgs[accounts[installation_id].id]
+            log.info(
+                "sync_github_admin_orgs.add_admin",
+                org_id=org.id,
+                user_id=user.id,
+            )
 
-                data = membership.parsed_data
-                if data.role == "admin" and data.state == "active":
-                    log.info(
-                        "sync_github_admin_orgs.add_admin",
-                        org_id=org.id,
-                        user_id=user.id,
-                    )
-
-                    # Add as admin in Polar (or upgrade existing member to admin)
-                    await organization.add_user(session, org, user, is_admin=True)
-                    org_count += 1
-            except Exception as e:
-                log.error(
-                    "sync_github_admin_orgs.failed",
-                    err=e,
-                    org_id=org.id,
-                    user_id=user.id,
-                )
+            # Add as admin in Polar (or upgrade existing member to admin)
+            await organization.add_user(session, org, user, is_admin=True)
+            org_count += 1
 
         return org_count
 
+    async def _is_installation_admin(
+        self,
+        *,
+        user: User,
+        github_user: GithubUser,
+        installation_id: int,
+        account: github.rest.SimpleUser,
+    ) -> bool:
+        """
+        Whether the user is an active admin of the organization of the installation.
+
+        Admins are cached per user and installation for MEMBERSHIP_CACHE_TTL, as
+        this runs for every installation on every login. Negative results and
+        failures aren't cached, so that a just promoted user is synced on their
+        next login.
+        """
+        key = f"github:installation_admin:{user.id}:{installation_id}"
+        if await redis.exists(key):
+            return True
+
+        try:
+            client = github.get_app_installation_client(installation_id)
+            membership = await client.rest.orgs.async_get_membership_for_user(
+                account.login,
+                github_user.login,
+            )
+        except Exception as e:
+            log.error(
+                "sync_github_admin_orgs.failed",
+                err=e,
+                installation_id=installation_id,
+                user_id=user.id,
+            )
+            return False
+
+        data = membership.parsed_data
+        admin = data.role == "admin" and data.state == "active"
+        if admin:
+            await redis.set(key, "1", ex=MEMBERSHIP_CACHE_TTL)
+        return admin
+
     async def fetch_authenticated_user(
         self,
         *,
@@ -1,3 +1,3 @@
-from . import badge, repo, webhook, issue
+from . import badge, repo, webhook, issue, user
 
-__all__ = ["badge", "repo", "webhook", "issue"]
+__all__ = ["badge", "repo", "webhook", "issue", "user"]
@@ -1,9 +1,10 @@
 from uuid import UUID
 import structlog
-from polar.worker import JobContext, PolarWorkerContext, task
+from polar.worker import JobContext, PolarWorkerContext, QueueName, enqueue_job, task
 from polar.postgres import AsyncSessionLocal
 
 from .utils import get_organization_and_repo
+from ..badge_job import BadgeAction, repository_badge_job
 from ..service.issue import github_issue
 
 log = structlog.get_logger()
@@ -38,45 +39,35 @@ async def embed_badge(
             )
 
 
-@task("github.badge.embed_retroactively_on_repository")
+@task("github.badge.embed_retroactively_on_repository", queue=QueueName.crawls)
 async def embed_badge_retroactively_on_repository(
     ctx: JobContext,
     organization_id: UUID,
     repository_id: UUID,
     polar_context: PolarWorkerContext,
 ) -> None:
-    with polar_context.to_execution_context():
-        async with AsyncSessionLocal() as session:
-            organization, repository = await get_organization_and_repo(
-                session, organization_id, repository_id
-            )
+    await run_repository_badge_job(
+        BadgeAction.embed, organization_id, repository_id, polar_context
+    )
 
-            if repository.is_private:
-                log.warn(
-                    "github.embed_badge_retroactively_on_repository.skip_repo_is_private"
-                )
-                return
 
-            for i in await github_issue.list_issues_to_add_badge_to_auto(
-                session=session,
-                repository=repository,
-                organization=organization,
-            ):
-                await github_issue.embed_badge(
-                    session,
-                    organization=organization,
-                    repository=repository,
-                    issue=i,
-                    triggered_from_label=False,
-                )
-
-
-@task("github.badge.remove_on_repository")
+@task("github.badge.remove_on_repository", queue=QueueName.crawls)
 async def remove_badges_on_repository(
     ctx: JobContext,
     organization_id: UUID,
     repository_id: UUID,
     polar_context: PolarWorkerContext,
+) -> None:
+    await run_repository_badge_job(
+        BadgeAction.remove, organization_id, repository_id, polar_context
+    )
+
+
+async def run_repository_badge_job(
+    action: BadgeAction,
+    organization_id: UUID,
+    repository_id: UUID,
+    polar_context: PolarWorkerContext,
 ) -> None:
     with polar_context.to_execution_context():
         async with AsyncSessionLocal() as session:
@@ -85,18 +76,26 @@ async def remove_badges_on_repository(
             )
 
             if repository.is_private:
-                log.warn("github.remove_badges_on_repository.skip_repo_is_private")
+                log.warn(
+                    "github.badge.repository_job.skip_repo_is_private",
+                    action=action.value,
+                )
                 return
 
-            for i in await github_issue.list_issues_to_remove_badge_from_auto(
-                session=session,
-                repository=repository,
-                organization=organization,
-            ):
-                await github_issue.remove_badge(
-                    session,
-                    organization=organization,
-                    repository=repository,
-                    issue=i,
-                    triggered_from_label=False,
-                )
+            job = repository_badge_job(action, organization, repository)
+            continue_in = await job.run(session)
+
+        # The continuation picks up from the job's checkpoint
+        if continue_in is not None:
+            await enqueue_job(
+                TASK_BY_ACTION[action],
+                organization_id,
+                repository_id,
+                _defer_by=continue_in,
+            )
+
+
+TASK_BY_ACTION = {
+    BadgeAction.embed: "github.badge.embed_retroactively_on_repository",
+    BadgeAction.remove: "github.badge.remove_on_repository",
+}
@@ -1,20 +1,37 @@
+import asyncio
 from uuid import UUID
 import structlog
 from polar.integrations.github import service
-from polar.integrations.github.client import get_app_installation_client
+from polar.integrations.github.crawl_scheduler import (
+    CrawlKind,
+    crawl_budget,
+    crawl_scheduler,
+    get_freshness,
+)
+from polar.integrations.github.rate_limit import installation_rate_limits
+from polar.kit.utils import utc_now
+from polar.models.organization import Organization
 
-from polar.worker import JobContext, PolarWorkerContext, enqueue_job, interval, task
+from polar.worker import (
+    JobContext,
+    PolarWorkerContext,
+    QueueName,
+    enqueue_jobs,
+    interval,
+    task,
+)
 from polar.postgres import AsyncSessionLocal
 
 from .utils import get_organization_and_repo
 from ..service.issue import github_issue
-from ..service.api import github_api
 from polar.organization.service import organization as organization_service
 
 log = structlog.get_logger()
 
 
-@task("github.issue.sync")
+# No result is kept, so that a coalesced (see _job_id) sync can be enqueued again
+# as soon as the previous one is done.
+@task("github.issue.sync", keep_result=0, queue=QueueName.crawls)
 async def issue_sync(
     ctx: JobContext,
     issue_id: UUID,
@@ -46,7 +63,9 @@ async def issue_sync(
             )
 
 
-@task("github.issue.sync.issue_references")
+# No result is kept, so that a coalesced (see _job_id) sync can be enqueued again
+# as soon as the previous one is done.
+@task("github.issue.sync.issue_references", keep_result=0, queue=QueueName.crawls)
 async def issue_sync_issue_references(
     ctx: JobContext,
     issue_id: UUID,
@@ -78,7 +97,7 @@ async def issue_sync_issue_references(
             )
 
 
-@task("github.issue.sync.issue_dependencies")
+@task("github.issue.sync.issue_dependencies", queue=QueueName.crawls)
 async def issue_sync_issue_dependencies(
     ctx: JobContext,
     issue_id: UUID,
@@ -107,82 +126,136 @@ async def issue_sync_issue_dependencies(
             )
 
 
-@interval(
-    minute={2, 7, 12, 17, 22, 27, 32, 37, 42, 47, 52, 57},
-    second=0,
-)
-async def cron_refresh_issues(ctx: JobContext) -> None:
-    async with AsyncSessionLocal() as session:
-        orgs = await organization_service.list_installed(session)
-        for org in orgs:
-            client = get_app_installation_client(org.installation_id)
-            try:
-                rate_limit = await github_api.get_rate_limit(client)
-            except Exception as e:
-                log.info(
-                    "failed to get rate limit, treating it as no remaining",
-                    org_name=org.name,
-                    err=e,
-                )
-                continue
+# Installed organizations are spread over this many shards, each swept by its own
+# job, so that a sweep is distributed over the worker processes.
+SWEEP_SHARDS = 8
 
-            if rate_limit.remaining < 1000:
-                log.info(
-                    "github.issue.sync.cron_refresh_issues.rate_limit_almost_exhausted",
-                    org_name=org.name,
-                    rate_limit_remaining=rate_limit.remaining,
-                )
-                continue
+# Organizations of a shard swept concurrently
+SWEEP_CONCURRENCY = 4
+
+# Organizations with less requests left in their rate limit are skipped
+SWEEP_MIN_RATE_LIMIT_REMAINING = 1000
 
-            issues = await github_issue.list_issues_to_crawl_issue(session, org)
+SWEEP_TASKS = {
+    CrawlKind.issues: "github.issue.sync",
+    CrawlKind.timelines: "github.issue.sync.issue_references",
+}
 
-            log.info(
-                "github.issue.sync.cron_refresh_issues",
-                org_name=org.name,
-                found_count=len(issues),
-                rate_limit_remaining=rate_limit.remaining,
+
+async def enqueue_sweep(sweep: CrawlKind) -> None:
+    # A shard that's still pending from the previous sweep isn't enqueued again
+    await enqueue_jobs(
+        "github.issue.sweep",
+        [
+            (
+                (sweep, shard, SWEEP_SHARDS),
+                {"_job_id": f"github.issue.sweep:{sweep.value}:{shard}"},
             )
+            for shard in range(SWEEP_SHARDS)
+        ],
+    )
 
-            for issue in issues:
-                await enqueue_job("github.issue.sync", issue.id)
 
+@task("github.issue.sweep", keep_result=0)
+async def issue_sweep(
+    ctx: JobContext,
+    sweep: CrawlKind,
+    shard: int,
+    shards: int,
+    polar_context: PolarWorkerContext,
+) -> None:
+    with polar_context.to_execution_context():
+        async with AsyncSessionLocal() as session:
+            orgs = await organization_service.list_installed(
+                session, shard=shard, shards=shards
+            )
 
-@interval(
-    minute={0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55},
-    second=0,
-)
-async def cron_refresh_issue_timelines(ctx: JobContext) -> None:
+        semaphore = asyncio.Semaphore(SWEEP_CONCURRENCY)
+
+        async def sweep_organization(org: Organization) -> None:
+            async with semaphore:
+                try:
+                    await issue_sweep_organization(sweep, org)
+                except Exception:
+                    log.error(
+                        "github.issue.sweep.failed",
+                        sweep=sweep.value,
+                        org_name=org.name,
+                        exc_info=True,
+                    )
+
+        await asyncio.gather(*[sweep_organization(org) for org in orgs])
+
+        log.info(
+            "github.issue.sweep",
+            sweep=sweep.value,
+            shard=shard,
+            shards=shards,
+            orgs=len(orgs),
+        )
+
+
+async def issue_sweep_organization(sweep: CrawlKind, org: Organization) -> None:
+    # As last seen in the responses of the installation, unknown if no request was
+    # made in the current window: then, the quota is whole.
+    rate_limit = await installation_rate_limits.get(org.installation_id or 0)
+    budget = crawl_budget(
+        sweep,
+        rate_limit.remaining - SWEEP_MIN_RATE_LIMIT_REMAINING if rate_limit else None,
+    )
+    if budget == 0:
+        log.info(
+            "github.issue.sweep.rate_limit_almost_exhausted",
+            sweep=sweep.value,
+            org_name=org.name,
+            rate_limit_remaining=rate_limit.remaining if rate_limit else None,
+        )
+        return
+
+    # Organizations are swept concurrently, each in its own session
     async with AsyncSessionLocal() as session:
-        orgs = await organization_service.list_installed(session)
-        for org in orgs:
-            client = get_app_installation_client(org.installation_id)
-
-            try:
-                rate_limit = await github_api.get_rate_limit(client)
-            except Exception as e:
-                log.info(
-                    "failed to get rate limit, treating it as no remaining",
-                    org_name=org.name,
-                    err=e,
-                )
-                continue
+        crawls = await crawl_scheduler.schedule(session, sweep, org, budget)
 
-            if rate_limit.remaining < 1000:
-                log.info(
-                    "github.issue.sync.cron_refresh_issue_timelines.rate_limit_almost_exhausted",
-                    org_name=org.name,
-                    rate_limit_remaining=rate_limit.remaining,
-                )
-                continue
+    log.info(
+        "github.issue.sweep.organization",
+        sweep=sweep.value,
+        org_name=org.name,
+        budget=budget,
+        found_count=len(crawls),
+        rate_limit_remaining=rate_limit.remaining if rate_limit else None,
+    )
+    for freshness in get_freshness(crawls, utc_now()):
+        log.info(
+            "github.crawl.freshness",
+            kind=sweep.value,
+            org_name=org.name,
+            tier=freshness.tier.value,
+            scheduled=freshness.scheduled,
+            never_fetched=freshness.never_fetched,
+            staleness_seconds=freshness.staleness.total_seconds()
+            if freshness.staleness
+            else None,
+        )
 
-            issues = await github_issue.list_issues_to_crawl_timeline(session, org)
+    # Issues still pending from a previous sweep aren't enqueued again
+    name = SWEEP_TASKS[sweep]
+    await enqueue_jobs(
+        name,
+        [((c.issue_id,), {"_job_id": f"{name}:{c.issue_id}"}) for c in crawls],
+    )
+
+
+@interval(
+    minute={2, 7, 12, 17, 22, 27, 32, 37, 42, 47, 52, 57},
+    second=0,
+)
+async def cron_refresh_issues(ctx: JobContext) -> None:
+    await enqueue_sweep(CrawlKind.issues)
 
-            log.info(
-                "github.issue.sync.cron_refresh_issue_timelines",
-                org_name=org.name,
-                found_count=len(issues),
-                rate_limit_remaining=rate_limit.remaining,
-            )
 
-            for issue in issues:
-                await enqueue_job("github.issue.sync.issue_references", issue.id)
+@interval(
+    minute={0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55},
+    second=0,
+)
+async def cron_refresh_issue_timelines(ctx: JobContext) -> None:
+    await enqueue_sweep(CrawlKind.timelines)
@@ -2,7 +2,7 @@ from uuid import UUID
 import structlog
 
 from polar.integrations.github import service
-from polar.worker import JobContext, PolarWorkerContext, enqueue_job, task
+from polar.worker import JobContext, PolarWorkerContext, QueueName, enqueue_job, task
 from polar.postgres import AsyncSessionLocal
 
 from .utils import get_organization_and_repo
@@ -10,7 +10,7 @@ from .utils import get_organization_and_repo
 log = structlog.get_logger()
 
 
-@task("github.repo.sync.repositories")
+@task("github.repo.sync.repositories", queue=QueueName.crawls)
 async def sync_repositories(
     ctx: JobContext,
     organization_id: UUID,
@@ -29,7 +29,7 @@ async def sync_repositories(
             )
 
 
-@task("github.repo.sync.issues")
+@task("github.repo.sync.issues", queue=QueueName.crawls)
 async def sync_repository_issues(
     ctx: JobContext,
     organization_id: UUID,
@@ -37,12 +37,22 @@ async def sync_repository_issues(
     polar_context: PolarWorkerContext,
     crawl_with_installation_id: int
     | None = None,  # Override which installation to use when crawling
+    bulk_import: bool = False,
 ) -> None:
     with polar_context.to_execution_context():
         async with AsyncSessionLocal() as session:
             organization, repository = await get_organization_and_repo(
                 session, organization_id, repository_id
             )
+            if bulk_import:
+                await service.github_repository.bulk_import_issues(
+                    session,
+                    organization=organization,
+                    repository=repository,
+                    crawl_with_installation_id=crawl_with_installation_id,
+                )
+                return
+
             await service.github_repository.sync_issues(
                 session,
                 organization=organization,
@@ -51,7 +61,7 @@ async def sync_repository_issues(
             )
 
 
-@task("github.repo.sync.pull_requests")
+@task("github.repo.sync.pull_requests", queue=QueueName.crawls)
 async def sync_repository_pull_requests(
     ctx: JobContext,
     organization_id: UUID,
@@ -78,7 +88,7 @@ async def sync_repository_pull_requests(
             )
 
 
-@task("github.repo.sync.issue_references")
+@task("github.repo.sync.issue_references", queue=QueueName.crawls)
 async def repo_sync_issue_references(
     ctx: JobContext,
     organization_id: UUID,
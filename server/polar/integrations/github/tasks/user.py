@@ -0,0 +1,61 @@
+import time
+
+import structlog
+
+from polar.enums import Platforms
+from polar.integrations.github.client import (
+    REFRESH_THRESHOLD_SECONDS,
+    refresh_user_token,
+)
+from polar.models.user import OAuthAccount, User
+from polar.postgres import AsyncSessionLocal, sql
+from polar.worker import JobContext, interval
+
+log = structlog.get_logger()
+
+# Refresh tokens ahead of get_user_client, so that requests don't have to wait on
+# a refresh themselves
+REFRESH_AHEAD_SECONDS = REFRESH_THRESHOLD_SECONDS + 60 * 15
+
+# Maximum number of tokens refreshed per run
+REFRESH_BATCH_SIZE = 100
+
+
+@interval(
+    minute={1, 6, 11, 16, 21, 26, 31, 36, 41, 46, 51, 56},
+    second=0,
+)
+async def cron_refresh_expiring_user_tokens(ctx: JobContext) -> None:
+    async with AsyncSessionLocal() as session:
+        stmt = (
+            sql.select(User)
+            .join(OAuthAccount, OAuthAccount.user_id == User.id)
+            .where(
+                OAuthAccount.platform == Platforms.github,
+                OAuthAccount.refresh_token.is_not(None),
+                OAuthAccount.expires_at.is_not(None),
+                OAuthAccount.expires_at <= int(time.time()) + REFRESH_AHEAD_SECONDS,
+                # Expired tokens can't be refreshed by us anymore
+                OAuthAccount.expires_at > int(time.time()),
+            )
+            .order_by(OAuthAccount.expires_at)
+            .limit(REFRESH_BATCH_SIZE)
+        )
+        res = await session.execute(stmt)
+        users = res.scalars().unique().all()
+
+        refreshed = 0
+        for user in users:
+            oauth = user.get_platform_oauth_account(Platforms.github)
+            if not oauth:
+                continue
+
+            try:
+                await refresh_user_token(
+                    session, user, oauth, threshold_seconds=REFRESH_AHEAD_SECONDS
+                )
+                refreshed += 1
+            except Exception as e:
+                log.error("github.auth.refresh_ahead.failed", user=user.id, err=e)
+
+        log.info("github.auth.refresh_ahead", users=len(users), refreshed=refreshed)
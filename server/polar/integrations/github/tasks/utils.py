@@ -1,4 +1,4 @@
-from typing import Sequence, Union
+from typing import Any, Sequence, Union
 from uuid import UUID
 
 import structlog
@@ -69,9 +69,12 @@ async def get_event_org_repo(
         github.webhooks.IssuesReopened,
     ],
 ) -> Union[tuple[Organization, Repository], None]:
-    repository_id = event.repository.id
-    owner_id = event.repository.owner.id
+    return await get_org_repo(session, event.repository.owner.id, event.repository.id)
+
 
+async def get_org_repo(
+    session: AsyncSession, owner_id: int, repository_id: int
+) -> Union[tuple[Organization, Repository], None]:
     organization = await service.github_organization.get_by_external_id(
         session, owner_id
     )
@@ -87,31 +90,13 @@ async def get_event_org_repo(
     return (organization, repository)
 
 
-async def get_event_issue(
-    session: AsyncSession,
-    event: Union[
-        github.webhooks.IssuesOpened,
-        github.webhooks.IssuesEdited,
-        github.webhooks.IssuesClosed,
-        github.webhooks.IssuesDeleted,
-    ],
-) -> Issue | None:
-    return await service.github_issue.get_by_external_id(session, event.issue.id)
-
-
-async def upsert_issue(
-    session: AsyncSession,
-    event: Union[
-        github.webhooks.IssuesOpened,
-        github.webhooks.IssuesEdited,
-        github.webhooks.IssuesClosed,
-        github.webhooks.IssuesDeleted,
-        github.webhooks.IssuesReopened,
-    ],
-) -> Issue | None:
-    owner_id = event.repository.owner.id
-    repository_id = event.repository.id
-    org_repo = await get_event_org_repo(session, event)
+async def upsert_issue(session: AsyncSession, payload: dict[str, Any]) -> Issue | None:
+    """
+    Store the issue of an issues event, straight from the raw payload.
+    """
+    owner_id = payload["repository"]["owner"]["id"]
+    repository_id = payload["repository"]["id"]
+    org_repo = await get_org_repo(session, owner_id, repository_id)
     if not org_repo:
         log.warning(
             "github.webhook.upsert_issue",
@@ -123,8 +108,8 @@ async def upsert_issue(
 
     (org, repo) = org_repo
 
-    record = await service.github_issue.store(
-        session, data=event.issue, organization=org, repository=repo
+    record = await service.github_issue.store_payload(
+        session, data=payload["issue"], organization=org, repository=repo
     )
     return record
 
@@ -10,11 +10,11 @@ from polar.models.issue import Issue
 from polar.models.organization import Organization
 from polar.organization.hooks import OrganizationHook, organization_upserted
 from polar.postgres import AsyncSession, AsyncSessionLocal
-from polar.worker import JobContext, PolarWorkerContext, enqueue_job, task
+from polar.repository.hooks import RepositoryHook, repository_upserted
+from polar.worker import JobContext, PolarWorkerContext, QueueName, enqueue_job, task
 
 from .. import service
 from .utils import (
-    get_event_issue,
     get_organization_and_repo,
     remove_repositories,
     upsert_issue,
@@ -96,7 +96,7 @@ async def create_from_installation(
     return organization
 
 
-@task("github.webhook.installation_repositories.added")
+@task("github.webhook.installation_repositories.added", queue=QueueName.webhooks)
 async def repositories_added(
     ctx: JobContext,
     scope: str,
@@ -113,7 +113,7 @@ async def repositories_added(
             await repositories_changed(session, parsed)
 
 
-@task(name="github.webhook.installation_repositories.removed")
+@task(name="github.webhook.installation_repositories.removed", queue=QueueName.webhooks)
 async def repositories_removed(
     ctx: JobContext,
     scope: str,
@@ -130,7 +130,7 @@ async def repositories_removed(
             await repositories_changed(session, parsed)
 
 
-@task(name="github.webhook.public")
+@task(name="github.webhook.public", queue=QueueName.webhooks)
 async def repositories_public(
     ctx: JobContext,
     scope: str,
@@ -147,7 +147,7 @@ async def repositories_public(
             await repository_updated(session, parsed)
 
 
-@task(name="github.webhook.repository.renamed")
+@task(name="github.webhook.repository.renamed", queue=QueueName.webhooks)
 async def repositories_renamed(
     ctx: JobContext,
     scope: str,
@@ -164,7 +164,7 @@ async def repositories_renamed(
             await repository_updated(session, parsed)
 
 
-@task(name="github.webhook.repository.edited")
+@task(name="github.webhook.repository.edited", queue=QueueName.webhooks)
 async def repositories_redited(
     ctx: JobContext,
     scope: str,
@@ -181,7 +181,7 @@ async def repositories_redited(
             await repository_updated(session, parsed)
 
 
-@task(name="github.webhook.repository.deleted")
+@task(name="github.webhook.repository.deleted", queue=QueueName.webhooks)
 async def repositories_deleted(
     ctx: JobContext,
     scope: str,
@@ -198,7 +198,7 @@ async def repositories_deleted(
             await repository_deleted(session, parsed)
 
 
-@task(name="github.webhook.repository.archived")
+@task(name="github.webhook.repository.archived", queue=QueueName.webhooks)
 async def repositories_archived(
     ctx: JobContext,
     scope: str,
@@ -239,6 +239,7 @@ async def repository_updated(
         repository.is_archived = event.repository.archived
 
         await repository.save(session)
+        await repository_upserted.call(RepositoryHook(session, repository))
 
         return dict(success=True)
 
@@ -261,6 +262,7 @@ async def repository_deleted(
             repository.deleted_at = utc_now()
 
         await repository.save(session)
+        await repository_upserted.call(RepositoryHook(session, repository))
 
         return dict(success=True)
 
@@ -274,17 +276,17 @@ async def handle_issue(
     session: AsyncSession,
     scope: str,
     action: str,
-    event: Union[
-        github.webhooks.IssuesOpened,
-        github.webhooks.IssuesEdited,
-        github.webhooks.IssuesClosed,
-        github.webhooks.IssuesReopened,
-        github.webhooks.IssuesDeleted,
-    ],
+    payload: dict[str, Any],
 ) -> Issue:
-    issue = await upsert_issue(session, event)
+    # The issue is stored straight from the payload: parsing the complete event
+    # isn't needed for that, and is the bulk of the work of these webhooks.
+    if payload.get("action") != action or "issue" not in payload:
+        log.error("github.webhook.unexpected_type")
+        raise Exception("unexpected webhook payload")
+
+    issue = await upsert_issue(session, payload)
     if not issue:
-        raise Exception(f"failed to save issue external_id={event.issue.id}")
+        raise Exception(f"failed to save issue external_id={payload['issue']['id']}")
 
     # Trigger references sync job for entire repository
     await enqueue_job(
@@ -294,7 +296,7 @@ async def handle_issue(
     return issue
 
 
-@task("github.webhook.issues.opened")
+@task("github.webhook.issues.opened", queue=QueueName.webhooks)
 async def issue_opened(
     ctx: JobContext,
     scope: str,
@@ -303,20 +305,15 @@ async def issue_opened(
     polar_context: PolarWorkerContext,
 ) -> None:
     with polar_context.to_execution_context():
-        parsed = github.webhooks.parse_obj(scope, payload)
-        if not isinstance(parsed, github.webhooks.IssuesOpened):
-            log.error("github.webhook.unexpected_type")
-            raise Exception("unexpected webhook payload")
-
         async with AsyncSessionLocal() as session:
-            issue = await handle_issue(session, scope, action, parsed)
+            issue = await handle_issue(session, scope, action, payload)
 
             # Add badge if has label
             if issue.has_pledge_badge_label:
                 await update_issue_embed(session, issue=issue, embed=True)
 
 
-@task("github.webhook.issues.reopened")
+@task("github.webhook.issues.reopened", queue=QueueName.webhooks)
 async def issue_reopened(
     ctx: JobContext,
     scope: str,
@@ -325,20 +322,15 @@ async def issue_reopened(
     polar_context: PolarWorkerContext,
 ) -> None:
     with polar_context.to_execution_context():
-        parsed = github.webhooks.parse_obj(scope, payload)
-        if not isinstance(parsed, github.webhooks.IssuesReopened):
-            log.error("github.webhook.unexpected_type")
-            raise Exception("unexpected webhook payload")
-
         async with AsyncSessionLocal() as session:
-            issue = await handle_issue(session, scope, action, parsed)
+            issue = await handle_issue(session, scope, action, payload)
 
             # Add badge if has label
             if issue.has_pledge_badge_label:
                 await update_issue_embed(session, issue=issue, embed=True)
 
 
-@task("github.webhook.issues.edited")
+@task("github.webhook.issues.edited", queue=QueueName.webhooks)
 async def issue_edited(
     ctx: JobContext,
     scope: str,
@@ -347,20 +339,15 @@ async def issue_edited(
     polar_context: PolarWorkerContext,
 ) -> None:
     with polar_context.to_execution_context():
-        parsed = github.webhooks.parse_obj(scope, payload)
-        if not isinstance(parsed, github.webhooks.IssuesEdited):
-            log.error("github.webhook.unexpected_type")
-            raise Exception("unexpected webhook payload")
-
         async with AsyncSessionLocal() as session:
-            issue = await handle_issue(session, scope, action, parsed)
+            issue = await handle_issue(session, scope, action, payload)
 
             # Add badge if has label
             if issue.has_pledge_badge_label:
                 await update_issue_embed(session, issue=issue, embed=True)
 
 
-@task("github.webhook.issues.closed")
+@task("github.webhook.issues.closed", queue=QueueName.webhooks)
 async def issue_closed(
     ctx: JobContext,
     scope: str,
@@ -369,16 +356,11 @@ async def issue_closed(
     polar_context: PolarWorkerContext,
 ) -> None:
     with polar_context.to_execution_context():
-        parsed = github.webhooks.parse_obj(scope, payload)
-        if not isinstance(parsed, github.webhooks.IssuesClosed):
-            log.error("github.webhook.unexpected_type")
-            raise Exception("unexpected webhook payload")
-
         async with AsyncSessionLocal() as session:
-            await handle_issue(session, scope, action, parsed)
+            await handle_issue(session, scope, action, payload)
 
 
-@task("github.webhook.issues.deleted")
+@task("github.webhook.issues.deleted", queue=QueueName.webhooks)
 async def issue_deleted(
     ctx: JobContext,
     scope: str,
@@ -387,24 +369,15 @@ async def issue_deleted(
     polar_context: PolarWorkerContext,
 ) -> None:
     with polar_context.to_execution_context():
-        parsed = github.webhooks.parse_obj(scope, payload)
-        if not isinstance(parsed, github.webhooks.IssuesDeleted):
-            log.error("github.webhook.unexpected_type")
-            raise Exception("unexpected webhook payload")
-
         async with AsyncSessionLocal() as session:
             # Save last known version
-            await handle_issue(session, scope, action, parsed)
+            issue = await handle_issue(session, scope, action, payload)
 
             # Mark as deleted
-            issue = await get_event_issue(session, parsed)
-            if not issue:
-                return None
-
             await service.github_issue.soft_delete(session, issue.id)
 
 
-@task("github.webhook.issues.labeled")
+@task("github.webhook.issues.labeled", queue=QueueName.webhooks)
 async def issue_labeled(
     ctx: JobContext,
     scope: str,
@@ -422,7 +395,7 @@ async def issue_labeled(
             await issue_labeled_async(session, scope, action, parsed)
 
 
-@task("github.webhook.issues.unlabeled")
+@task("github.webhook.issues.unlabeled", queue=QueueName.webhooks)
 async def issue_unlabeled(
     ctx: JobContext,
     scope: str,
@@ -523,7 +496,7 @@ async def issue_labeled_async(
         )
 
 
-@task("github.webhook.issues.assigned")
+@task("github.webhook.issues.assigned", queue=QueueName.webhooks)
 async def issue_assigned(
     ctx: JobContext,
     scope: str,
@@ -541,7 +514,7 @@ async def issue_assigned(
             await issue_assigned_async(session, scope, action, parsed)
 
 
-@task("github.webhook.issues.unassigned")
+@task("github.webhook.issues.unassigned", queue=QueueName.webhooks)
 async def issue_unassigned(
     ctx: JobContext,
     scope: str,
@@ -612,7 +585,7 @@ async def handle_pull_request(
         return
 
 
-@task("github.webhook.pull_request.opened")
+@task("github.webhook.pull_request.opened", queue=QueueName.webhooks)
 async def pull_request_opened(
     ctx: JobContext,
     scope: str,
@@ -630,7 +603,7 @@ async def pull_request_opened(
             await handle_pull_request(session, scope, action, parsed)
 
 
-@task("github.webhook.pull_request.edited")
+@task("github.webhook.pull_request.edited", queue=QueueName.webhooks)
 async def pull_request_edited(
     ctx: JobContext,
     scope: str,
@@ -648,7 +621,7 @@ async def pull_request_edited(
             await handle_pull_request(session, scope, action, parsed)
 
 
-@task("github.webhook.pull_request.closed")
+@task("github.webhook.pull_request.closed", queue=QueueName.webhooks)
 async def pull_request_closed(
     ctx: JobContext,
     scope: str,
@@ -666,7 +639,7 @@ async def pull_request_closed(
             await handle_pull_request(session, scope, action, parsed)
 
 
-@task("github.webhook.pull_request.reopened")
+@task("github.webhook.pull_request.reopened", queue=QueueName.webhooks)
 async def pull_request_reopened(
     ctx: JobContext,
     scope: str,
@@ -684,7 +657,7 @@ async def pull_request_reopened(
             await handle_pull_request(session, scope, action, parsed)
 
 
-@task("github.webhook.pull_request.synchronize")
+@task("github.webhook.pull_request.synchronize", queue=QueueName.webhooks)
 async def pull_request_synchronize(
     ctx: JobContext,
     scope: str,
@@ -707,7 +680,7 @@ async def pull_request_synchronize(
 # ------------------------------------------------------------------------------
 
 
-@task("github.webhook.installation.created")
+@task("github.webhook.installation.created", queue=QueueName.webhooks)
 async def installation_created(
     ctx: JobContext,
     scope: str,
@@ -725,7 +698,7 @@ async def installation_created(
             await repositories_changed(session, event)
 
 
-@task("github.webhook.installation.deleted")
+@task("github.webhook.installation.deleted", queue=QueueName.webhooks)
 async def installation_delete(
     ctx: JobContext,
     scope: str,
@@ -748,7 +721,7 @@ async def installation_delete(
             await service.github_organization.remove(session, org.id)
 
 
-@task("github.webhook.installation.suspend")
+@task("github.webhook.installation.suspend", queue=QueueName.webhooks)
 async def installation_suspend(
     ctx: JobContext,
     scope: str,
@@ -772,7 +745,7 @@ async def installation_suspend(
             )
 
 
-@task("github.webhook.installation.unsuspend")
+@task("github.webhook.installation.unsuspend", queue=QueueName.webhooks)
 async def installation_unsuspend(
     ctx: JobContext,
     scope: str,
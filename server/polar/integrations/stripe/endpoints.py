@@ -15,6 +15,7 @@ from polar.postgres import AsyncSession, get_db_session
 from polar.worker import enqueue_job
 
 from .service import stripe as stripe_service
+from .webhook_events import HANDLERS, stripe_webhook_events
 
 log = structlog.get_logger()
 
@@ -29,27 +30,32 @@ class WebhookResponse(BaseModel):
     job_id: str | None = None
 
 
-IMPLEMENTED_WEBHOOKS = {
-    "payment_intent.succeeded",
-    "charge.refunded",
-    "charge.dispute.created",
-}
+IMPLEMENTED_WEBHOOKS = set(HANDLERS.keys())
 
 
 def not_implemented() -> WebhookResponse:
     return WebhookResponse(success=False, message="Not implemented")
 
 
-async def enqueue(event: stripe.Event) -> WebhookResponse:
+async def enqueue(session: AsyncSession, event: stripe.Event) -> WebhookResponse:
     event_type: str = event["type"]
 
     if event_type not in IMPLEMENTED_WEBHOOKS:
         return not_implemented()
 
+    # Stripe redelivers events, only process them once
+    entry = await stripe_webhook_events.record(session, event)
+    if entry.processed_at is not None:
+        log.info("stripe.webhook.already_processed", event_id=event["id"])
+        return WebhookResponse(success=True, message="Already processed")
+
     task_name = f"stripe.webhook.{event_type}"
-    enqueued = await enqueue_job(task_name, event)
+    job_id = f"stripe.webhook:{event['id']}"
+    enqueued = await enqueue_job(task_name, event, _job_id=job_id)
     if not enqueued:
-        return WebhookResponse(success=False, message="Failed to enqueue task")
+        # A job for this event is already queued or running
+        log.info("stripe.webhook.already_queued", event_id=event["id"])
+        return WebhookResponse(success=True, job_id=job_id)
 
     log.info("stripe.webhook.queued", task_name=task_name)
     return WebhookResponse(success=True, job_id=enqueued.job_id)
@@ -103,7 +109,9 @@ def stripe_connect_refresh() -> WebhookResponse:
 
 
 @router.post("/webhook", response_model=WebhookResponse)
-async def webhook(request: Request) -> WebhookResponse:
+async def webhook(
+    request: Request, session: AsyncSession = Depends(get_db_session)
+) -> WebhookResponse:
     event = None
     payload = await request.body()
     sig_header = request.headers["Stripe-Signature"]
@@ -121,7 +129,7 @@ async def webhook(request: Request) -> WebhookResponse:
 
     # Handle the event
     if event["type"] in IMPLEMENTED_WEBHOOKS:
-        return await enqueue(event)
+        return await enqueue(session, event)
     else:
         # Respond with a healthy response so that Stripe doesn't block this event
         raise HTTPException(status_code=200)
@@ -1,50 +1,38 @@
 import stripe
 
-from polar.worker import JobContext, PolarWorkerContext, task
+from polar.worker import JobContext, PolarWorkerContext, QueueName, task
 from polar.postgres import AsyncSessionLocal
-from polar.pledge.service import pledge as pledge_service
 
+from .webhook_events import stripe_webhook_events
 
-@task("stripe.webhook.payment_intent.succeeded")
+# Jobs are enqueued under the event's id, see endpoints.enqueue. Their results
+# aren't kept so that a redelivery of a failed event is enqueued again.
+
+
+@task(
+    "stripe.webhook.payment_intent.succeeded", queue=QueueName.webhooks, keep_result=0
+)
 async def payment_intent_succeeded(
     ctx: JobContext, event: stripe.Event, polar_context: PolarWorkerContext
 ) -> None:
     with polar_context.to_execution_context():
         async with AsyncSessionLocal() as session:
-            payment_intent = event["data"]["object"]
-            await pledge_service.mark_created_by_payment_id(
-                session=session,
-                payment_id=payment_intent["id"],
-                amount=payment_intent["amount"],
-                transaction_id=payment_intent["latest_charge"],
-            )
+            await stripe_webhook_events.process(session, event)
 
 
-@task("stripe.webhook.charge.refunded")
+@task("stripe.webhook.charge.refunded", queue=QueueName.webhooks, keep_result=0)
 async def charge_refunded(
     ctx: JobContext, event: stripe.Event, polar_context: PolarWorkerContext
 ) -> None:
     with polar_context.to_execution_context():
         async with AsyncSessionLocal() as session:
-            charge = event["data"]["object"]
-            await pledge_service.refund_by_payment_id(
-                session=session,
-                payment_id=charge["payment_intent"],
-                amount=charge["amount_refunded"],
-                transaction_id=charge["id"],
-            )
+            await stripe_webhook_events.process(session, event)
 
 
-@task("stripe.webhook.charge.dispute.created")
+@task("stripe.webhook.charge.dispute.created", queue=QueueName.webhooks, keep_result=0)
 async def charge_dispute_created(
     ctx: JobContext, event: stripe.Event, polar_context: PolarWorkerContext
 ) -> None:
     with polar_context.to_execution_context():
         async with AsyncSessionLocal() as session:
-            dispute = event["data"]["object"]
-            await pledge_service.mark_charge_disputed_by_payment_id(
-                session=session,
-                payment_id=dispute["payment_intent"],
-                amount=dispute["amount"],
-                transaction_id=dispute["id"],
-            )
+            await stripe_webhook_events.process(session, event)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Iterable
+
+import stripe
+import structlog
+
+from polar.kit.utils import utc_now
+from polar.models.stripe_webhook_event import StripeWebhookEvent
+from polar.pledge.service import pledge as pledge_service
+from polar.postgres import AsyncSession, sql
+
+log = structlog.get_logger()
+
+Handler = Callable[[AsyncSession, dict[str, Any]], Awaitable[None]]
+
+
+async def payment_intent_succeeded(
+    session: AsyncSession, payment_intent: dict[str, Any]
+) -> None:
+    await pledge_service.mark_created_by_payment_id(
+        session=session,
+        payment_id=payment_intent["id"],
+        amount=payment_intent["amount"],
+        transaction_id=payment_intent["latest_charge"],
+    )
+
+
+async def charge_refunded(session: AsyncSession, charge: dict[str, Any]) -> None:
+    await pledge_service.refund_by_payment_id(
+        session=session,
+        payment_id=charge["payment_intent"],
+        amount=charge["amount_refunded"],
+        transaction_id=charge["id"],
+    )
+
+
+async def charge_dispute_created(
+    session: AsyncSession, dispute: dict[str, Any]
+) -> None:
+    await pledge_service.mark_charge_disputed_by_payment_id(
+        session=session,
+        payment_id=dispute["payment_intent"],
+        amount=dispute["amount"],
+        transaction_id=dispute["id"],
+    )
+
+
+HANDLERS: dict[str, Handler] = {
+    "payment_intent.succeeded": payment_intent_succeeded,
+    "charge.refunded": charge_refunded,
+    "charge.dispute.created": charge_dispute_created,
+}
+
+
+@dataclass
+class ReplayResult:
+    processed: int = 0
+    skipped: int = 0
+    unsupported: int = 0
+
+
+class StripeWebhookEventService:
+    async def record(
+        self, session: AsyncSession, event: stripe.Event
+    ) -> StripeWebhookEvent:
+        """
+        Add the event to the ledger, if it's not there yet, and return its entry.
+        """
+        insert = (
+            sql.insert(StripeWebhookEvent)
+            .values(
+                stripe_event_id=event["id"],
+                type=event["type"],
+                stripe_created_at=datetime.fromtimestamp(
+                    event["created"], tz=timezone.utc
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=["stripe_event_id"])
+        )
+        await session.execute(insert)
+        await session.commit()
+
+        res = await session.execute(
+            sql.select(StripeWebhookEvent)
+            .where(StripeWebhookEvent.stripe_event_id == event["id"])
+            .execution_options(populate_existing=True)
+        )
+        return res.scalars().one()
+
+    async def is_processed(self, session: AsyncSession, stripe_event_id: str) -> bool:
+        res = await session.execute(
+            sql.select(StripeWebhookEvent.processed_at).where(
+                StripeWebhookEvent.stripe_event_id == stripe_event_id
+            )
+        )
+        return res.scalar_one_or_none() is not None
+
+    async def process(self, session: AsyncSession, event: stripe.Event) -> bool:
+        """
+        Apply the event, unless it has already been processed.
+
+        Returns False if the event was skipped. The ledger entry is locked while
+        the event is applied, so that a concurrent delivery or replay waits for it
+        and then skips it.
+        """
+        handler = HANDLERS.get(event["type"])
+        if handler is None:
+            raise ValueError(f"unsupported stripe event type: {event['type']}")
+
+        await self.record(session, event)
+        res = await session.execute(
+            sql.select(StripeWebhookEvent)
+            .where(StripeWebhookEvent.stripe_event_id == event["id"])
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        entry = res.scalars().one()
+        if entry.processed_at is not None:
+            log.info(
+                "stripe.webhook.skip_processed",
+                event_id=event["id"],
+                type=event["type"],
+            )
+            await session.rollback()
+            return False
+
+        # Marked in the handler's transaction: the handlers commit their changes,
+        # and the mark with them. If the handler fails, both are rolled back.
+        await session.execute(
+            sql.update(StripeWebhookEvent)
+            .where(StripeWebhookEvent.id == entry.id)
+            .values(processed_at=utc_now())
+        )
+        await handler(session, event["data"]["object"])
+        await session.commit()
+
+        log.info("stripe.webhook.processed", event_id=event["id"], type=event["type"])
+        return True
+
+    async def replay(
+        self,
+        session: AsyncSession,
+        events: Iterable[stripe.Event],
+        *,
+        dry_run: bool = False,
+    ) -> ReplayResult:
+        """
+        Re-drive events, typically listed from Stripe for a time range, skipping the
+        ones that were already processed.
+        """
+        result = ReplayResult()
+        for event in events:
+            if event["type"] not in HANDLERS:
+                result.unsupported += 1
+                continue
+
+            if await self.is_processed(session, event["id"]):
+                result.skipped += 1
+                continue
+
+            if dry_run:
+                log.info("stripe.webhook.replay.dry_run", event_id=event["id"])
+                result.processed += 1
+                continue
+
+            if await self.process(session, event):
+                result.processed += 1
+            else:
+                result.skipped += 1
+
+        log.info(
+            "stripe.webhook.replay",
+            processed=result.processed,
+            skipped=result.skipped,
+            unsupported=result.unsupported,
+            dry_run=dry_run,
+        )
+        return result
+
+
+stripe_webhook_events = StripeWebhookEventService()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, cast
+from uuid import UUID
+
+import structlog
+from fastapi import Request, Response
+
+from polar.redis import Redis, redis
+
+log = structlog.get_logger()
+
+
+@dataclass
+class CachedResponse:
+    body: str
+    etag: str
+
+
+class PublicIssuesCache:
+    """
+    Short lived cache of rendered responses from the public, anonymous, issue
+    listing endpoints.
+
+    Entries are keyed on the organization and the request parameters. Each
+    organization has a version counter which is part of the key, invalidating an
+    organization is a matter of bumping it: stale entries are never read again and
+    expire on their own.
+    """
+
+    ttl_seconds = 60
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    def _version_key(self, organization_id: UUID) -> str:
+        return f"public_issues:version:{organization_id}"
+
+    async def key(
+        self, organization_id: UUID, endpoint: str, params: dict[str, Any]
+    ) -> str:
+        """
+        Key of the entry for the current version of the organization.
+
+        The key is read before rendering, and the response stored under it, so
+        that an invalidation while rendering isn't lost.
+        """
+        version = int(await self.redis.get(self._version_key(organization_id)) or 0)
+        params_hash = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"public_issues:{organization_id}:{version}:{endpoint}:{params_hash}"
+
+    async def get(self, key: str) -> CachedResponse | None:
+        # Responses are decoded, see polar.redis
+        body = cast(str | None, await self.redis.get(key))
+        if body is None:
+            return None
+        return CachedResponse(body=body, etag=self._etag(body))
+
+    async def set(self, key: str, body: str) -> CachedResponse:
+        await self.redis.setex(key, self.ttl_seconds, body)
+        return CachedResponse(body=body, etag=self._etag(body))
+
+    async def invalidate(self, organization_id: UUID) -> None:
+        key = self._version_key(organization_id)
+        await self.redis.incr(key)
+        # The version must outlive any entry created with the previous version
+        await self.redis.expire(key, self.ttl_seconds * 10)
+        log.debug("public_issues.cache.invalidate", organization_id=organization_id)
+
+    def response(self, request: Request, cached: CachedResponse) -> Response:
+        headers = {
+            "ETag": cached.etag,
+            "Cache-Control": f"public, max-age={self.ttl_seconds}",
+        }
+        if self._if_none_match(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+
+        return Response(
+            content=cached.body, media_type="application/json", headers=headers
+        )
+
+    def _if_none_match(self, header: str | None, etag: str) -> bool:
+        """
+        Whether the If-None-Match header matches the ETag: it's either `*` or a
+        list of ETags, compared weakly as RFC 9110 requires.
+        """
+        if header is None:
+            return False
+        if header.strip() == "*":
+            return True
+        return any(
+            candidate.strip().removeprefix("W/") == etag
+            for candidate in header.split(",")
+        )
+
+    def _etag(self, body: str) -> str:
+        return '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+
+
+public_issues_cache = PublicIssuesCache(redis)
@@ -1,10 +1,11 @@
 from typing import List, Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import Field
 
 from polar.auth.dependencies import Auth
+from polar.authz.service import AccessType, Anonymous, Authz
 from polar.dashboard.schemas import IssueListType, IssueSortBy, IssueStatus
 from polar.enums import Platforms
 from polar.exceptions import ResourceNotFound
@@ -15,13 +16,13 @@ from polar.integrations.github.service.organization import (
     github_organization as github_organization_service,
 )
 from polar.kit.extensions.sqlalchemy import sql
+from polar.kit.responses import json_dumps
 from polar.kit.schemas import Schema
 from polar.models import Issue
 from polar.organization.schemas import Organization as OrganizationSchema
 from polar.organization.service import organization as organization_service
 from polar.pledge.service import pledge as pledge_service
 from polar.postgres import AsyncSession, get_db_session
-from polar.repository.endpoints import user_can_read, user_can_write
 from polar.repository.schemas import Repository as RepositorySchema
 from polar.repository.service import repository as repository_service
 from polar.tags.api import Tags
@@ -30,6 +31,7 @@ from polar.user_organization.service import (
     user_organization as user_organization_service,
 )
 
+from .cache import public_issues_cache
 from .schemas import (
     ConfirmIssue,
     IssuePublicRead,
@@ -56,6 +58,7 @@ router = APIRouter(tags=["issues"])
     responses={404: {}},
 )
 async def search(
+    request: Request,
     platform: Platforms,
     organization_name: str,
     repository_name: str | None = None,
@@ -74,7 +77,7 @@ async def search(
     ),
     session: AsyncSession = Depends(get_db_session),
     auth: Auth = Depends(Auth.optional_user),
-) -> ListResource[IssueSchema]:
+) -> Response:
     org = await organization_service.get_by_name(session, platform, organization_name)
     if not org:
         raise HTTPException(
@@ -82,6 +85,18 @@ async def search(
             detail="Organization not found",
         )
 
+    # Only public issues are listed, the response is the same for all users
+    cache_params = {
+        "repository_name": repository_name,
+        "sort": sort,
+        "have_pledge": have_pledge,
+        "have_badge": have_badge,
+    }
+    cache_key = await public_issues_cache.key(org.id, "search", cache_params)
+    cached = await public_issues_cache.get(cache_key)
+    if cached:
+        return public_issues_cache.response(request, cached)
+
     all_org_repos = await repository_service.list_by(
         session,
         org_ids=[org.id],
@@ -129,7 +144,10 @@ async def search(
         have_polar_badge=have_badge,
     )
 
-    return ListResource(items=[IssueSchema.from_db(i) for i in issues])
+    result = ListResource(items=[IssueSchema.from_db(i) for i in issues])
+
+    cached = await public_issues_cache.set(cache_key, json_dumps(result).decode())
+    return public_issues_cache.response(request, cached)
 
 
 @router.get(
@@ -143,6 +161,7 @@ async def get(
     id: UUID,
     session: AsyncSession = Depends(get_db_session),
     auth: Auth = Depends(Auth.optional_user),
+    authz: Authz = Depends(Authz.authz),
 ) -> IssueSchema:
     issue = await issue_service.get_loaded(session, id)
 
@@ -152,7 +171,7 @@ async def get(
             detail="Issue not found",
         )
 
-    if not await user_can_read(session, auth, issue.repository):
+    if not await authz.can(auth.user or Anonymous(), AccessType.read, issue):
         raise HTTPException(
             status_code=404,
             detail="Issue not found",
@@ -173,6 +192,7 @@ async def update(
     update: UpdateIssue,
     session: AsyncSession = Depends(get_db_session),
     auth: Auth = Depends(Auth.current_user),
+    authz: Authz = Depends(Authz.authz),
 ) -> IssueSchema:
     issue = await issue_service.get_loaded(session, id)
 
@@ -182,7 +202,7 @@ async def update(
             detail="Issue not found",
         )
 
-    if not await user_can_write(session, auth, issue.repository):
+    if not await authz.can(auth.user, AccessType.write, issue.repository):
         raise HTTPException(
             status_code=401,
             detail="Unauthorized",
@@ -217,6 +237,7 @@ async def confirm(
     id: UUID,
     body: ConfirmIssue,
     auth: Auth = Depends(Auth.current_user),
+    authz: Authz = Depends(Authz.authz),
     session: AsyncSession = Depends(get_db_session),
 ) -> IssueSchema:
     issue = await issue_service.get_loaded(session, id)
@@ -226,7 +247,7 @@ async def confirm(
             detail="Issue not found",
         )
 
-    if not await user_can_write(session, auth, issue.repository):
+    if not await authz.can(auth.user, AccessType.write, issue.repository):
         raise HTTPException(
             status_code=401,
             detail="Unauthorized",
@@ -561,11 +582,12 @@ async def badge_with_message(
     summary="Get organization public issues (Internal API)",
 )
 async def get_public_issues(
+    request: Request,
     platform: Platforms,
     org_name: str,
     repo_name: str | None = None,
     session: AsyncSession = Depends(get_db_session),
-) -> OrganizationPublicPageRead:
+) -> Response:
     org = await organization_service.get_by_name(session, platform, org_name)
     if not org:
         raise HTTPException(
@@ -573,6 +595,12 @@ async def get_public_issues(
             detail="Organization not found",
         )
 
+    cache_params = {"repo_name": repo_name}
+    cache_key = await public_issues_cache.key(org.id, "public", cache_params)
+    cached = await public_issues_cache.get(cache_key)
+    if cached:
+        return public_issues_cache.response(request, cached)
+
     all_org_repos = await repository_service.list_by(
         session,
         org_ids=[org.id],
@@ -619,9 +647,12 @@ async def get_public_issues(
         ],
     )
 
-    return OrganizationPublicPageRead(
+    result = OrganizationPublicPageRead(
         organization=OrganizationSchema.from_db(org),
         repositories=[RepositorySchema.from_db(r) for r in all_org_repos],
         issues=[IssuePublicRead.from_orm(i) for i in issues],
         total_issue_count=count,
     )
+
+    cached = await public_issues_cache.set(cache_key, json_dumps(result).decode())
+    return public_issues_cache.response(request, cached)
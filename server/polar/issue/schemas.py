@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import Literal, Self, Type, Union
+from typing import Any, Literal, Self, Type, Union
 from uuid import UUID
 
 import structlog
@@ -299,6 +299,98 @@ class IssueCreate(IssueAndPullRequestBase):
 
         return ret
 
+    @classmethod
+    def from_github_payload(
+        cls,
+        data: dict[str, Any],
+        organization_id: UUID,
+        repository_id: UUID,
+    ) -> Self:
+        """
+        Same as from_github, straight from the issue of a raw webhook payload.
+
+        Only the stored fields are validated, which spares building the complete
+        githubkit event and serializing its nested objects back to dicts.
+        """
+        issue = GithubIssuePayload.parse_obj(data)
+        reactions = issue.reactions
+
+        ret = cls(
+            platform=Platforms.github,
+            external_id=issue.id,
+            organization_id=organization_id,
+            repository_id=repository_id,
+            number=issue.number,
+            title=issue.title,
+            body=issue.body if issue.body else "",
+            comments=issue.comments,
+            # Empty values are stored as null, as github.jsonify does
+            author=issue.user or None,
+            author_association=issue.author_association,
+            labels=issue.labels or None,
+            assignee=issue.assignee or None,
+            assignees=issue.assignees or None,
+            milestone=issue.milestone or None,
+            closed_by=issue.closed_by or None,
+            reactions=reactions.dict(),
+            state=issue.state,
+            state_reason=issue.state_reason,
+            issue_closed_at=issue.closed_at,
+            issue_created_at=issue.created_at,
+            issue_modified_at=issue.updated_at,
+        )
+
+        ret.has_pledge_badge_label = IssueModel.contains_pledge_badge_label(ret.labels)
+
+        if ret.body:
+            ret.pledge_badge_currently_embedded = GithubBadge.badge_is_embedded(
+                ret.body
+            )
+
+        # excluding: confused, minus_one
+        ret.positive_reactions_count = (
+            reactions.plus_one
+            + reactions.laugh
+            + reactions.heart
+            + reactions.hooray
+            + reactions.eyes
+            + reactions.rocket
+        )
+
+        ret.total_engagement_count = reactions.total_count + issue.comments
+
+        return ret
+
+
+class GithubReactionsPayload(Reactions):
+    plus_one: int = Field(alias="+1")
+    minus_one: int = Field(alias="-1")
+
+
+class GithubIssuePayload(Schema):
+    """
+    The stored fields of the issue in a GitHub webhook payload.
+    """
+
+    id: int
+    number: int
+    title: str
+    body: str | None
+    comments: int
+    user: dict[str, Any] | None
+    author_association: str | None
+    labels: list[dict[str, Any]] = []
+    assignee: dict[str, Any] | None
+    assignees: list[dict[str, Any]] | None
+    milestone: dict[str, Any] | None
+    closed_by: dict[str, Any] | None = None
+    reactions: GithubReactionsPayload
+    state: IssueModel.State
+    state_reason: str | None = None
+    closed_at: datetime | None
+    created_at: datetime
+    updated_at: datetime | None
+
 
 class IssueUpdate(IssueCreate):
     ...
@@ -99,9 +99,20 @@ class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
         issues = res.scalars().unique().all()
         return issues
 
-    async def list_by_repository_type_and_status(
+    async def get_organization_ids(
+        self, session: AsyncSession, ids: Sequence[UUID]
+    ) -> dict[UUID, UUID]:
+        """
+        Map the issues to the id of their organization, in a single query.
+        """
+        if not ids:
+            return {}
+        statement = sql.select(Issue.id, Issue.organization_id).where(Issue.id.in_(ids))
+        res = await session.execute(statement)
+        return {id: organization_id for id, organization_id in res.all()}
+
+    def list_by_repository_type_and_status_statement(
         self,
-        session: AsyncSession,
         repository_ids: list[UUID],
         issue_list_type: IssueListType,
         text: str | None = None,
@@ -114,11 +125,9 @@ class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
         load_pledges: bool = False,
         load_repository: bool = False,
         sort_by: IssueSortBy = IssueSortBy.newest,
-        offset: int = 0,
-        limit: int | None = None,
         include_statuses: list[IssueStatus] | None = None,
         have_polar_badge: bool | None = None,  # If issue has the polar badge or not
-    ) -> Tuple[Sequence[Issue], int]:  # (issues, total_issue_count)
+    ) -> sql.Select[tuple[Issue, int]]:
         pledge_by_organization = aliased(Organization)
         issue_repository = aliased(Repository)
         issue_organization = aliased(Organization, name="pledge_organization")
@@ -369,6 +378,43 @@ class IssueService(ResourceService[Issue, IssueCreate, IssueUpdate]):
                 Issue.id,
             )
 
+        return statement
+
+    async def list_by_repository_type_and_status(
+        self,
+        session: AsyncSession,
+        repository_ids: list[UUID],
+        issue_list_type: IssueListType,
+        text: str | None = None,
+        pledged_by_org: UUID
+        | None = None,  # Only include issues that have been pledged by this org
+        pledged_by_user: UUID
+        | None = None,  # Only include issues that have been pledged by this user
+        have_pledge: bool | None = None,  # If issues have pledge or not
+        load_references: bool = False,
+        load_pledges: bool = False,
+        load_repository: bool = False,
+        sort_by: IssueSortBy = IssueSortBy.newest,
+        offset: int = 0,
+        limit: int | None = None,
+        include_statuses: list[IssueStatus] | None = None,
+        have_polar_badge: bool | None = None,  # If issue has the polar badge or not
+    ) -> Tuple[Sequence[Issue], int]:  # (issues, total_issue_count)
+        statement = self.list_by_repository_type_and_status_statement(
+            repository_ids=repository_ids,
+            issue_list_type=issue_list_type,
+            text=text,
+            pledged_by_org=pledged_by_org,
+            pledged_by_user=pledged_by_user,
+            have_pledge=have_pledge,
+            load_references=load_references,
+            load_pledges=load_pledges,
+            load_repository=load_repository,
+            sort_by=sort_by,
+            include_statuses=include_statuses,
+            have_polar_badge=have_polar_badge,
+        )
+
         if limit:
             statement = statement.limit(limit).offset(offset)
 
@@ -1,7 +1,8 @@
-from .active_record import ActiveRecordMixin
+from .active_record import ActiveRecordMixin, CopyUpsertResult
 from .serialize import SerializeMixin
 
 __all__ = [
     "ActiveRecordMixin",
+    "CopyUpsertResult",
     "SerializeMixin",
 ]
@@ -1,8 +1,21 @@
 from __future__ import annotations
 
+import enum
+import json
+import secrets
+from dataclasses import dataclass, field
 from functools import cache
-from typing import Any, ClassVar, Generic, Self, Sequence, TypeVar
-from sqlalchemy import Column, ColumnClause, column
+from typing import Any, Callable, ClassVar, Generic, Self, Sequence, TypeVar
+from sqlalchemy import (
+    Column,
+    ColumnClause,
+    Table,
+    column,
+    or_,
+    table,
+    text,
+    tuple_,
+)
 from sqlalchemy.orm import (
     InstrumentedAttribute,
     Mapped,
@@ -20,6 +33,37 @@ from polar.postgres import AsyncSession, sql
 SchemaType = TypeVar("SchemaType", bound=Schema)
 
 
+@dataclass
+class CopyUpsertResult:
+    # Primary keys of the inserted and updated rows, unchanged rows are in neither
+    created: list[Any] = field(default_factory=list)
+    updated: list[Any] = field(default_factory=list)
+
+
+def _column_defaults(table: FromClause) -> dict[str, Callable[[], Any]]:
+    # Python-side defaults, which COPY doesn't apply. Evaluated for each row, like
+    # generated ids.
+    defaults: dict[str, Callable[[], Any]] = {}
+    for c in table.columns:
+        default = c.default
+        if c.computed is not None or default is None:
+            continue
+        if default.is_scalar:
+            defaults[c.name] = lambda arg=default.arg: arg  # type: ignore
+        elif default.is_callable:
+            defaults[c.name] = lambda arg=default.arg: arg(None)  # type: ignore
+    return defaults
+
+
+def _copy_value(value: Any) -> Any:
+    # asyncpg's binary COPY takes JSON as text, and enums by their value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
 # Active Record-ish
 class ActiveRecordMixin:
     __mutables__: set[Column[Any]] | set[str] | None = None
@@ -109,6 +153,13 @@ class ActiveRecordMixin:
         mutable_keys: set[str] | None = None,
         autocommit: bool = True,
     ) -> Sequence[Self]:
+        """
+        Insert or update the objects, returning their instances in the same order.
+
+        Rows whose mutable keys are unchanged aren't written to. The instances
+        tell apart what happened to each row with `was_created` and `was_updated`
+        (both False for unchanged rows).
+        """
         values = [obj.dict() for obj in objects]
         if not values:
             raise ValueError("Zero values provided")
@@ -124,10 +175,19 @@ class ActiveRecordMixin:
         if mutable_keys is None:
             mutable_keys = cls.get_mutable_keys()
 
-        # Update the insert statement with what to update on conflict, i.e mutable keys.
+        # Update the insert statement with what to update on conflict, i.e mutable
+        # keys, but only if any of them changed. A no-op update would still write a
+        # new row version (and its index entries) for nothing.
+        table_columns = cls.__table__.c
         upsert_stmt = insert_stmt.on_conflict_do_update(
             index_elements=constraints,
             set_={k: getattr(insert_stmt.excluded, k) for k in mutable_keys},
+            where=or_(
+                *[
+                    table_columns[k].is_distinct_from(getattr(insert_stmt.excluded, k))
+                    for k in mutable_keys
+                ]
+            ),
         ).returning(cls, xmax)
         # Our Postgres upsert query with the added xmax column to detect inserts
         # or updates per row and bind them to the SQLAlchemy objects.
@@ -138,10 +198,139 @@ class ActiveRecordMixin:
             .execution_options(populate_existing=True)
         )
         res = await session.execute(orm_stmt)
-        instances = res.scalars().all()
+
+        def key(o: Any) -> tuple[Any, ...]:
+            if isinstance(o, dict):
+                return tuple(o[c.key] for c in constraints)
+            return tuple(getattr(o, c.key) for c in constraints)
+
+        instances: dict[tuple[Any, ...], Self] = {}
+        for instance in res.scalars().all():
+            # xmax is 0 for inserted rows, and holds the row lock for updated ones
+            instance.was_created = int(instance.xmax) == 0
+            instance.was_updated = not instance.was_created
+            instances[key(instance)] = instance
+
+        # Unchanged rows aren't returned by the upsert
+        unchanged = [key(v) for v in values if key(v) not in instances]
+        if unchanged:
+            res = await session.execute(
+                sql.select(cls)
+                .where(tuple_(*constraints).in_(unchanged))
+                .execution_options(populate_existing=True)
+            )
+            for instance in res.scalars().unique().all():
+                instance.was_created = False
+                instance.was_updated = False
+                instances[key(instance)] = instance
+
+        # e.g. deleted concurrently, or a key which doesn't round-trip the database
+        missing = [key(v) for v in values if key(v) not in instances]
+        if missing:
+            raise ValueError(f"Upserted rows not found: {missing}")
+
+        if autocommit:
+            await session.commit()
+        return [instances[key(v)] for v in values]
+
+    @classmethod
+    async def copy_upsert_many(
+        cls,
+        session: AsyncSession,
+        rows: Sequence[dict[str, Any]],
+        constraints: list[InstrumentedAttribute[Any]],
+        # Defaults to the mutable keys as defined by on the Model
+        mutable_keys: set[str] | None = None,
+        autocommit: bool = True,
+    ) -> CopyUpsertResult:
+        """
+        Same as upsert_many, for large imports.
+
+        The rows, plain dicts of column values, are streamed with COPY into a
+        staging table and merged with a single INSERT ... SELECT. No instance is
+        built: only the primary keys of the inserted and updated rows are
+        returned.
+
+        The rows must all have the same keys. Columns with a type that asyncpg
+        can't COPY in binary, like citext, aren't supported.
+        """
+        if not rows:
+            raise ValueError("Zero values provided")
+
+        target: Table = cls.__table__  # type: ignore
+        defaults = _column_defaults(target)
+        columns = [
+            c.name
+            for c in target.columns
+            if c.computed is None and (c.name in rows[0] or c.name in defaults)
+        ]
+
+        # Dropped with the transaction
+        staging_name = f"{target.name}_staging_{secrets.token_hex(4)}"
+        await session.execute(
+            text(
+                f'CREATE TEMPORARY TABLE "{staging_name}" '
+                f'(LIKE "{target.name}" INCLUDING DEFAULTS INCLUDING GENERATED) '
+                "ON COMMIT DROP"
+            )
+        )
+
+        # COPY on the session's connection, within its transaction
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        assert driver_connection is not None
+        await driver_connection.copy_records_to_table(
+            staging_name,
+            records=(
+                tuple(
+                    _copy_value(row[c] if c in row else defaults[c]()) for c in columns
+                )
+                for row in rows
+            ),
+            columns=columns,
+        )
+
+        staging = table(staging_name, *[column(c) for c in columns])
+        constraint_columns = [staging.c[c.key] for c in constraints]
+        # A row can't be updated twice by the same statement, keep one per key
+        select_stmt = (
+            sql.select(*staging.c)
+            .distinct(*constraint_columns)
+            .order_by(*constraint_columns)
+        )
+
+        xmax: ColumnClause[int] = column("xmax", is_literal=True, _selectable=target)
+        insert_stmt = sql.insert(cls).from_select(columns, select_stmt)
+
+        if mutable_keys is None:
+            mutable_keys = cls.get_mutable_keys()
+        mutable_keys = mutable_keys & set(columns)
+
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=constraints,
+            set_={k: getattr(insert_stmt.excluded, k) for k in mutable_keys},
+            where=or_(
+                *[
+                    target.c[k].is_distinct_from(getattr(insert_stmt.excluded, k))
+                    for k in mutable_keys
+                ]
+            ),
+        ).returning(*target.primary_key.columns, xmax)
+        res = await session.execute(upsert_stmt)
+
+        result = CopyUpsertResult()
+        for *primary_key, row_xmax in res.all():
+            key = primary_key[0] if len(primary_key) == 1 else tuple(primary_key)
+            # xmax is 0 for inserted rows, and holds the row lock for updated ones
+            if int(row_xmax) == 0:
+                result.created.append(key)
+            else:
+                result.updated.append(key)
+
         if autocommit:
             await session.commit()
-        return instances
+        return result
 
     @classmethod
     async def upsert(
@@ -15,6 +15,8 @@ from .notification import Notification
 from .user_organization_settings import UserOrganizationSettings
 from .user_notification import UserNotification
 from .invites import Invite
+from .outbox_event import OutboxEvent
+from .stripe_webhook_event import StripeWebhookEvent
 
 __all__ = [
     "Model",
@@ -35,4 +37,6 @@ __all__ = [
     "IssueDependency",
     "Invite",
     "Notification",
+    "OutboxEvent",
+    "StripeWebhookEvent",
 ]
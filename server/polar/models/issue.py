@@ -171,6 +171,36 @@ class Issue(IssueFields, RecordModel):
             "idx_issues_positive_total_engagement_count",
             "total_engagement_count",
         ),
+        # Badge jobs walk the issues of a repository in (created_at, id) order
+        Index(
+            "idx_issues_repository_id_created_at_id_not_deleted",
+            "repository_id",
+            "created_at",
+            "id",
+            postgresql_where=sqlalchemy.text("deleted_at IS NULL"),
+        ),
+        # Hot tier of the crawl scheduler, see crawl_scheduler.hot_clause. It's
+        # sorted by pledges, and crawls update the fetched_at columns, so they're
+        # left out of the index to keep these updates HOT. The other tiers go
+        # through ix_issues_organization_id.
+        Index(
+            "idx_issues_organization_id_hot",
+            "organization_id",
+            postgresql_where=sqlalchemy.text(
+                "deleted_at IS NULL "
+                "AND (pledged_amount_sum > 0 OR pledge_badge_currently_embedded)"
+            ),
+        ),
+        # Dashboard, see IssueService.list_by_repository_type_and_status_statement.
+        # The total count reads all the issues of the repositories, so the sorts
+        # can't be served by an index and go through ix_issues_repository_id. Only
+        # the badge filter, which is selective, has its own index.
+        Index(
+            "idx_issues_repository_id_issue_modified_at_badge_embedded",
+            "repository_id",
+            "issue_modified_at",
+            postgresql_where=sqlalchemy.text("pledge_badge_currently_embedded"),
+        ),
     )
 
     pledge_badge_embedded_at: Mapped[datetime | None] = mapped_column(
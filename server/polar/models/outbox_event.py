@@ -0,0 +1,49 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import TIMESTAMP, Index, Integer, String, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from polar.kit.db.models import RecordModel
+from polar.kit.extensions.sqlalchemy import PostgresUUID
+from polar.kit.utils import utc_now
+
+
+class OutboxEvent(RecordModel):
+    """
+    A hook receiver invocation waiting to be delivered by the outbox dispatcher.
+
+    One row is recorded per deferred receiver, in the same transaction as the
+    change that triggered the hook.
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index(
+            "idx_outbox_events_pending",
+            "next_attempt_at",
+            postgresql_where=text("delivered_at IS NULL AND failed_at IS NULL"),
+        ),
+        Index(
+            "idx_outbox_events_receiver_aggregate_id",
+            "receiver",
+            "aggregate_id",
+            "created_at",
+        ),
+    )
+
+    hook: Mapped[str] = mapped_column(String, nullable=False)
+    receiver: Mapped[str] = mapped_column(String, nullable=False)
+    aggregate_id: Mapped[UUID] = mapped_column(PostgresUUID, nullable=False)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, default=utc_now
+    )
+    delivered_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True, default=None
+    )
+    failed_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True, default=None
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True, default=None)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import TIMESTAMP, BigInteger, ForeignKey, String
+from sqlalchemy import TIMESTAMP, BigInteger, ForeignKey, Index, String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from polar.kit.db.models import RecordModel
@@ -14,6 +14,22 @@ from polar.models.user import User
 
 class Pledge(RecordModel):
     __tablename__ = "pledges"
+    __table_args__ = (
+        # Backoffice listings, which never include initiated pledges
+        Index(
+            "idx_pledges_created_at_id_not_initiated",
+            "created_at",
+            "id",
+            postgresql_where=text("state != 'initiated'"),
+        ),
+        Index(
+            "idx_pledges_state_created_at_id_not_initiated",
+            "state",
+            "created_at",
+            "id",
+            postgresql_where=text("state != 'initiated'"),
+        ),
+    )
 
     issue_id: Mapped[UUID] = mapped_column(
         PostgresUUID, ForeignKey("issues.id"), nullable=False, index=True
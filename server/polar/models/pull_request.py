@@ -56,6 +56,12 @@ class PullRequest(IssueFields, RecordModel):
     head: Mapped[JSONDict | None] = mapped_column(JSONB, nullable=True, default=dict)
     base: Mapped[JSONDict | None] = mapped_column(JSONB, nullable=True, default=dict)
 
+    # Hash of the body as of the last time linked issues were looked up, to only
+    # re-crawl them when the body has changed. Not mutable on upserts.
+    reverse_references_body_hash: Mapped[str | None] = mapped_column(
+        String, nullable=True, default=None
+    )
+
     __mutables__ = issue_fields_mutables | {
         "commits",
         "additions",
@@ -5,7 +5,7 @@ from polar.models.user import User
 from polar.notifications.schemas import (
     NotificationType,
 )
-from polar.worker import JobContext, PolarWorkerContext, task
+from polar.worker import JobContext, PolarWorkerContext, QueueName, task
 from polar.postgres import AsyncSessionLocal
 from polar.models.notification import Notification
 from polar.user_organization.service import (
@@ -21,7 +21,7 @@ log = structlog.get_logger()
 sender = get_email_sender()
 
 
-@task("notifications.send")
+@task("notifications.send", queue=QueueName.notifications)
 async def notifications_send(
     ctx: JobContext,
     notification_id: UUID,
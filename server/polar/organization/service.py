@@ -3,7 +3,7 @@ from typing import Sequence
 from uuid import UUID
 
 import structlog
-from sqlalchemy import ColumnElement, and_
+from sqlalchemy import BigInteger, ColumnElement, String, and_, cast
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import InstrumentedAttribute, contains_eager, joinedload
 
@@ -32,11 +32,21 @@ class OrganizationService(
     def upsert_constraints(self) -> list[InstrumentedAttribute[int]]:
         return [self.model.external_id]
 
-    async def list_installed(self, session: AsyncSession) -> Sequence[Organization]:
+    async def list_installed(
+        self, session: AsyncSession, *, shard: int = 0, shards: int = 1
+    ) -> Sequence[Organization]:
+        """
+        Optionally, only the organizations of one shard out of `shards`, spread by
+        the hash of their id.
+        """
         stmt = sql.select(Organization).where(
             Organization.deleted_at.is_(None),
             Organization.installation_id.is_not(None),
         )
+        if shards > 1:
+            # hashtext is an int4, which can't always be negated
+            id_hash = cast(sql.func.hashtext(cast(Organization.id, String)), BigInteger)
+            stmt = stmt.where(sql.func.abs(id_hash) % shards == shard)
         res = await session.execute(stmt)
         return res.scalars().all()
 
@@ -45,6 +55,16 @@ class OrganizationService(
     ) -> Organization | None:
         return await self.get_by(session, platform=platform, external_id=external_id)
 
+    async def list_by_platform(
+        self, session: AsyncSession, platform: Platforms, external_ids: list[int]
+    ) -> Sequence[Organization]:
+        stmt = sql.select(Organization).where(
+            Organization.platform == platform,
+            Organization.external_id.in_(external_ids),
+        )
+        res = await session.execute(stmt)
+        return res.scalars().unique().all()
+
     async def get_by_name(
         self, session: AsyncSession, platform: Platforms, name: str
     ) -> Organization | None:
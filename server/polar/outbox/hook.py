@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+from uuid import UUID
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from polar.kit.hook import Hook, HookFunc
+from polar.models.outbox_event import OutboxEvent
+from polar.postgres import AsyncSession
+from polar.worker import enqueue_job
+
+log = structlog.get_logger()
+
+T = TypeVar("T")
+
+# All outbox hooks, by name, so that the dispatcher can find back the receivers
+# of a recorded event.
+registry: dict[str, OutboxHook[Any]] = {}
+
+
+def receiver_name(fun: HookFunc[Any]) -> str:
+    return f"{fun.__module__}.{fun.__qualname__}"
+
+
+class OutboxHook(Hook[T]):
+    """
+    Hook whose receivers can be delivered asynchronously through the outbox.
+
+    Receivers registered with `add` still run inline when the hook is called.
+    Receivers registered with `add_deferred` are recorded as outbox events in the
+    caller's transaction instead, which the caller commits, and are delivered
+    later by the dispatcher (see polar.outbox.service) with retries and
+    per-aggregate ordering.
+
+    Since the payload can't be serialized, the dispatcher rebuilds it with `load`
+    from the aggregate id.
+    """
+
+    deferred: dict[str, HookFunc[T]]
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        get_session: Callable[[T], AsyncSession],
+        get_aggregate_id: Callable[[T], UUID],
+        load: Callable[[AsyncSession, UUID], Awaitable[T | None]],
+    ) -> None:
+        super().__init__()
+        if name in registry:
+            raise Exception(f"outbox hook is already registered! name={name}")
+
+        self.name = name
+        self.deferred = {}
+        self.get_session = get_session
+        self.get_aggregate_id = get_aggregate_id
+        self.load = load
+        registry[name] = self
+
+    def add_deferred(self, fun: HookFunc[T]) -> None:
+        name = receiver_name(fun)
+        if name in self.deferred:
+            raise Exception(
+                f"fun is already registered! fun={fun} deferred={self.deferred}"
+            )
+
+        self.deferred[name] = fun
+
+    async def call(self, payload: T) -> None:
+        await self.record(payload)
+        await super().call(payload)
+
+    async def record(self, payload: T) -> None:
+        """
+        Add the events of the deferred receivers to the caller's session. They
+        are written, and then dispatched, when the caller commits.
+        """
+        if not self.deferred:
+            return
+
+        session = self.get_session(payload)
+        aggregate_id = self.get_aggregate_id(payload)
+
+        for name in self.deferred:
+            session.add(
+                OutboxEvent(hook=self.name, receiver=name, aggregate_id=aggregate_id)
+            )
+        dispatch_after_commit(session)
+
+        log.debug(
+            "outbox.record",
+            hook=self.name,
+            aggregate_id=aggregate_id,
+            receivers=len(self.deferred),
+        )
+
+
+# Dispatch jobs being enqueued, referenced until they're done
+_dispatches: set[asyncio.Task[Any]] = set()
+
+
+def dispatch_after_commit(session: AsyncSession) -> None:
+    """
+    Deliver promptly once the events are committed, instead of waiting for the
+    next cron run.
+    """
+    sync_session = session.sync_session
+    if sync_session.info.get("outbox_dispatch"):
+        return
+    sync_session.info["outbox_dispatch"] = True
+
+    def after_commit(_: Session) -> None:
+        sync_session.info.pop("outbox_dispatch", None)
+        # Session events are synchronous. The job id coalesces the dispatch
+        # requests made while a dispatch is pending.
+        task = asyncio.get_running_loop().create_task(
+            enqueue_job("outbox.dispatch", _job_id="outbox.dispatch")
+        )
+        _dispatches.add(task)
+        task.add_done_callback(_dispatches.discard)
+
+    event.listen(sync_session, "after_commit", after_commit, once=True)
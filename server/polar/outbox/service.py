@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from uuid import UUID
+
+import structlog
+from sqlalchemy import ColumnElement, and_, exists
+from sqlalchemy.orm import aliased
+
+from polar.kit.utils import utc_now
+from polar.models.outbox_event import OutboxEvent
+from polar.postgres import AsyncSession, AsyncSessionLocal, sql
+
+from .hook import registry
+
+log = structlog.get_logger()
+
+# Number of events claimed per dispatcher round
+BATCH_SIZE = 10
+
+# How long a claimed event is reserved for the dispatcher that claimed it. If that
+# dispatcher dies, the event is picked up again once the lease expires. The lease
+# is renewed when the event's delivery starts, see OutboxService.deliver.
+LEASE = timedelta(minutes=5)
+
+# Retries back off exponentially from RETRY_BASE_DELAY up to RETRY_MAX_DELAY
+RETRY_BASE_DELAY = timedelta(seconds=10)
+RETRY_MAX_DELAY = timedelta(hours=1)
+MAX_ATTEMPTS = 10
+
+
+@dataclass
+class DispatchResult:
+    delivered: int = 0
+    retried: int = 0
+    failed: int = 0
+    max_lag_seconds: float = 0.0
+
+
+def pending_clause() -> ColumnElement[bool]:
+    return and_(OutboxEvent.delivered_at.is_(None), OutboxEvent.failed_at.is_(None))
+
+
+class OutboxService:
+    async def dispatch(self, *, batch_size: int = BATCH_SIZE) -> DispatchResult:
+        """
+        Deliver due outbox events until there are none left.
+
+        Every event is delivered in its own session, so that a failing receiver
+        only rolls back (and retries) its own work.
+        """
+        result = DispatchResult()
+
+        while True:
+            async with AsyncSessionLocal() as session:
+                events = await self.claim(session, batch_size=batch_size)
+
+            if not events:
+                break
+
+            # Delivering an event can make later events on the same aggregate due,
+            # so keep claiming until nothing is left.
+            for event in events:
+                await self.deliver(event, result)
+
+        if result.delivered or result.retried or result.failed:
+            log.info(
+                "outbox.dispatch",
+                delivered=result.delivered,
+                retried=result.retried,
+                failed=result.failed,
+                lag_seconds=result.max_lag_seconds,
+            )
+
+        return result
+
+    async def claim(
+        self, session: AsyncSession, *, batch_size: int = BATCH_SIZE
+    ) -> list[OutboxEvent]:
+        """
+        Lease a batch of due events.
+
+        An event is only due once all the earlier events of the same receiver on
+        the same aggregate are settled, which keeps deliveries ordered per
+        aggregate. Rows locked by a concurrent dispatcher are skipped.
+        """
+        now = utc_now()
+        earlier = aliased(OutboxEvent)
+
+        due = (
+            sql.select(OutboxEvent.id)
+            .where(
+                pending_clause(),
+                OutboxEvent.next_attempt_at <= now,
+                ~exists().where(
+                    earlier.receiver == OutboxEvent.receiver,
+                    earlier.aggregate_id == OutboxEvent.aggregate_id,
+                    earlier.created_at < OutboxEvent.created_at,
+                    earlier.delivered_at.is_(None),
+                    earlier.failed_at.is_(None),
+                ),
+            )
+            .order_by(OutboxEvent.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+        stmt = (
+            sql.update(OutboxEvent)
+            .where(OutboxEvent.id.in_(due.scalar_subquery()))
+            .values(
+                attempts=OutboxEvent.attempts + 1,
+                next_attempt_at=now + LEASE,
+            )
+            .returning(OutboxEvent)
+            .execution_options(synchronize_session=False)
+        )
+        res = await session.execute(stmt)
+        events = list(res.scalars().all())
+        await session.commit()
+
+        return sorted(events, key=lambda e: e.created_at)
+
+    async def deliver(self, event: OutboxEvent, result: DispatchResult) -> None:
+        hook = registry.get(event.hook)
+        fun = hook.deferred.get(event.receiver) if hook else None
+        if hook is None or fun is None:
+            # The receiver was removed or renamed since the event was recorded
+            await self.mark_failed(event.id, "receiver is not registered")
+            result.failed += 1
+            return
+
+        async with AsyncSessionLocal() as session:
+            # The events of a batch are delivered one after the other: renew the
+            # lease, and keep the row locked, so that no other dispatcher claims
+            # the event while it's delivered. Skip it if its lease expired and
+            # another dispatcher claimed it already.
+            renewed = await session.execute(
+                sql.update(OutboxEvent)
+                .where(
+                    OutboxEvent.id == event.id,
+                    OutboxEvent.attempts == event.attempts,
+                    pending_clause(),
+                )
+                .values(next_attempt_at=utc_now() + LEASE)
+            )
+            if renewed.rowcount == 0:
+                await session.rollback()
+                return
+
+            try:
+                payload = await hook.load(session, event.aggregate_id)
+                # Nothing to deliver if the aggregate is gone
+                if payload is not None:
+                    await fun(payload)
+            except Exception as e:
+                await session.rollback()
+                log.error(
+                    "outbox.deliver.failed",
+                    hook=event.hook,
+                    receiver=event.receiver,
+                    aggregate_id=event.aggregate_id,
+                    attempts=event.attempts,
+                    exc_info=True,
+                )
+                if event.attempts >= MAX_ATTEMPTS:
+                    await self.mark_failed(event.id, repr(e))
+                    result.failed += 1
+                else:
+                    await self.schedule_retry(event.id, event.attempts, repr(e))
+                    result.retried += 1
+                return
+
+            delivered_at = utc_now()
+            await session.execute(
+                sql.update(OutboxEvent)
+                .where(OutboxEvent.id == event.id)
+                .values(delivered_at=delivered_at, last_error=None)
+            )
+            await session.commit()
+
+        result.delivered += 1
+        result.max_lag_seconds = max(
+            result.max_lag_seconds, self.lag(event.created_at, delivered_at)
+        )
+
+    async def schedule_retry(self, id: UUID, attempts: int, error: str) -> None:
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                sql.update(OutboxEvent)
+                .where(OutboxEvent.id == id)
+                .values(next_attempt_at=utc_now() + delay, last_error=error)
+            )
+            await session.commit()
+
+    async def mark_failed(self, id: UUID, error: str) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                sql.update(OutboxEvent)
+                .where(OutboxEvent.id == id)
+                .values(failed_at=utc_now(), last_error=error)
+            )
+            await session.commit()
+
+    async def get_oldest_pending_lag(self, session: AsyncSession) -> float:
+        stmt = sql.select(sql.func.min(OutboxEvent.created_at)).where(pending_clause())
+        res = await session.execute(stmt)
+        oldest = res.scalar_one_or_none()
+        if oldest is None:
+            return 0.0
+        return self.lag(oldest, utc_now())
+
+    def lag(self, created_at: datetime, now: datetime) -> float:
+        return (now - created_at).total_seconds()
+
+
+outbox = OutboxService()
@@ -0,0 +1,26 @@
+import structlog
+
+from polar.postgres import AsyncSessionLocal
+from polar.worker import JobContext, PolarWorkerContext, interval, task
+
+from .service import outbox
+
+log = structlog.get_logger()
+
+
+@task("outbox.dispatch", keep_result=0)
+async def outbox_dispatch(
+    ctx: JobContext,
+    polar_context: PolarWorkerContext,
+) -> None:
+    await outbox.dispatch()
+
+
+@interval(second={0, 15, 30, 45})
+async def cron_outbox_dispatch(ctx: JobContext) -> None:
+    # Picks up retries and anything a dispatch job missed
+    await outbox.dispatch()
+
+    async with AsyncSessionLocal() as session:
+        lag = await outbox.get_oldest_pending_lag(session)
+    log.info("outbox.lag", lag_seconds=lag)
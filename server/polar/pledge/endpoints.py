@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import Field
 
 from polar.auth.dependencies import Auth
+from polar.authz.service import AccessType, Authz
 from polar.enums import Platforms
 from polar.exceptions import NotPermitted, ResourceNotFound, StripeError
 from polar.issue.schemas import Issue, IssueRead
@@ -64,6 +65,7 @@ async def search(
     | None = Query(default=None, description="Search pledges to this issue"),
     session: AsyncSession = Depends(get_db_session),
     auth: Auth = Depends(Auth.current_user),
+    authz: Authz = Depends(Authz.authz),
 ) -> ListResource[PledgeSchema]:
     list_by_orgs: list[UUID] = []
     list_by_repos: list[UUID] = []
@@ -139,18 +141,10 @@ async def search(
         load_issue=True,
     )
 
-    user_memberships = await user_organization_service.list_by_user_id(
-        session,
-        auth.user.id,
-    )
-
     return ListResource(
         items=[
             PledgeSchema.from_db(p)
-            for p in pledges
-            if pledge_service.user_can_read_pledge(
-                auth.user, p, user_memberships
-            )  # Authorization
+            for p in await authz.filter_readable_pledges(auth.user, pledges)
         ]
     )
 
@@ -167,6 +161,7 @@ async def get(
     id: UUID,
     session: AsyncSession = Depends(get_db_session),
     auth: Auth = Depends(Auth.current_user),
+    authz: Authz = Depends(Authz.authz),
 ) -> PledgeSchema:
     pledge = await pledge_service.get_with_loaded(session, id)
     if not pledge:
@@ -175,12 +170,7 @@ async def get(
             detail="Pledge not found",
         )
 
-    user_memberships = await user_organization_service.list_by_user_id(
-        session,
-        auth.user.id,
-    )
-
-    if not pledge_service.user_can_read_pledge(auth.user, pledge, user_memberships):
+    if not await authz.can(auth.user, AccessType.read, pledge):
         raise HTTPException(
             status_code=403,
             detail="Access denied",
@@ -333,17 +323,13 @@ async def get_pledge(
     pledge_id: UUID,
     session: AsyncSession = Depends(get_db_session),
     auth: Auth = Depends(Auth.current_user),
+    authz: Authz = Depends(Authz.authz),
 ) -> PledgeRead:
     pledge = await pledge_service.get_with_loaded(session, pledge_id)
     if not pledge:
         raise HTTPException(status_code=404, detail="Pledge not found")
 
-    user_memberships = await user_organization_service.list_by_user_id(
-        session,
-        auth.user.id,
-    )
-
-    if not pledge_service.user_can_read_pledge(auth.user, pledge, user_memberships):
+    if not await authz.can(auth.user, AccessType.read, pledge):
         raise HTTPException(
             status_code=403,
             detail="Access denied",
@@ -1,8 +1,13 @@
 from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy.orm import joinedload
+
 from polar.kit.hook import Hook
 from polar.models.pledge import Pledge
 from polar.models.pledge_transaction import PledgeTransaction
-from polar.postgres import AsyncSession
+from polar.outbox.hook import OutboxHook
+from polar.postgres import AsyncSession, sql
 
 
 @dataclass
@@ -18,11 +23,36 @@ class PledgePaidHook:
     transaction: PledgeTransaction
 
 
+async def load_pledge_hook(session: AsyncSession, id: UUID) -> PledgeHook | None:
+    statement = (
+        sql.select(Pledge)
+        .options(
+            joinedload(Pledge.user),
+            joinedload(Pledge.by_organization),
+        )
+        .where(Pledge.id == id)
+    )
+    res = await session.execute(statement)
+    pledge = res.scalars().unique().one_or_none()
+    if not pledge:
+        return None
+    return PledgeHook(session, pledge)
+
+
+def pledge_outbox_hook(name: str) -> OutboxHook[PledgeHook]:
+    return OutboxHook(
+        name,
+        get_session=lambda hook: hook.session,
+        get_aggregate_id=lambda hook: hook.pledge.id,
+        load=load_pledge_hook,
+    )
+
+
 # pledge_created fires when the pledge state is set to created
 # (not the same as created in the initiated state)
-pledge_created: Hook[PledgeHook] = Hook()
-pledge_disputed: Hook[PledgeHook] = Hook()
-pledge_confirmation_pending: Hook[PledgeHook] = Hook()
-pledge_pending: Hook[PledgeHook] = Hook()
+pledge_created = pledge_outbox_hook("pledge_created")
+pledge_disputed = pledge_outbox_hook("pledge_disputed")
+pledge_confirmation_pending = pledge_outbox_hook("pledge_confirmation_pending")
+pledge_pending = pledge_outbox_hook("pledge_pending")
 pledge_paid: Hook[PledgePaidHook] = Hook()
-pledge_updated: Hook[PledgeHook] = Hook()
+pledge_updated = pledge_outbox_hook("pledge_updated")
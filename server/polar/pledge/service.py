@@ -479,15 +479,17 @@ class PledgeService(ResourceServiceReader[Pledge]):
                 .returning(Pledge)
             )
             await session.execute(statement)
-            await session.commit()
 
             # FIXME: it would be cool if we could only trigger these events if the
             # update statement above modified the record
-            await pledge_updated.call(PledgeHook(session, pledge))
-
             if hook:
                 await hook.call(PledgeHook(session, pledge))
 
+            # Commits the state change together with the deferred hook events
+            await session.commit()
+
+            await pledge_updated.call(PledgeHook(session, pledge))
+
     async def mark_confirmation_pending_by_issue_id(
         self, session: AsyncSession, issue_id: UUID
     ) -> None:
@@ -545,10 +547,12 @@ class PledgeService(ResourceServiceReader[Pledge]):
             )
         )
         await session.execute(statement)
+        await pledge_pending.call(PledgeHook(session, pledge))
+
+        # Commits the state change together with the deferred hook events
         await session.commit()
 
         await pledge_updated.call(PledgeHook(session, pledge))
-        await pledge_pending.call(PledgeHook(session, pledge))
 
     def validate_splits(self, splits: list[ConfirmIssueSplit]) -> bool:
         sum = 0.0
@@ -630,9 +634,11 @@ class PledgeService(ResourceServiceReader[Pledge]):
                 transaction_id=transaction_id,
             )
         )
-        await session.commit()
         await pledge_created.call(PledgeHook(session, pledge))
 
+        # Commits the state change together with the deferred hook events
+        await session.commit()
+
     async def refund_by_payment_id(
         self, session: AsyncSession, payment_id: str, amount: int, transaction_id: str
     ) -> None:
@@ -1,25 +1,102 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import random
 import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
 from typing import Any
 
-from posthog import Posthog
+import structlog
+from posthog.request import batch_post
 
-from polar.config import settings
+from polar.config import PostHogSink, settings
+from polar.kit.utils import utc_now
 from polar.models.user import User
 
+log = structlog.get_logger()
+
+Event = dict[str, Any]
+
+
+class AnalyticsSink(ABC):
+    @abstractmethod
+    def send(self, events: list[Event]) -> None:
+        pass
+
+
+class PostHogAPISink(AnalyticsSink):
+    def __init__(self, api_key: str) -> None:
+        self.api_key = api_key
+
+    def send(self, events: list[Event]) -> None:
+        batch_post(self.api_key, batch=events)
+
+
+class FileSink(AnalyticsSink):
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def send(self, events: list[Event]) -> None:
+        with open(self.path, "a") as f:
+            for event in events:
+                f.write(json.dumps(event, default=str) + "\n")
+
+
+def get_sink() -> AnalyticsSink | None:
+    if settings.POSTHOG_SINK == PostHogSink.file:
+        return FileSink(settings.POSTHOG_FILE_SINK_PATH)
+
+    if not settings.POSTHOG_PROJECT_API_KEY or settings.is_testing():
+        return None
+
+    return PostHogAPISink(settings.POSTHOG_PROJECT_API_KEY)
+
+
+@dataclass
+class Stats:
+    enqueued: int = 0
+    sent: int = 0
+    sampled_out: int = 0
+    dropped: int = 0
+    failed: int = 0
+
 
 class Service:
-    client: Posthog | None
+    """
+    Analytics events are buffered in memory and sent in batches by a background
+    task, so that capturing never waits on PostHog.
 
-    def __init__(self) -> None:
-        if not settings.POSTHOG_PROJECT_API_KEY:
-            self.client = None
-            return
+    The buffer is bounded: when it's full, new events are dropped (and counted)
+    rather than growing the process memory.
+    """
+
+    sink: AnalyticsSink | None
+
+    def __init__(
+        self,
+        sink: AnalyticsSink | None = None,
+        *,
+        queue_size: int = settings.POSTHOG_QUEUE_SIZE,
+        batch_size: int = settings.POSTHOG_BATCH_SIZE,
+        flush_interval: float = settings.POSTHOG_FLUSH_INTERVAL_SECONDS,
+        anonymous_sample_rate: float = settings.POSTHOG_ANONYMOUS_SAMPLE_RATE,
+    ) -> None:
+        self.sink = sink
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.anonymous_sample_rate = anonymous_sample_rate
 
-        self.client = Posthog(settings.POSTHOG_PROJECT_API_KEY)
-        self.client.disabled = settings.is_testing()
-        self.client.debug = settings.DEBUG
+        self.buffer: deque[Event] = deque()
+        self.stats = Stats()
+        self._lost_reported = 0
+        self._flusher: asyncio.Task[None] | None = None
+        self._batch_ready: asyncio.Event | None = None
+        # Batches being sent, from a thread
+        self._sending: set[asyncio.Future[None]] = set()
 
     def generate_distinct_user_id(self, user: User) -> str:
         return f"user:{user.id}"
@@ -39,13 +116,15 @@ class Service:
         event: str,
         properties: dict[str, Any] | None = None,
     ) -> None:
-        if not self.client:
-            return
-
-        self.client.capture(
-            distinct_id,
-            event=event,
-            properties=self.decorate_properties(properties),
+        self.enqueue(
+            {
+                "type": "capture",
+                "uuid": str(uuid.uuid4()),
+                "timestamp": utc_now().isoformat(),
+                "distinct_id": distinct_id,
+                "event": event,
+                "properties": self.decorate_properties(properties) or {},
+            }
         )
 
     def anonymous_event(
@@ -53,11 +132,23 @@ class Service:
         event: str,
         properties: dict[str, Any] | None = None,
     ) -> None:
-        """Shorthand for one-off anonymous event capture."""
+        """
+        Shorthand for one-off anonymous event capture.
+
+        Anonymous events are sampled, the sample rate is sent along so that they
+        can be weighted back.
+        """
+        if random.random() >= self.anonymous_sample_rate:
+            self.stats.sampled_out += 1
+            return
+
         self.capture(
             distinct_id="polar_anonymous",
             event=event,
-            properties=self.decorate_properties(properties),
+            properties={
+                **(properties or {}),
+                "sample_rate": self.anonymous_sample_rate,
+            },
         )
 
     def user_event(
@@ -69,21 +160,112 @@ class Service:
         self.capture(
             self.generate_distinct_user_id(user),
             event=event,
-            properties=self.decorate_properties(properties),
+            properties=properties,
         )
 
     def identify(self, user: User) -> None:
-        if not self.client:
+        self.enqueue(
+            {
+                "type": "identify",
+                "event": "$identify",
+                "uuid": str(uuid.uuid4()),
+                "timestamp": utc_now().isoformat(),
+                "distinct_id": self.generate_distinct_user_id(user),
+                "$set": self.decorate_properties({"username": user.username}),
+            }
+        )
+
+    def enqueue(self, event: Event) -> None:
+        if not self.sink:
             return
 
-        self.client.identify(
-            self.generate_distinct_user_id(user),
-            properties=self.decorate_properties(
-                {
-                    "username": user.username,
-                }
-            ),
-        )
+        if len(self.buffer) >= self.queue_size:
+            self.stats.dropped += 1
+            return
+
+        self.buffer.append(event)
+        self.stats.enqueued += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside of an event loop, e.g. in a script: nothing would flush the
+            # buffer later on, so send right away.
+            self._send(self._take_batch())
+            return
+
+        if (
+            self._flusher is None
+            or self._flusher.done()
+            or self._flusher.get_loop() is not loop
+        ):
+            self._batch_ready = asyncio.Event()
+            self._flusher = loop.create_task(self._run(self._batch_ready))
+
+        if len(self.buffer) >= self.batch_size and self._batch_ready:
+            self._batch_ready.set()
+
+    async def _run(self, batch_ready: asyncio.Event) -> None:
+        # Runs while there are buffered events, a new task is started by the next
+        # event otherwise. Waits for a full batch, or for the flush interval.
+        while self.buffer:
+            try:
+                await asyncio.wait_for(batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush_batch()
+
+    async def flush(self) -> None:
+        """
+        Send all the buffered events, e.g. before shutting down.
+        """
+        while self.buffer:
+            await self._flush_batch()
+
+        # Including the batches already taken by the background task
+        if self._sending:
+            await asyncio.wait(self._sending)
+
+    async def _flush_batch(self) -> None:
+        batch = self._take_batch()
+        if not batch:
+            return
+
+        sending = asyncio.ensure_future(asyncio.to_thread(self._send, batch))
+        self._sending.add(sending)
+        sending.add_done_callback(self._sending.discard)
+        await sending
+
+    def _take_batch(self) -> list[Event]:
+        batch: list[Event] = []
+        while self.buffer and len(batch) < self.batch_size:
+            batch.append(self.buffer.popleft())
+
+        if len(self.buffer) < self.batch_size and self._batch_ready:
+            self._batch_ready.clear()
+
+        return batch
+
+    def _send(self, batch: list[Event]) -> None:
+        if not self.sink or not batch:
+            return
+
+        try:
+            self.sink.send(batch)
+            self.stats.sent += len(batch)
+        except Exception:
+            self.stats.failed += len(batch)
+            log.error("posthog.send.failed", events=len(batch), exc_info=True)
+
+        lost = self.stats.dropped + self.stats.failed
+        if lost > self._lost_reported:
+            self._lost_reported = lost
+            log.warning(
+                "posthog.events_lost",
+                dropped=self.stats.dropped,
+                failed=self.stats.failed,
+                buffered=len(self.buffer),
+            )
 
 
-posthog = Service()
+posthog = Service(get_sink())
@@ -1,4 +1,10 @@
-from polar.receivers import onboarding, pledges, issue_reference, pull_request
+from polar.receivers import (
+    onboarding,
+    pledges,
+    issue_reference,
+    public_issues,
+    pull_request,
+)
 from polar.integrations.github import receivers as github_receivers
 
 __all__ = [
@@ -6,5 +12,6 @@ __all__ = [
     "pledges",
     "github_receivers",
     "issue_reference",
+    "public_issues",
     "pull_request",
 ]
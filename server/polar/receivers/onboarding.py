@@ -9,30 +9,13 @@ from polar.repository.hooks import (
     repository_issues_sync_completed,
 )
 from polar.eventstream.service import publish, publish_members
+from polar.repository.sync_progress import issue_sync_progress
 
 log = structlog.get_logger()
 
 
 async def on_issue_synced(hook: SyncedHook) -> None:
-    log.info(
-        "issue.synced",
-        issue=hook.record.id,
-        title=hook.record.title,
-        synced=hook.synced,
-    )
-    await publish(
-        "issue.synced",
-        {
-            "issue": {
-                "id": hook.record.id,
-                "title": hook.record.title,
-            },
-            "open_issues": hook.repository.open_issues or 0,
-            "synced_issues": hook.synced,
-            "repository_id": hook.repository.id,
-        },
-        organization_id=hook.organization.id,
-    )
+    await issue_sync_progress.synced(hook)
 
 
 repository_issue_synced.add(on_issue_synced)
@@ -41,16 +24,7 @@ repository_issue_synced.add(on_issue_synced)
 async def on_issue_sync_completed(
     hook: SyncCompletedHook,
 ) -> None:
-    log.info("issue.sync.completed", repository=hook.repository.id, synced=hook.synced)
-    await publish(
-        "issue.sync.completed",
-        {
-            "open_issues": hook.repository.open_issues or 0,
-            "synced_issues": hook.synced,
-            "repository_id": hook.repository.id,
-        },
-        organization_id=hook.organization.id,
-    )
+    await issue_sync_progress.completed(hook)
 
 
 repository_issues_sync_completed.add(on_issue_sync_completed)
@@ -94,7 +94,7 @@ async def pledge_created_discord_alert(hook: PledgeHook) -> None:
     await webhook.execute()
 
 
-pledge_created_hook.add(pledge_created_discord_alert)
+pledge_created_hook.add_deferred(pledge_created_discord_alert)
 
 
 async def pledge_created_issue_pledge_sum(hook: PledgeHook) -> None:
@@ -264,7 +264,7 @@ async def hook_pledge_created_notifications(hook: PledgeHook) -> None:
     await pledge_created_notification(pledge, session)
 
 
-pledge_created_hook.add(hook_pledge_created_notifications)
+pledge_created_hook.add_deferred(hook_pledge_created_notifications)
 
 
 async def hook_pledge_confirmation_pending_notifications(hook: PledgeHook) -> None:
@@ -273,7 +273,9 @@ async def hook_pledge_confirmation_pending_notifications(hook: PledgeHook) -> No
     await pledge_confirmation_pending_notification(pledge, session)
 
 
-pledge_confirmation_pending_hook.add(hook_pledge_confirmation_pending_notifications)
+pledge_confirmation_pending_hook.add_deferred(
+    hook_pledge_confirmation_pending_notifications
+)
 
 
 async def hook_pledge_pending_notifications(hook: PledgeHook) -> None:
@@ -282,4 +284,4 @@ async def hook_pledge_pending_notifications(hook: PledgeHook) -> None:
     await pledge_pending_notification(pledge, session)
 
 
-pledge_pending_hook.add(hook_pledge_pending_notifications)
+pledge_pending_hook.add_deferred(hook_pledge_pending_notifications)
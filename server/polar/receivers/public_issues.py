@@ -0,0 +1,56 @@
+from polar.issue.cache import public_issues_cache
+from polar.issue.hooks import IssueHook, issue_upserted
+from polar.organization.hooks import OrganizationHook, organization_upserted
+from polar.pledge.hooks import PledgeHook, pledge_created, pledge_updated
+from polar.repository.hooks import (
+    RepositoryHook,
+    SyncCompletedHook,
+    repository_issues_sync_completed,
+    repository_upserted,
+)
+
+
+async def invalidate_public_issues_on_issue_upserted(hook: IssueHook) -> None:
+    await public_issues_cache.invalidate(hook.issue.organization_id)
+
+
+issue_upserted.add(invalidate_public_issues_on_issue_upserted)
+
+
+async def invalidate_public_issues_on_pledge(hook: PledgeHook) -> None:
+    await public_issues_cache.invalidate(hook.pledge.organization_id)
+
+
+pledge_created.add(invalidate_public_issues_on_pledge)
+pledge_updated.add(invalidate_public_issues_on_pledge)
+
+
+async def invalidate_public_issues_on_organization_upserted(
+    hook: OrganizationHook,
+) -> None:
+    await public_issues_cache.invalidate(hook.organization.id)
+
+
+organization_upserted.add(invalidate_public_issues_on_organization_upserted)
+
+
+async def invalidate_public_issues_on_repository_upserted(
+    hook: RepositoryHook,
+) -> None:
+    # Visibility and archival change which issues are public
+    if hook.repository.organization_id:
+        await public_issues_cache.invalidate(hook.repository.organization_id)
+
+
+repository_upserted.add(invalidate_public_issues_on_repository_upserted)
+
+
+async def invalidate_public_issues_on_issues_sync_completed(
+    hook: SyncCompletedHook,
+) -> None:
+    # Issues imported in bulk don't go through issue_upserted, see
+    # GithubRepositoryService.bulk_import_issues
+    await public_issues_cache.invalidate(hook.organization.id)
+
+
+repository_issues_sync_completed.add(invalidate_public_issues_on_issues_sync_completed)
@@ -1,11 +1,23 @@
-from polar.enums import Platforms
-from polar.pull_request.hooks import PullRequestHook, pull_request_upserted
+import hashlib
+from datetime import timedelta
+
+import structlog
+
 from polar.integrations.github.service.url import github_url
-from polar.repository.service import repository as repository_service
-from polar.organization.service import organization as organization_service
 from polar.issue.service import issue as issue_service
+from polar.pull_request.hooks import PullRequestHook, pull_request_upserted
+from polar.repository.service import repository as repository_service
 from polar.worker import enqueue_job
 
+log = structlog.get_logger()
+
+# Re-crawls of the same issue requested within this delay are coalesced into one
+ISSUE_REFERENCES_CRAWL_DELAY = timedelta(seconds=30)
+
+
+def body_hash(body: str) -> str:
+    return hashlib.sha256(body.encode()).hexdigest()
+
 
 async def pull_request_find_reverse_references(
     hook: PullRequestHook,
@@ -24,36 +36,56 @@ async def pull_request_find_reverse_references(
     if not item.body:
         return
 
-    repo = await repository_service.get(session, item.repository_id)
-    if not repo:
+    # Nothing new to find if the body hasn't changed since the last lookup
+    hashed = body_hash(item.body)
+    if item.reverse_references_body_hash == hashed:
         return
 
-    org = await organization_service.get(session, item.organization_id)
-    if not org:
+    repo = await repository_service.get(
+        session, item.repository_id, load_organization=True
+    )
+    if not repo:
         return
 
-    urls = github_url.parse_urls(item.body)
+    org = repo.organization
 
-    for url in urls:
-        # Find deps in same repository, and trigger syncs for the issue
-        is_same_owner = url.owner is None or url.owner == org.name
-        is_same_repo = url.repo is None or url.repo == repo.name
+    # Find deps in same repository
+    numbers = {
+        url.number
+        for url in github_url.parse_urls(item.body)
+        if (url.owner is None or url.owner.lower() == org.name.lower())
+        and (url.repo is None or url.repo.lower() == repo.name.lower())
+    }
 
-        if not is_same_owner or not is_same_repo:
-            continue
+    resolved = True
+    if numbers:
+        linked_issues = await issue_service.list_by_repository_and_numbers(
+            session, repo.id, list(numbers)
+        )
+
+        # Schedule sync for the issues. The job id coalesces the syncs requested
+        # for the same issue while one is still pending.
+        for linked_issue in linked_issues:
+            await enqueue_job(
+                "github.issue.sync.issue_references",
+                linked_issue.id,
+                _job_id=f"github.issue.sync.issue_references:{linked_issue.id}",
+                _defer_by=ISSUE_REFERENCES_CRAWL_DELAY,
+            )
 
-        linked_issue = await issue_service.get_by_number(
-            session,
-            Platforms.github,
-            organization_id=org.id,
-            repository_id=repo.id,
-            number=url.number,
+        log.debug(
+            "pull_request.reverse_references",
+            pull_request_id=item.id,
+            numbers=len(numbers),
+            issues=len(linked_issues),
         )
-        if not linked_issue:
-            continue
 
-        # Schedule sync for this issue
-        await enqueue_job("github.issue.sync.issue_references", linked_issue.id)
+        # Issues not synced yet are only found on a later lookup
+        resolved = len(linked_issues) == len(numbers)
+
+    if resolved:
+        item.reverse_references_body_hash = hashed
+        await item.save(session)
 
 
 pull_request_upserted.add(pull_request_find_reverse_references)
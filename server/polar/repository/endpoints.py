@@ -5,6 +5,7 @@ import structlog
 from fastapi import APIRouter, Depends, HTTPException
 
 from polar.auth.dependencies import Auth
+from polar.authz.service import AccessType, Anonymous, Authz
 from polar.dashboard.schemas import IssueListType
 from polar.enums import Platforms
 from polar.issue.service import (
@@ -15,69 +16,22 @@ from polar.organization.service import organization as organization_service
 from polar.postgres import AsyncSession, get_db_session
 from polar.tags.api import Tags
 from polar.types import ListResource
-from polar.user_organization.service import (
-    user_organization as user_organization_service,
-)
-from polar.visibility import Visibility
 
 from .schemas import (
     Repository as RepositorySchema,
 )
 from .schemas import (
+    IssueSyncProgress,
     RepositorySeeksFundingShield,
 )
 from .service import repository
+from .sync_progress import issue_sync_progress
 
 log = structlog.get_logger()
 
 router = APIRouter(tags=["repositories"])
 
 
-async def user_can_read(
-    session: AsyncSession,
-    auth: Auth,
-    repository: RepositoryModel,
-) -> bool:
-    if repository.visibility == Visibility.PUBLIC:
-        return True
-
-    if not auth.user:
-        return False
-
-    user_memberships = await user_organization_service.list_by_user_id(
-        session,
-        auth.user.id,
-    )
-
-    ids = [m.organization_id for m in user_memberships]
-
-    if repository.organization_id in ids:
-        return True
-
-    return False
-
-
-async def user_can_write(
-    session: AsyncSession,
-    auth: Auth,
-    repository: RepositoryModel,
-) -> bool:
-    if not auth.user:
-        return False
-
-    user_memberships = await user_organization_service.list_by_user_id(
-        session,
-        auth.user.id,
-    )
-
-    ids = [m.organization_id for m in user_memberships if m.is_admin is True]
-
-    if repository.organization_id in ids:
-        return True
-
-    return False
-
-
 @router.get(
     "/repositories",
     response_model=ListResource[RepositorySchema],
@@ -111,6 +65,7 @@ async def search(
     organization_name: str,
     repository_name: str | None = None,
     auth: Auth = Depends(Auth.optional_user),
+    authz: Authz = Depends(Authz.authz),
     session: AsyncSession = Depends(get_db_session),
 ) -> ListResource[RepositorySchema]:
     org = await organization_service.get_by_name(
@@ -133,7 +88,7 @@ async def search(
     # Anonymous requests can only see public repositories,
     # authed users can also see private repositories in orgs that they are a
     # member of
-    repos = [r for r in repos if await user_can_read(session, auth, r)]
+    repos = await authz.filter_readable_repositories(auth.user or Anonymous(), repos)
 
     return ListResource(items=[RepositorySchema.from_db(r) for r in repos])
 
@@ -152,6 +107,7 @@ async def lookup(
     organization_name: str,
     repository_name: str,
     auth: Auth = Depends(Auth.optional_user),
+    authz: Authz = Depends(Authz.authz),
     session: AsyncSession = Depends(get_db_session),
 ) -> RepositorySchema:
     org = await organization_service.get_by_name(
@@ -172,7 +128,7 @@ async def lookup(
         load_organization=True,
     )
 
-    if not repo or not await user_can_read(session, auth, repo):
+    if not repo or not await authz.can(auth.user or Anonymous(), AccessType.read, repo):
         raise HTTPException(
             status_code=404,
             detail="Repository not found",
@@ -193,6 +149,7 @@ async def lookup(
 async def get(
     id: UUID,
     auth: Auth = Depends(Auth.optional_user),
+    authz: Authz = Depends(Authz.authz),
     session: AsyncSession = Depends(get_db_session),
 ) -> RepositorySchema:
     repo = await repository.get(session, id=id, load_organization=True)
@@ -203,7 +160,7 @@ async def get(
             detail="Repository not found",
         )
 
-    if not await user_can_read(session, auth, repo):
+    if not await authz.can(auth.user or Anonymous(), AccessType.read, repo):
         raise HTTPException(
             status_code=404,
             detail="Repository not found",
@@ -216,3 +173,34 @@ async def get(
         status_code=404,
         detail="Repository not found",
     )
+
+
+@router.get(
+    "/repositories/{id}/sync/issues",
+    response_model=IssueSyncProgress,
+    tags=[Tags.INTERNAL],
+    description="Get the progress of the latest issue sync of a repository",
+    status_code=200,
+    responses={404: {}},
+)
+async def get_issue_sync_progress(
+    id: UUID,
+    auth: Auth = Depends(Auth.current_user),
+    authz: Authz = Depends(Authz.authz),
+    session: AsyncSession = Depends(get_db_session),
+) -> IssueSyncProgress:
+    repo = await repository.get(session, id=id, load_organization=True)
+    if not repo or not await authz.can(auth.user, AccessType.write, repo):
+        raise HTTPException(
+            status_code=404,
+            detail="Repository not found",
+        )
+
+    progress = await issue_sync_progress.get(repo.id)
+    if not progress:
+        raise HTTPException(
+            status_code=404,
+            detail="No sync in progress",
+        )
+
+    return progress
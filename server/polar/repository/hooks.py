@@ -4,13 +4,15 @@ from polar.models.issue import Issue
 from polar.models.organization import Organization
 from polar.models.pull_request import PullRequest
 from polar.models.repository import Repository
+from polar.postgres import AsyncSession
 
 
 @dataclass
 class SyncedHook:
     repository: Repository
     organization: Organization
-    record: Issue | PullRequest
+    # None when synced in bulk, see GithubRepositoryService.bulk_import_issues
+    record: Issue | PullRequest | None
     synced: int
 
 
@@ -21,6 +23,14 @@ class SyncCompletedHook:
     synced: int
 
 
+@dataclass
+class RepositoryHook:
+    session: AsyncSession
+    repository: Repository
+
+
+repository_upserted: Hook[RepositoryHook] = Hook()
+
 repository_issue_synced: Hook[SyncedHook] = Hook()
 repository_issues_sync_completed: Hook[SyncCompletedHook] = Hook()
 
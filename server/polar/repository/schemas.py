@@ -129,3 +129,11 @@ class RepositoryLegacyRead(Schema):
 
 class RepositorySeeksFundingShield(Schema):
     count: int
+
+
+class IssueSyncProgress(Schema):
+    repository_id: UUID
+    open_issues: int
+    synced_issues: int
+    completed: bool = False
+    updated_at: datetime
@@ -2,7 +2,7 @@ from typing import Sequence
 from uuid import UUID
 
 import structlog
-from sqlalchemy import and_, distinct
+from sqlalchemy import and_, not_
 from sqlalchemy.orm import InstrumentedAttribute, joinedload
 
 from polar.kit.services import ResourceService
@@ -152,66 +152,84 @@ class RepositoryService(
         session: AsyncSession,
         organization: Organization,
     ) -> dict[UUID, dict[str, int]]:
+        # Issues and pull requests are aggregated per repository in separate
+        # subqueries before being joined, to avoid an issues x pull requests
+        # row explosion per repository.
+        is_embedded = Issue.pledge_badge_embedded_at.is_not(None)
+        is_labelled = Issue.has_pledge_badge_label.is_(True)
+
+        issues_subquery = (
+            sql.select(
+                Issue.repository_id,
+                sql.func.count().label("issue_count"),
+                sql.func.count()
+                .filter(and_(is_embedded, not_(is_labelled)))
+                .label("auto_embedded_count"),
+                sql.func.count()
+                .filter(and_(is_embedded, is_labelled))
+                .label("label_embedded_count"),
+            )
+            .where(
+                Issue.organization_id == organization.id,
+                Issue.state == "open",
+            )
+            .group_by(Issue.repository_id)
+            .subquery()
+        )
+
+        pull_requests_subquery = (
+            sql.select(
+                PullRequest.repository_id,
+                sql.func.count().label("pull_request_count"),
+            )
+            .where(
+                PullRequest.organization_id == organization.id,
+                PullRequest.state == "open",
+            )
+            .group_by(PullRequest.repository_id)
+            .subquery()
+        )
+
         stmt = (
             sql.select(
                 Repository.id,
-                Issue.has_pledge_badge_label.label("labelled"),
-                Issue.pledge_badge_embedded_at.is_not(None).label("embedded"),
-                sql.func.count(distinct(Issue.id)).label("issue_count"),
-                sql.func.count(distinct(PullRequest.id)).label("pull_request_count"),
+                sql.func.coalesce(issues_subquery.c.issue_count, 0),
+                sql.func.coalesce(issues_subquery.c.auto_embedded_count, 0),
+                sql.func.coalesce(issues_subquery.c.label_embedded_count, 0),
+                sql.func.coalesce(pull_requests_subquery.c.pull_request_count, 0),
             )
             .join(
-                Issue,
-                and_(Issue.repository_id == Repository.id, Issue.state == "open"),
+                issues_subquery,
+                issues_subquery.c.repository_id == Repository.id,
                 isouter=True,
             )
             .join(
-                PullRequest,
-                and_(
-                    PullRequest.repository_id == Repository.id,
-                    PullRequest.state == "open",
-                ),
+                pull_requests_subquery,
+                pull_requests_subquery.c.repository_id == Repository.id,
                 isouter=True,
             )
             .where(
                 Repository.organization_id == organization.id,
                 Repository.deleted_at.is_(None),
             )
-            .group_by(Repository.id, "labelled", "embedded")
         )
 
         res = await session.execute(stmt)
-        rows = res.unique().all()
 
-        prs: dict[UUID, bool] = {}
         ret: dict[UUID, dict[str, int]] = {}
-        for r in rows:
-            mapped = r._mapping
-            repo_id = mapped["id"]
-            repo = ret.setdefault(
-                repo_id,
-                {
-                    "synced_issues": 0,
-                    "auto_embedded_issues": 0,
-                    "label_embedded_issues": 0,
-                    # We get duplicate PR counts due to SQL grouping.
-                    # So we only need to set it once at initation here.
-                    "pull_requests": mapped["pull_request_count"],
-                },
-            )
-            is_labelled = mapped["labelled"]
-            repo["synced_issues"] += mapped["issue_count"]
-            if repo_id not in prs:
-                repo["synced_issues"] += mapped["pull_request_count"]
-                prs[repo_id] = True
-
-            if not mapped["embedded"]:
-                continue
-
-            if is_labelled:
-                repo["label_embedded_issues"] += mapped["issue_count"]
-            else:
-                repo["auto_embedded_issues"] += mapped["issue_count"]
+        for (
+            repo_id,
+            issue_count,
+            auto_embedded_count,
+            label_embedded_count,
+            pull_request_count,
+        ) in res.all():
+            ret[repo_id] = {
+                "synced_issues": issue_count + pull_request_count,
+                "auto_embedded_issues": auto_embedded_count,
+                "label_embedded_issues": label_embedded_count,
+                "pull_requests": pull_request_count,
+            }
 
         return ret
 
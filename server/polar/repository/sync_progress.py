@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+import structlog
+
+from polar.eventstream.service import publish
+from polar.kit.utils import utc_now
+from polar.redis import Redis, redis
+
+from .hooks import SyncCompletedHook, SyncedHook
+from .schemas import IssueSyncProgress
+
+log = structlog.get_logger()
+
+
+class IssueSyncProgressService:
+    """
+    Coalesced progress of issue syncs (backfills) per repository.
+
+    Instead of an event per synced issue, an `issue.synced` event carrying the
+    cumulative counts is published at most every `interval_seconds`, or every
+    `every_issues` issues (a page), whichever comes first. An
+    `issue.sync.completed` event is published when the sync is done.
+
+    Every published event is also stored as a snapshot in Redis, so that clients
+    which missed the stream can poll the latest progress.
+    """
+
+    interval_seconds = 0.5
+    every_issues = 30
+    snapshot_ttl_seconds = 60 * 60 * 24
+
+    # Decides, atomically across processes, whether the progress is due. The
+    # synced count of the last publish is kept for the interval, once it expires
+    # the next synced issue is published.
+    throttle_script = """
+    local synced = tonumber(ARGV[1])
+    local last_synced = redis.call("GET", KEYS[1])
+    if last_synced and synced - tonumber(last_synced) < tonumber(ARGV[2]) then
+        return 0
+    end
+    redis.call("SET", KEYS[1], synced, "PX", ARGV[3])
+    return 1
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    def _key(self, repository_id: UUID) -> str:
+        return f"repository:sync:issues:{repository_id}"
+
+    def _throttle_key(self, repository_id: UUID) -> str:
+        return f"repository:sync:issues:{repository_id}:published"
+
+    async def get(self, repository_id: UUID) -> IssueSyncProgress | None:
+        value = await self.redis.get(self._key(repository_id))
+        if value is None:
+            return None
+        return IssueSyncProgress.parse_raw(value)
+
+    async def synced(self, hook: SyncedHook) -> bool:
+        """
+        Record that an issue was synced. Returns True if progress was published.
+        """
+        due = await self.redis.eval(
+            self.throttle_script,
+            1,
+            self._throttle_key(hook.repository.id),
+            hook.synced,
+            self.every_issues,
+            int(self.interval_seconds * 1000),
+        )
+        if not due:
+            return False
+
+        await self._publish(
+            "issue.synced",
+            IssueSyncProgress(
+                repository_id=hook.repository.id,
+                open_issues=hook.repository.open_issues or 0,
+                synced_issues=hook.synced,
+                updated_at=utc_now(),
+            ),
+            organization_id=hook.organization.id,
+        )
+        return True
+
+    async def completed(self, hook: SyncCompletedHook) -> None:
+        await self.redis.delete(self._throttle_key(hook.repository.id))
+        await self._publish(
+            "issue.sync.completed",
+            IssueSyncProgress(
+                repository_id=hook.repository.id,
+                open_issues=hook.repository.open_issues or 0,
+                synced_issues=hook.synced,
+                completed=True,
+                updated_at=utc_now(),
+            ),
+            organization_id=hook.organization.id,
+        )
+
+    async def _publish(
+        self, key: str, progress: IssueSyncProgress, *, organization_id: UUID
+    ) -> None:
+        log.info(
+            key,
+            repository=progress.repository_id,
+            synced=progress.synced_issues,
+        )
+        await self.redis.set(
+            self._key(progress.repository_id),
+            progress.json(),
+            ex=self.snapshot_ttl_seconds,
+        )
+        await publish(
+            key,
+            progress.dict(exclude={"updated_at"}),
+            organization_id=organization_id,
+        )
+
+
+issue_sync_progress = IssueSyncProgressService(redis)
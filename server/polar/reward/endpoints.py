@@ -4,7 +4,7 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from polar.auth.dependencies import Auth
-from polar.authz.service import AccessType, Authz
+from polar.authz.service import Authz
 from polar.currency.schemas import CurrencyAmount
 from polar.enums import Platforms
 from polar.models.issue_reward import IssueReward
@@ -69,11 +69,18 @@ async def search(
         reward_org_id=rewards_to_org,
     )
 
+    readable = {
+        r.id
+        for r in await authz.filter_readable(
+            auth.user, [reward for _, reward, _ in rewards]
+        )
+    }
+
     return ListResource(
         items=[
             to_resource(pledge, reward, transaction)
             for pledge, reward, transaction in rewards
-            if await authz.can(auth.user, AccessType.read, reward)
+            if reward.id in readable
         ]
     )
 
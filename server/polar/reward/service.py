@@ -1,8 +1,9 @@
+from datetime import datetime
 from typing import List, Sequence, Tuple
 from uuid import UUID
 
 import structlog
-from sqlalchemy import and_
+from sqlalchemy import and_, desc, tuple_
 from sqlalchemy.orm import (
     joinedload,
 )
@@ -27,7 +28,14 @@ class RewardService:
         issue_id: UUID | None = None,
         reward_org_id: UUID | None = None,
         reward_user_id: UUID | None = None,
+        before: tuple[datetime, UUID, UUID] | None = None,
+        limit: int | None = None,
     ) -> Sequence[Tuple[Pledge, IssueReward, PledgeTransaction]]:
+        """
+        Rewards are listed by pledge, most recent first. Pass the
+        (pledge.created_at, pledge.id, issue_reward.id) of the last reward of a page
+        as `before` to get the next one.
+        """
         statement = (
             sql.select(Pledge, IssueReward, PledgeTransaction)
             .join(Pledge.issue)
@@ -55,6 +63,16 @@ class RewardService:
         if reward_user_id:
             statement = statement.where(IssueReward.user_id == reward_user_id)
 
+        if before:
+            statement = statement.where(
+                tuple_(Pledge.created_at, Pledge.id, IssueReward.id) < before
+            )
+
+        if limit:
+            statement = statement.order_by(
+                desc(Pledge.created_at), desc(Pledge.id), desc(IssueReward.id)
+            ).limit(limit)
+
         statement = statement.options(
             joinedload(IssueReward.user),
             joinedload(IssueReward.organization),
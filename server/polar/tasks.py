@@ -1,5 +1,7 @@
+from polar.extension import tasks as extension
 from polar.integrations.github import tasks as github
 from polar.integrations.stripe import tasks as stripe
 from polar.notifications import tasks as notifications
+from polar.outbox import tasks as outbox
 
-__all__ = ["github", "stripe", "notifications"]
+__all__ = ["extension", "github", "stripe", "notifications", "outbox"]
@@ -1,27 +1,69 @@
+import asyncio
+import signal
 import types
 import functools
 from datetime import datetime
-from typing import Any, TypedDict, ParamSpec, TypeVar, Awaitable, Callable
+from enum import Enum
+from typing import (
+    Any,
+    NotRequired,
+    TypedDict,
+    ParamSpec,
+    TypeVar,
+    Awaitable,
+    Callable,
+    Sequence,
+)
 from pydantic import BaseModel
 
 import structlog
 from arq import func, cron
 from arq.connections import RedisSettings, ArqRedis, create_pool as arq_create_pool
+from arq.constants import default_queue_name
 from arq.jobs import Job
-from arq.worker import Function
+from arq.worker import Function, Worker
 from arq.typing import SecondsTimedelta, OptionType
 from arq.cron import CronJob
 
 from polar.config import settings
 from polar.context import ExecutionContext
+from polar.kit.utils import utc_now
+from polar.posthog import posthog
 
 log = structlog.get_logger()
 
 redis_settings = RedisSettings().from_dsn(settings.redis_url)
 
 
+class QueueName(str, Enum):
+    """
+    Each queue is consumed by its own pool of workers, so that real-time jobs don't
+    wait behind bulk ones.
+    """
+
+    # Everything else. Its pool also runs the cron jobs.
+    default = default_queue_name
+    # Handling of webhooks, user-visible
+    webhooks = f"{default_queue_name}:webhooks"
+    # Bulk syncs and backfills from GitHub
+    crawls = f"{default_queue_name}:crawls"
+    notifications = f"{default_queue_name}:notifications"
+
+
+QUEUE_MAX_JOBS: dict[QueueName, int] = {
+    QueueName.default: settings.WORKER_MAX_JOBS_DEFAULT,
+    QueueName.webhooks: settings.WORKER_MAX_JOBS_WEBHOOKS,
+    QueueName.crawls: settings.WORKER_MAX_JOBS_CRAWLS,
+    QueueName.notifications: settings.WORKER_MAX_JOBS_NOTIFICATIONS,
+}
+
+# Task name -> queue, filled by the task decorator
+TASK_QUEUES: dict[str, QueueName] = {}
+
+
 class WorkerContext(TypedDict):
     redis: ArqRedis
+    queue: NotRequired[str]
 
 
 class JobContext(WorkerContext):
@@ -39,48 +81,154 @@ class PolarWorkerContext(BaseModel):
 
 
 class WorkerSettings:
+    """
+    Settings of the default queue's pool, see `worker_settings` for the others.
+    """
+
     functions: list[Function | types.CoroutineType] = []  # type: ignore
     cron_jobs: list[CronJob] = []
 
     redis_settings = RedisSettings().from_dsn(settings.redis_url)
+    queue_name = QueueName.default.value
+    max_jobs = QUEUE_MAX_JOBS[QueueName.default]
+    ctx = {"queue": QueueName.default.name}
 
     @staticmethod
-    async def startup(ctx: WorkerContext) -> None:
+    async def on_startup(ctx: WorkerContext) -> None:
         log.info("polar.worker.startup")
 
     @staticmethod
-    async def shutdown(ctx: WorkerContext) -> None:
+    async def on_shutdown(ctx: WorkerContext) -> None:
+        await posthog.flush()
         log.info("polar.worker.shutdown")
 
     @staticmethod
     async def on_job_start(ctx: JobContext) -> None:
         structlog.contextvars.bind_contextvars(
+            queue=ctx.get("queue"),
             job_id=ctx["job_id"],
             job_try=ctx["job_try"],
             enqueue_time=ctx["enqueue_time"].isoformat(),
             score=ctx["score"],
         )
-        log.info("polar.worker.job_started")
+        # Time spent in the queue, including any deferral
+        log.info(
+            "polar.worker.job_started",
+            latency_seconds=(utc_now() - ctx["enqueue_time"]).total_seconds(),
+        )
 
     @staticmethod
     async def on_job_end(ctx: JobContext) -> None:
         log.info("polar.worker.job_ended")
         structlog.contextvars.unbind_contextvars(
-            "job_id", "job_try", "enqueue_time", "score"
+            "queue", "job_id", "job_try", "enqueue_time", "score"
         )
 
 
+def worker_settings(queue: QueueName) -> dict[str, Any]:
+    """
+    arq settings of the pool consuming `queue`. Only the default pool runs the
+    cron jobs.
+    """
+    return {
+        "functions": WorkerSettings.functions,
+        "cron_jobs": WorkerSettings.cron_jobs if queue == QueueName.default else [],
+        "redis_settings": WorkerSettings.redis_settings,
+        "queue_name": queue.value,
+        "max_jobs": QUEUE_MAX_JOBS[queue],
+        "ctx": {"queue": queue.name},
+        "on_startup": WorkerSettings.on_startup,
+        "on_shutdown": WorkerSettings.on_shutdown,
+        "on_job_start": WorkerSettings.on_job_start,
+        "on_job_end": WorkerSettings.on_job_end,
+    }
+
+
+async def run_worker_pools(queues: list[QueueName]) -> None:
+    """
+    Run the pools of the given queues in this process, each with its own
+    concurrency limit.
+
+    If a pool crashes, the others are closed and its error is raised, so that the
+    process exits rather than keeps running without that queue.
+    """
+    workers = [Worker(**worker_settings(q), handle_signals=False) for q in queues]
+
+    def handle_sig(signum: signal.Signals) -> None:
+        for w in workers:
+            w.handle_sig(signum)
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, handle_sig, signum)
+
+    runs = {asyncio.ensure_future(w.async_run()): q for w, q in zip(workers, queues)}
+    try:
+        # Stopped pools are cancelled, only a crash is an exception
+        done, _ = await asyncio.wait(runs, return_when=asyncio.FIRST_EXCEPTION)
+        for run in done:
+            exception = None if run.cancelled() else run.exception()
+            if exception is not None:
+                log.error(
+                    "worker.pool.failed", queue=runs[run].value, exc_info=exception
+                )
+                raise exception
+    finally:
+        for w in workers:
+            await w.close()
+        await asyncio.gather(*runs, return_exceptions=True)
+
+
 async def create_pool() -> ArqRedis:
     return await arq_create_pool(WorkerSettings.redis_settings)
 
 
-async def enqueue_job(name: str, *args: Any, **kwargs: Any) -> Job | None:
+def _polar_context() -> PolarWorkerContext:
     ctx = ExecutionContext.current()
-    kwargs["polar_context"] = PolarWorkerContext(
-        is_during_installation=ctx.is_during_installation,
+    return PolarWorkerContext(is_during_installation=ctx.is_during_installation)
+
+
+async def enqueue_job(name: str, *args: Any, **kwargs: Any) -> Job | None:
+    kwargs["polar_context"] = _polar_context()
+    redis = await create_pool()
+    return await redis.enqueue_job(
+        name,
+        *args,
+        _queue_name=TASK_QUEUES.get(name, QueueName.default).value,
+        **kwargs,
     )
+
+
+# Jobs enqueued concurrently by enqueue_jobs
+ENQUEUE_CONCURRENCY = 10
+
+JobArguments = tuple[Sequence[Any], dict[str, Any]]
+
+
+async def enqueue_jobs(name: str, jobs: Sequence[JobArguments]) -> list[Job | None]:
+    """
+    Enqueue many jobs of a task, given as (args, kwargs), on a single pool and
+    concurrently, rather than one pool and round trip after the other.
+    """
+    if not jobs:
+        return []
+
+    polar_context = _polar_context()
+    queue_name = TASK_QUEUES.get(name, QueueName.default).value
     redis = await create_pool()
-    return await redis.enqueue_job(name, *args, **kwargs)
+    semaphore = asyncio.Semaphore(ENQUEUE_CONCURRENCY)
+
+    async def enqueue(args: Sequence[Any], kwargs: dict[str, Any]) -> Job | None:
+        async with semaphore:
+            return await redis.enqueue_job(
+                name,
+                *args,
+                _queue_name=queue_name,
+                polar_context=polar_context,
+                **kwargs,
+            )
+
+    return await asyncio.gather(*[enqueue(args, kwargs) for args, kwargs in jobs])
 
 
 Params = ParamSpec("Params")
@@ -90,6 +238,7 @@ ReturnValue = TypeVar("ReturnValue")
 def task(
     name: str,
     *,
+    queue: QueueName = QueueName.default,
     keep_result: SecondsTimedelta | None = None,
     timeout: SecondsTimedelta | None = None,
     keep_result_forever: bool | None = None,
@@ -109,6 +258,7 @@ def task(
             max_tries=max_tries,
         )
         WorkerSettings.functions.append(new_task)
+        TASK_QUEUES[name] = queue
 
         @functools.wraps(f)
         async def wrapper(*args: Params.args, **kwargs: Params.kwargs) -> ReturnValue:
@@ -143,4 +293,32 @@ def interval(
     return decorator
 
 
-__all__ = ["WorkerSettings", "task", "create_pool", "enqueue_job", "JobContext"]
+@interval(second={0, 15, 30, 45})
+async def cron_queue_metrics(ctx: JobContext) -> None:
+    redis = ctx["redis"]
+    now_ms = utc_now().timestamp() * 1000
+    for queue in QueueName:
+        # Jobs are scored by the time they're due to run, in ms
+        due = await redis.zcount(queue.value, "-inf", now_ms)
+        oldest = await redis.zrange(queue.value, 0, 0, withscores=True)
+        lag_seconds = (
+            max(0.0, (now_ms - oldest[0][1]) / 1000) if due and oldest else 0.0
+        )
+        log.info(
+            "polar.worker.queue",
+            queue=queue.name,
+            depth=await redis.zcard(queue.value),
+            due=due,
+            lag_seconds=lag_seconds,
+        )
+
+
+__all__ = [
+    "WorkerSettings",
+    "QueueName",
+    "task",
+    "create_pool",
+    "enqueue_job",
+    "enqueue_jobs",
+    "JobContext",
+]
@@ -6,4 +6,13 @@ configure_sentry()
 
 from polar.receivers import *  # noqa
 from polar.tasks import *  # noqa
-from polar.worker import WorkerSettings  # noqa
+from polar.worker import QueueName, WorkerSettings, run_worker_pools  # noqa
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    # Runs the pools of the queues given by name, or all of them:
+    # python run_worker.py [default] [webhooks] [crawls] [notifications]
+    queues = [QueueName[name] for name in sys.argv[1:]] or list(QueueName)
+    asyncio.run(run_worker_pools(queues))
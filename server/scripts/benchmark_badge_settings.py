@@ -0,0 +1,223 @@
+import asyncio
+import secrets
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+import asyncpg
+import typer
+from httpx import AsyncClient
+
+from polar.app import app
+from polar.config import settings
+from polar.enums import Platforms
+from polar.kit import jwt
+from polar.models import (
+    Issue,
+    Organization,
+    PullRequest,
+    Repository,
+    User,
+    UserOrganization,
+)
+from scripts.db import assert_dev_or_testing
+from scripts.seed import copy
+
+cli = typer.Typer()
+
+###############################################################################
+# Helpers
+###############################################################################
+
+
+class Dataset:
+    """
+    An organization with an admin member and repositories full of open issues
+    and pull requests, the shape that used to explode into issues x pull requests
+    rows per repository.
+    """
+
+    def __init__(self, *, repositories: int, issues: int, pull_requests: int) -> None:
+        self.run = secrets.token_hex(4)
+        self.now = datetime.now(timezone.utc)
+        # External ids are unique int4
+        self.external_id = secrets.randbelow(1 << 29)
+
+        self.organization_id = uuid.uuid4()
+        self.organization_name = f"benchmark-{self.run}"
+        self.user_id = uuid.uuid4()
+        self.repository_ids = [uuid.uuid4() for _ in range(repositories)]
+        self.issues = issues
+        self.pull_requests = pull_requests
+
+    def organization_rows(self) -> Iterator[dict[str, Any]]:
+        yield dict(
+            id=self.organization_id,
+            platform=Platforms.github,
+            name=self.organization_name,
+            external_id=self.external_id,
+            avatar_url="https://avatars.githubusercontent.com/u/0",
+            is_personal=False,
+            installation_id=self.external_id,
+            installation_created_at=self.now,
+            onboarded_at=self.now,
+        )
+
+    def user_rows(self) -> Iterator[dict[str, Any]]:
+        yield dict(
+            id=self.user_id,
+            username=self.organization_name,
+            email=f"{self.organization_name}@example.com",
+            invite_only_approved=True,
+            accepted_terms_of_service=True,
+        )
+
+    def user_organization_rows(self) -> Iterator[dict[str, Any]]:
+        yield dict(
+            user_id=self.user_id,
+            organization_id=self.organization_id,
+            is_admin=True,
+        )
+
+    def repository_rows(self) -> Iterator[dict[str, Any]]:
+        for r, repository_id in enumerate(self.repository_ids):
+            yield dict(
+                id=repository_id,
+                platform=Platforms.github,
+                external_id=self.external_id + r,
+                organization_id=self.organization_id,
+                name=f"repo{r}",
+                open_issues=self.issues,
+                is_private=False,
+                is_archived=False,
+            )
+
+    def issue_rows(self) -> Iterator[dict[str, Any]]:
+        for r, repository_id in enumerate(self.repository_ids):
+            for i in range(self.issues):
+                embedded = i % 10 == 0
+                yield dict(
+                    id=uuid.uuid4(),
+                    organization_id=self.organization_id,
+                    repository_id=repository_id,
+                    platform=Platforms.github,
+                    external_id=self.external_id + (r + 1) * 1_000_000 + i,
+                    number=i + 1,
+                    title=f"Issue {i}",
+                    state=Issue.State.OPEN,
+                    issue_created_at=self.now,
+                    pledge_badge_embedded_at=self.now if embedded else None,
+                    has_pledge_badge_label=embedded and i % 20 == 0,
+                )
+
+    def pull_request_rows(self) -> Iterator[dict[str, Any]]:
+        for r, repository_id in enumerate(self.repository_ids):
+            for i in range(self.pull_requests):
+                yield dict(
+                    id=uuid.uuid4(),
+                    organization_id=self.organization_id,
+                    repository_id=repository_id,
+                    platform=Platforms.github,
+                    external_id=self.external_id + (r + 1) * 1_000_000 + 500_000 + i,
+                    number=self.issues + i + 1,
+                    title=f"Pull request {i}",
+                    state=PullRequest.State.OPEN,
+                    issue_created_at=self.now,
+                )
+
+
+async def load(dataset: Dataset) -> None:
+    dsn = str(settings.postgres_dsn).replace("+asyncpg", "")
+    connection = await asyncpg.connect(dsn)
+    try:
+        async with connection.transaction():
+            for table, rows in (
+                (Organization.__table__, dataset.organization_rows()),
+                (User.__table__, dataset.user_rows()),
+                (UserOrganization.__table__, dataset.user_organization_rows()),
+                (Repository.__table__, dataset.repository_rows()),
+                (Issue.__table__, dataset.issue_rows()),
+                (PullRequest.__table__, dataset.pull_request_rows()),
+            ):
+                await copy(connection, table, rows)  # type: ignore
+        await connection.execute("ANALYZE")
+    finally:
+        await connection.close()
+
+
+async def measure(dataset: Dataset, requests: int) -> list[float]:
+    auth_jwt = jwt.encode(
+        data={"user_id": str(dataset.user_id)},
+        secret=settings.SECRET,
+        expires_at=jwt.create_expiration_dt(seconds=settings.AUTH_COOKIE_TTL_SECONDS),
+    )
+
+    durations = []
+    async with AsyncClient(app=app, base_url="http://test", timeout=None) as client:
+        for _ in range(requests):
+            started_at = time.perf_counter()
+            response = await client.get(
+                f"/api/v1/github/{dataset.organization_name}/badge_settings",
+                cookies={settings.AUTH_COOKIE_KEY: auth_jwt},
+            )
+            durations.append(time.perf_counter() - started_at)
+            response.raise_for_status()
+    return sorted(durations)
+
+
+###############################################################################
+# Commands
+###############################################################################
+
+
+@cli.command()
+def run(
+    repositories: int = typer.Option(3, help="Repositories of the organization"),
+    issues: int = typer.Option(5_000, help="Open issues per repository"),
+    pull_requests: int = typer.Option(500, help="Open pull requests per repository"),
+    requests: int = typer.Option(50, help="Requests to the endpoint"),
+    budget: float = typer.Option(200, help="Latency budget of the p99, in ms"),
+) -> None:
+    """
+    Load an organization with large repositories into the local database, then
+    report the latency of its /badge_settings endpoint, in process, against the
+    budget. Exits with 1 if the p99 is over budget.
+
+    The rows are added next to the existing ones, the organization is named
+    `benchmark-<run>`.
+    """
+    assert_dev_or_testing()
+
+    dataset = Dataset(
+        repositories=repositories, issues=issues, pull_requests=pull_requests
+    )
+
+    async def main() -> list[float]:
+        await load(dataset)
+        return await measure(dataset, requests)
+
+    durations = asyncio.run(main())
+
+    def percentile(q: float) -> float:
+        # Nearest rank, in ms
+        index = max(0, min(len(durations) - 1, round(q * len(durations)) - 1))
+        return durations[index] * 1000
+
+    p99 = percentile(0.99)
+    typer.echo(
+        f"organization={dataset.organization_name} repositories={repositories} "
+        f"issues={issues} pull_requests={pull_requests} requests={requests}"
+    )
+    typer.echo(
+        f"p50: {percentile(0.5):.1f} ms  p99: {p99:.1f} ms  "
+        f"max: {durations[-1] * 1000:.1f} ms  budget: {budget:.0f} ms"
+    )
+    if p99 > budget:
+        typer.echo("Over budget")
+        raise typer.Exit(1)
+    typer.echo("Within budget")
+
+
+if __name__ == "__main__":
+    cli()
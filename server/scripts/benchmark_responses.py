@@ -0,0 +1,166 @@
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+import typer
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from polar.currency.schemas import CurrencyAmount
+from polar.dashboard.schemas import (
+    Entry,
+    IssueDashboardRead,
+    IssueListResponse,
+    IssueStatus,
+    PaginationResponse,
+    Relationship,
+    RelationshipData,
+)
+from polar.enums import Platforms
+from polar.funding.schemas import Funding
+from polar.kit.responses import FastJSONResponse
+from polar.models.issue import Issue
+
+cli = typer.Typer()
+
+###############################################################################
+# Helpers
+###############################################################################
+
+
+def dashboard_payload(issues: int) -> IssueListResponse:
+    """
+    A dashboard response shaped like the real one: every issue has a few pledges
+    and references, which are sent as included entries.
+    """
+    organization_id = uuid.uuid4()
+    repository_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+
+    data: list[Entry[IssueDashboardRead]] = []
+    included: list[Entry[Any]] = [
+        Entry(
+            id=repository_id,
+            type="repository",
+            attributes={"id": str(repository_id), "name": "polar", "stars": 1200},
+        )
+    ]
+    for number in range(issues):
+        issue_id = uuid.uuid4()
+        pledge_ids = [uuid.uuid4() for _ in range(3)]
+        data.append(
+            Entry(
+                id=issue_id,
+                type="issue",
+                attributes=IssueDashboardRead(
+                    id=issue_id,
+                    platform=Platforms.github,
+                    organization_id=organization_id,
+                    repository_id=repository_id,
+                    number=number,
+                    title=f"Issue number {number} with a reasonably long title",
+                    author={"login": "someone", "id": 1234, "avatar_url": "x" * 60},
+                    labels=[{"name": "bug", "color": "d73a4a"}] * 3,
+                    closed_by=None,
+                    reactions={"total_count": 12, "+1": 10, "heart": 2},
+                    state=Issue.State.OPEN,
+                    state_reason=None,
+                    issue_closed_at=None,
+                    issue_modified_at=now,
+                    issue_created_at=now - timedelta(days=number),
+                    comments=number % 20,
+                    progress=IssueStatus.backlog,
+                    funding=Funding(
+                        funding_goal=CurrencyAmount(currency="USD", amount=50000),
+                        pledges_sum=CurrencyAmount(currency="USD", amount=15000),
+                    ),
+                    pledge_badge_currently_embedded=True,
+                ),
+                relationships={
+                    "pledges": Relationship(
+                        data=[RelationshipData(type="pledge", id=i) for i in pledge_ids]
+                    ),
+                    "repository": Relationship(
+                        data=RelationshipData(type="repository", id=repository_id)
+                    ),
+                },
+            )
+        )
+        included += [
+            Entry(
+                id=i,
+                type="pledge",
+                attributes={
+                    "id": str(i),
+                    "amount": CurrencyAmount(currency="USD", amount=5000),
+                    "created_at": now,
+                    "pledger_name": "someone",
+                },
+            )
+            for i in pledge_ids
+        ]
+
+    return IssueListResponse(
+        # See polar.dashboard.endpoints, mypy doesn't bind the DataT of the subclass
+        data=data,  # type: ignore
+        included=included,
+        pagination=PaginationResponse(total_count=issues, page=1, next_page=None),
+    )
+
+
+async def measure(
+    render: Callable[[IssueListResponse], Awaitable[bytes]],
+    payload: IssueListResponse,
+    iterations: int,
+) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        await render(payload)
+    return (time.perf_counter() - started_at) / iterations
+
+
+###############################################################################
+# Commands
+###############################################################################
+
+
+@cli.command()
+def dashboard(
+    issues: int = typer.Option(100, help="Issues in the dashboard response"),
+    iterations: int = typer.Option(50, help="Renders to average over"),
+) -> None:
+    """
+    Compare the time spent serializing a dashboard response, through FastAPI's
+    default path (validation against the response model, jsonable_encoder and
+    json.dumps) versus FastJSONResponse.
+    """
+    payload = dashboard_payload(issues)
+    field = create_response_field(name="response", type_=IssueListResponse)
+
+    async def default(response: IssueListResponse) -> bytes:
+        content = await serialize_response(field=field, response_content=response)
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+
+    async def fast(response: IssueListResponse) -> bytes:
+        return FastJSONResponse(response).body
+
+    async def run() -> None:
+        before = await measure(default, payload, iterations)
+        after = await measure(fast, payload, iterations)
+
+        typer.echo(f"issues={issues} bytes={len(await fast(payload)):,}")
+        typer.echo(f"default:          {before * 1000:.2f} ms")
+        typer.echo(
+            f"FastJSONResponse: {after * 1000:.2f} ms ({before / after:.1f}x faster)"
+        )
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,89 @@
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+
+import typer
+
+from polar.integrations.github import client as github
+from polar.issue.schemas import IssueCreate
+
+cli = typer.Typer()
+
+CASSETTES = Path("tests/fixtures/cassettes/github/webhooks")
+
+###############################################################################
+# Helpers
+###############################################################################
+
+
+def load_issue_payloads(directory: Path) -> list[dict[str, Any]]:
+    payloads = []
+    for path in sorted(directory.glob("issues.*.json")):
+        payloads.append(json.loads(path.read_text())["body"])
+    return payloads
+
+
+def measure(
+    normalize: Callable[[dict[str, Any]], IssueCreate],
+    payloads: list[dict[str, Any]],
+    iterations: int,
+) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        for payload in payloads:
+            normalize(payload)
+    elapsed = time.perf_counter() - started_at
+    return iterations * len(payloads) / elapsed
+
+
+###############################################################################
+# Commands
+###############################################################################
+
+
+@cli.command()
+def issues(
+    iterations: int = typer.Option(200, help="Rounds over the recorded payloads"),
+    directory: Path = typer.Option(
+        CASSETTES, help="Directory of the recorded issues webhooks"
+    ),
+) -> None:
+    """
+    Compare the events/sec of normalizing issues webhooks into upsert rows,
+    through the parsed githubkit event versus straight from the payload.
+    """
+    payloads = load_issue_payloads(directory)
+    if not payloads:
+        typer.echo(f"No issues.*.json payloads in {directory}")
+        raise typer.Exit(1)
+
+    organization_id = uuid.uuid4()
+    repository_id = uuid.uuid4()
+
+    def parsed(payload: dict[str, Any]) -> IssueCreate:
+        event = github.webhooks.parse_obj("issues", payload)
+        return IssueCreate.from_github(
+            event.issue,  # type: ignore
+            organization_id=organization_id,
+            repository_id=repository_id,
+        )
+
+    def raw(payload: dict[str, Any]) -> IssueCreate:
+        return IssueCreate.from_github_payload(
+            payload["issue"],
+            organization_id=organization_id,
+            repository_id=repository_id,
+        )
+
+    before = measure(parsed, payloads, iterations)
+    after = measure(raw, payloads, iterations)
+
+    typer.echo(f"payloads={len(payloads)} iterations={iterations}")
+    typer.echo(f"parsed event: {before:,.0f} events/sec")
+    typer.echo(f"raw payload:  {after:,.0f} events/sec ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    cli()
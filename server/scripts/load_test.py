@@ -0,0 +1,208 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+from uuid import UUID
+
+import typer
+from httpx import AsyncClient
+
+from polar.app import app
+from polar.config import settings
+from polar.issue.cache import public_issues_cache
+from polar.kit import jwt
+from polar.kit.extensions.sqlalchemy import sql
+from polar.models import Issue, Organization, UserOrganization
+from polar.postgres import AsyncSessionLocal
+from scripts.db import assert_dev_or_testing
+
+cli = typer.Typer()
+
+###############################################################################
+# Helpers
+###############################################################################
+
+
+@dataclass
+class Target:
+    organization_id: UUID
+    organization_name: str
+    auth_jwt: str
+
+
+@dataclass
+class Timings:
+    durations: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def percentile(self, q: float) -> float:
+        # Nearest rank
+        durations = sorted(self.durations)
+        index = max(0, min(len(durations) - 1, round(q * len(durations)) - 1))
+        return durations[index]
+
+
+Scenario = Callable[[AsyncClient, Target], Awaitable[int]]
+
+
+async def list_targets(organizations: int) -> list[Target]:
+    """
+    The largest seeded organizations, see scripts/seed.py, with their admin.
+    """
+    async with AsyncSessionLocal() as session:
+        issues_count = (
+            sql.select(sql.func.count())
+            .where(Issue.organization_id == Organization.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            sql.select(Organization.id, Organization.name, UserOrganization.user_id)
+            .join(
+                UserOrganization,
+                UserOrganization.organization_id == Organization.id,
+            )
+            .where(
+                Organization.name.startswith("seed-"),
+                UserOrganization.is_admin.is_(True),
+            )
+            .order_by(issues_count.desc())
+            .limit(organizations)
+        )
+        res = await session.execute(stmt)
+        rows = res.all()
+
+    expires_at = jwt.create_expiration_dt(seconds=settings.AUTH_COOKIE_TTL_SECONDS)
+    return [
+        Target(
+            organization_id=organization_id,
+            organization_name=name,
+            auth_jwt=jwt.encode(
+                data={"user_id": str(user_id)},
+                secret=settings.SECRET,
+                expires_at=expires_at,
+            ),
+        )
+        for organization_id, name, user_id in rows
+    ]
+
+
+async def dashboard(client: AsyncClient, target: Target) -> int:
+    response = await client.get(
+        f"/api/v1/dashboard/github/{target.organization_name}",
+        cookies={settings.AUTH_COOKIE_KEY: target.auth_jwt},
+    )
+    return response.status_code
+
+
+async def dashboard_open_by_pledges(client: AsyncClient, target: Target) -> int:
+    response = await client.get(
+        f"/api/v1/dashboard/github/{target.organization_name}",
+        params={
+            "status": ["backlog", "triaged", "in_progress", "pull_request"],
+            "sort": "pledged_amount_desc",
+        },
+        cookies={settings.AUTH_COOKIE_KEY: target.auth_jwt},
+    )
+    return response.status_code
+
+
+async def public_issues(client: AsyncClient, target: Target) -> int:
+    # Measure the rendering, not the cache
+    await public_issues_cache.invalidate(target.organization_id)
+    response = await client.get(f"/api/v1/github/{target.organization_name}/public")
+    return response.status_code
+
+
+async def rewards(client: AsyncClient, target: Target) -> int:
+    response = await client.get(
+        "/api/v1/rewards/search",
+        params={"pledges_to_organization": str(target.organization_id)},
+        cookies={settings.AUTH_COOKIE_KEY: target.auth_jwt},
+    )
+    return response.status_code
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "dashboard": dashboard,
+    "dashboard_open_by_pledges": dashboard_open_by_pledges,
+    "public_issues": public_issues,
+    "rewards": rewards,
+}
+
+
+async def run_scenario(
+    scenario: Scenario, targets: list[Target], requests: int, concurrency: int
+) -> Timings:
+    timings = Timings()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncClient(app=app, base_url="http://test", timeout=None) as client:
+
+        async def request(target: Target) -> None:
+            async with semaphore:
+                started_at = time.perf_counter()
+                status_code = await scenario(client, target)
+                timings.durations.append(time.perf_counter() - started_at)
+                if status_code >= 400:
+                    timings.errors += 1
+
+        await asyncio.gather(
+            *[request(targets[i % len(targets)]) for i in range(requests)]
+        )
+
+    return timings
+
+
+###############################################################################
+# Commands
+###############################################################################
+
+
+@cli.command()
+def run(
+    scenarios: list[str] = typer.Option(
+        list(SCENARIOS), "--scenario", help="Scenarios to run, all by default"
+    ),
+    organizations: int = typer.Option(
+        10, help="Largest seeded organizations to target"
+    ),
+    requests: int = typer.Option(100, help="Requests per scenario"),
+    concurrency: int = typer.Option(10, help="Concurrent requests"),
+) -> None:
+    """
+    Run the scenarios against the app, in process, on the data loaded by
+    scripts/seed.py, and report the latency percentiles per endpoint.
+    """
+    assert_dev_or_testing()
+
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        typer.echo(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        raise typer.Exit(1)
+
+    async def main() -> None:
+        targets = await list_targets(organizations)
+        if not targets:
+            typer.echo("No seeded organizations, run scripts/seed.py first")
+            raise typer.Exit(1)
+
+        typer.echo(
+            f"{'scenario':<28}{'requests':>10}{'errors':>8}"
+            f"{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        )
+        for name in scenarios:
+            timings = await run_scenario(
+                SCENARIOS[name], targets, requests, concurrency
+            )
+            typer.echo(
+                f"{name:<28}{len(timings.durations):>10}{timings.errors:>8}"
+                f"{timings.percentile(0.5) * 1000:>10.1f}"
+                f"{timings.percentile(0.99) * 1000:>10.1f}"
+                f"{max(timings.durations) * 1000:>10.1f}"
+            )
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    cli()
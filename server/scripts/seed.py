@@ -0,0 +1,401 @@
+import asyncio
+import enum
+import json
+import random
+import secrets
+import time
+import uuid
+from array import array
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, chain
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+import asyncpg
+import typer
+from sqlalchemy import Table
+
+from polar.config import settings
+from polar.enums import Platforms
+from polar.models import (
+    Issue,
+    IssueDependency,
+    IssueReference,
+    Organization,
+    Pledge,
+    Repository,
+    User,
+    UserOrganization,
+)
+from polar.models.issue_reference import ReferenceType
+from polar.pledge.schemas import PledgeState
+from scripts.db import assert_dev_or_testing
+
+cli = typer.Typer()
+
+# Rows encoded and sent to COPY at a time
+CHUNK_SIZE = 10_000
+
+# Skew of the organization and repository sizes: a few are very large, most are
+# small, as on GitHub.
+ZIPF_EXPONENT = 1.1
+
+###############################################################################
+# Helpers
+###############################################################################
+
+
+class Ids:
+    """
+    Ids of the seeded rows, derived from their index so that rows can refer to
+    each other without keeping the ids in memory.
+    """
+
+    def __init__(self, run: int) -> None:
+        self.run = run
+
+    def __call__(self, kind: int, index: int) -> uuid.UUID:
+        return uuid.UUID(int=(self.run << 64) | (kind << 40) | index)
+
+
+ORGANIZATION, REPOSITORY, USER, ISSUE, PLEDGE = range(5)
+
+
+class WeightedPicker:
+    def __init__(self, rng: random.Random, count: int) -> None:
+        self.rng = rng
+        self.cumulative = list(
+            accumulate(1 / (i + 1) ** ZIPF_EXPONENT for i in range(count))
+        )
+
+    def __call__(self) -> int:
+        return bisect(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+
+def column_defaults(table: Table) -> dict[str, Any]:
+    """
+    Python-side defaults of the columns, which COPY doesn't apply.
+    """
+    defaults: dict[str, Any] = {}
+    for column in table.columns:
+        default = column.default
+        if column.computed is not None or default is None:
+            continue
+        if default.is_scalar:
+            defaults[column.name] = default.arg  # type: ignore
+        elif default.is_callable:
+            defaults[column.name] = default.arg(None)  # type: ignore
+    return defaults
+
+
+def encode(value: Any) -> str:
+    # COPY text format
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, enum.Enum):
+        value = value.value
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+async def copy(
+    connection: asyncpg.Connection, table: Table, rows: Iterable[dict[str, Any]]
+) -> int:
+    """
+    Stream the rows into the table with COPY, completed with the columns defaults.
+    """
+    defaults = column_defaults(table)
+    iterator = iter(rows)
+    first = next(iterator, None)
+    if first is None:
+        return 0
+
+    columns = list({**defaults, **first}.keys())
+    count = 0
+
+    async def chunks() -> AsyncIterator[bytes]:
+        nonlocal count
+        lines: list[str] = []
+        for row in chain([first], iterator):
+            values = {**defaults, **row}
+            lines.append("\t".join(encode(values[c]) for c in columns))
+            if len(lines) >= CHUNK_SIZE:
+                count += len(lines)
+                yield ("\n".join(lines) + "\n").encode()
+                lines = []
+        if lines:
+            count += len(lines)
+            yield ("\n".join(lines) + "\n").encode()
+
+    started_at = time.perf_counter()
+    await connection.copy_to_table(
+        table.name, source=chunks(), columns=columns, format="text"
+    )
+    typer.echo(
+        f"{table.name}: {count:,} rows in {time.perf_counter() - started_at:.1f}s"
+    )
+    return count
+
+
+class Generator:
+    """
+    Rows of a realistic dataset: organizations and repositories of skewed sizes,
+    each organization with an admin member, and issues with pledges, references
+    and dependencies.
+    """
+
+    def __init__(
+        self,
+        *,
+        seed: int,
+        organizations: int,
+        repositories: int,
+        users: int,
+        issues: int,
+        pledges: int,
+        references: int,
+        dependencies: int,
+    ) -> None:
+        self.rng = random.Random(seed)
+        self.run = secrets.token_hex(4)
+        self.ids = Ids(int(self.run, 16))
+        self.now = datetime.now(timezone.utc)
+        # External ids are unique int4, the ranges of each kind don't overlap
+        self.external_id = self.rng.randrange(1 << 29)
+
+        self.organizations = organizations
+        self.repositories = max(repositories, organizations)
+        self.users = max(users, organizations)
+        self.issues = issues
+        self.pledges = pledges
+        self.references = references
+        self.dependencies = dependencies
+
+        # Every organization has a repository, the others are spread with a skew
+        pick_organization = WeightedPicker(self.rng, organizations)
+        self.repository_organization = array(
+            "I",
+            (
+                r if r < organizations else pick_organization()
+                for r in range(self.repositories)
+            ),
+        )
+
+        pick_repository = WeightedPicker(self.rng, self.repositories)
+        self.issue_repository = array("I", (pick_repository() for _ in range(issues)))
+
+        # Pledged issues, and their sums
+        self.pledge_issue = array(
+            "I", (self.rng.randrange(issues) for _ in range(pledges if issues else 0))
+        )
+        self.pledge_amount = array(
+            "I",
+            (self.rng.choice((2000, 5000, 10000, 25000)) for _ in self.pledge_issue),
+        )
+        self.pledged_amount_sum: dict[int, int] = {}
+        for i, amount in zip(self.pledge_issue, self.pledge_amount):
+            self.pledged_amount_sum[i] = self.pledged_amount_sum.get(i, 0) + amount
+
+    def name(self, prefix: str, index: int) -> str:
+        return f"seed-{self.run}-{prefix}{index}"
+
+    def organization_rows(self) -> Iterator[dict[str, Any]]:
+        for o in range(self.organizations):
+            yield dict(
+                id=self.ids(ORGANIZATION, o),
+                platform=Platforms.github,
+                name=self.name("org", o),
+                external_id=self.external_id + o,
+                avatar_url="https://avatars.githubusercontent.com/u/0",
+                is_personal=False,
+                installation_id=self.external_id + o,
+                installation_created_at=self.now,
+                onboarded_at=self.now,
+            )
+
+    def user_rows(self) -> Iterator[dict[str, Any]]:
+        for u in range(self.users):
+            yield dict(
+                id=self.ids(USER, u),
+                username=self.name("user", u),
+                email=f"{self.name('user', u)}@example.com",
+                invite_only_approved=True,
+                accepted_terms_of_service=True,
+            )
+
+    def user_organization_rows(self) -> Iterator[dict[str, Any]]:
+        # User o is the admin of organization o
+        for o in range(self.organizations):
+            yield dict(
+                user_id=self.ids(USER, o),
+                organization_id=self.ids(ORGANIZATION, o),
+                is_admin=True,
+            )
+
+    def repository_rows(self) -> Iterator[dict[str, Any]]:
+        for r, o in enumerate(self.repository_organization):
+            yield dict(
+                id=self.ids(REPOSITORY, r),
+                platform=Platforms.github,
+                external_id=self.external_id + 50_000_000 + r,
+                organization_id=self.ids(ORGANIZATION, o),
+                name=f"repo{r}",
+                stars=self.rng.randrange(10_000),
+                is_private=self.rng.random() < 0.2,
+                is_archived=False,
+            )
+
+    def issue_rows(self) -> Iterator[dict[str, Any]]:
+        numbers = array("I", bytes(4 * self.repositories))
+        for i, r in enumerate(self.issue_repository):
+            numbers[r] += 1
+            created_at = self.now - timedelta(days=self.rng.random() * 730)
+            modified_at = created_at + (self.now - created_at) * self.rng.random()
+            closed = self.rng.random() < 0.3
+            reactions = self.rng.randrange(50) if self.rng.random() < 0.2 else 0
+            yield dict(
+                id=self.ids(ISSUE, i),
+                organization_id=self.ids(ORGANIZATION, self.repository_organization[r]),
+                repository_id=self.ids(REPOSITORY, r),
+                platform=Platforms.github,
+                external_id=self.external_id + 100_000_000 + i,
+                number=numbers[r],
+                title=f"Issue {i}: something is broken in module {i % 97}",
+                body="Steps to reproduce\n\n1. Run it\n2. It breaks",
+                state=Issue.State.CLOSED if closed else Issue.State.OPEN,
+                issue_created_at=created_at,
+                issue_modified_at=modified_at,
+                issue_closed_at=modified_at if closed else None,
+                comments=self.rng.randrange(30),
+                reactions={"total_count": reactions, "plus_one": reactions},
+                positive_reactions_count=reactions,
+                total_engagement_count=reactions,
+                pledged_amount_sum=self.pledged_amount_sum.get(i, 0),
+                pledge_badge_currently_embedded=self.rng.random() < 0.1,
+                github_issue_fetched_at=modified_at,
+                github_timeline_fetched_at=modified_at,
+            )
+
+    def pledge_rows(self) -> Iterator[dict[str, Any]]:
+        for p, (i, amount) in enumerate(zip(self.pledge_issue, self.pledge_amount)):
+            r = self.issue_repository[i]
+            yield dict(
+                id=self.ids(PLEDGE, p),
+                issue_id=self.ids(ISSUE, i),
+                repository_id=self.ids(REPOSITORY, r),
+                organization_id=self.ids(ORGANIZATION, self.repository_organization[r]),
+                amount=amount,
+                fee=0,
+                state=self.rng.choice(
+                    (PledgeState.created, PledgeState.created, PledgeState.pending)
+                ),
+                by_user_id=self.ids(USER, self.rng.randrange(self.users)),
+            )
+
+    def issue_reference_rows(self) -> Iterator[dict[str, Any]]:
+        for _ in range(self.references if self.issues else 0):
+            i = self.rng.randrange(self.issues)
+            r = self.issue_repository[i]
+            commit_id = f"{self.rng.getrandbits(160):040x}"
+            yield dict(
+                issue_id=self.ids(ISSUE, i),
+                reference_type=ReferenceType.EXTERNAL_GITHUB_COMMIT,
+                external_id=commit_id,
+                external_source=dict(
+                    organization_name=self.name("org", self.repository_organization[r]),
+                    repository_name=f"repo{r}",
+                    user_login="someone",
+                    user_avatar="https://avatars.githubusercontent.com/u/0",
+                    commit_id=commit_id,
+                ),
+            )
+
+    def issue_dependency_rows(self) -> Iterator[dict[str, Any]]:
+        seen: set[tuple[int, int]] = set()
+        for _ in range(self.dependencies if self.issues > 1 else 0):
+            dependent, dependency = self.rng.sample(range(self.issues), 2)
+            if (dependent, dependency) in seen:
+                continue
+            seen.add((dependent, dependency))
+            r = self.issue_repository[dependent]
+            yield dict(
+                organization_id=self.ids(ORGANIZATION, self.repository_organization[r]),
+                repository_id=self.ids(REPOSITORY, r),
+                dependent_issue_id=self.ids(ISSUE, dependent),
+                dependency_issue_id=self.ids(ISSUE, dependency),
+            )
+
+
+###############################################################################
+# Commands
+###############################################################################
+
+
+@cli.command()
+def load(
+    organizations: int = typer.Option(10_000),
+    repositories: int = typer.Option(30_000),
+    users: int = typer.Option(20_000),
+    issues: int = typer.Option(1_000_000),
+    pledges: int = typer.Option(200_000),
+    references: int = typer.Option(300_000),
+    dependencies: int = typer.Option(50_000),
+    seed: int = typer.Option(0, help="Seed of the random generator"),
+) -> None:
+    """
+    Bulk-load a generated dataset into the local database, with COPY.
+
+    Rows are added next to the existing ones, their names are prefixed with
+    `seed-<run>-`.
+    """
+    assert_dev_or_testing()
+
+    generator = Generator(
+        seed=seed,
+        organizations=organizations,
+        repositories=repositories,
+        users=users,
+        issues=issues,
+        pledges=pledges,
+        references=references,
+        dependencies=dependencies,
+    )
+
+    async def run() -> None:
+        dsn = str(settings.postgres_dsn).replace("+asyncpg", "")
+        connection = await asyncpg.connect(dsn)
+        try:
+            async with connection.transaction():
+                for table, rows in (
+                    (Organization.__table__, generator.organization_rows()),
+                    (User.__table__, generator.user_rows()),
+                    (UserOrganization.__table__, generator.user_organization_rows()),
+                    (Repository.__table__, generator.repository_rows()),
+                    (Issue.__table__, generator.issue_rows()),
+                    (Pledge.__table__, generator.pledge_rows()),
+                    (IssueReference.__table__, generator.issue_reference_rows()),
+                    (IssueDependency.__table__, generator.issue_dependency_rows()),
+                ):
+                    await copy(connection, table, rows)  # type: ignore
+            await connection.execute("ANALYZE")
+        finally:
+            await connection.close()
+
+        typer.echo(f"Loaded run seed-{generator.run}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    cli()
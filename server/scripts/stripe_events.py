@@ -0,0 +1,99 @@
+import asyncio
+import json
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Optional
+
+import stripe
+import typer
+
+from polar.config import settings
+from polar.integrations.stripe.webhook_events import HANDLERS, stripe_webhook_events
+from polar.postgres import AsyncSessionLocal
+
+cli = typer.Typer()
+
+stripe.api_key = settings.STRIPE_SECRET_KEY
+
+###############################################################################
+# Helpers
+###############################################################################
+
+
+def typer_async(f):  # type: ignore
+    # From https://github.com/tiangolo/typer/issues/85
+    @wraps(f)
+    def wrapper(*args, **kwargs):  # type: ignore
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+def list_events(since: datetime, until: datetime) -> list[stripe.Event]:
+    events = stripe.Event.list(
+        created={"gte": int(since.timestamp()), "lte": int(until.timestamp())},
+        types=list(HANDLERS.keys()),
+        limit=100,
+    )
+    return list(events.auto_paging_iter())
+
+
+def load_fixture(path: Path, since: datetime, until: datetime) -> list[stripe.Event]:
+    """
+    Load events from a JSON file, either a list of events or a Stripe list object
+    (e.g. the output of `stripe events list`).
+    """
+    data = json.loads(path.read_text())
+    if isinstance(data, dict):
+        data = data["data"]
+
+    events = [stripe.Event.construct_from(e, stripe.api_key) for e in data]
+    return [
+        e
+        for e in events
+        if int(since.timestamp()) <= e["created"] <= int(until.timestamp())
+    ]
+
+
+###############################################################################
+# Commands
+###############################################################################
+
+
+@cli.command()
+@typer_async
+async def replay(
+    since: datetime = typer.Option(..., help="Replay events created after this"),
+    until: Optional[datetime] = typer.Option(
+        None, help="Replay events created before this, defaults to now"
+    ),
+    fixture: Optional[Path] = typer.Option(
+        None, help="Read events from this JSON file instead of the Stripe API"
+    ),
+    dry_run: bool = typer.Option(False, help="Only report what would be replayed"),
+) -> None:
+    """
+    Re-drive Stripe webhook events of a time range. Events already processed are
+    skipped, so it's safe to replay a range more than once.
+    """
+    until = until or datetime.now()
+    if fixture:
+        events = load_fixture(fixture, since, until)
+    else:
+        events = list_events(since, until)
+
+    # Stripe lists the most recent events first, apply them in order
+    events.sort(key=lambda e: e["created"])
+
+    async with AsyncSessionLocal() as session:
+        result = await stripe_webhook_events.replay(session, events, dry_run=dry_run)
+
+    typer.echo(
+        f"processed={result.processed} skipped={result.skipped} "
+        f"unsupported={result.unsupported}"
+    )
+
+
+if __name__ == "__main__":
+    cli()
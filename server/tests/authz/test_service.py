@@ -0,0 +1,112 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.authz.service import AccessType, Anonymous, Authz, Object
+from polar.models.issue import Issue
+from polar.models.issue_reward import IssueReward
+from polar.models.organization import Organization
+from polar.models.repository import Repository
+from polar.models.user import User
+from polar.models.user_organization import UserOrganization
+from polar.postgres import AsyncSession
+from polar.user_organization.service import (
+    user_organization as user_organization_service,
+)
+
+
+@pytest.mark.asyncio
+async def test_filter_readable_repositories_anonymous(
+    session: AsyncSession,
+    repository: Repository,
+    public_repository: Repository,
+) -> None:
+    authz = Authz(session)
+
+    readable = await authz.filter_readable_repositories(
+        Anonymous(), [repository, public_repository]
+    )
+    assert [r.id for r in readable] == [public_repository.id]
+
+
+@pytest.mark.asyncio
+async def test_filter_readable_repositories_not_member(
+    session: AsyncSession,
+    user: User,
+    repository: Repository,
+    public_repository: Repository,
+) -> None:
+    authz = Authz(session)
+
+    readable = await authz.filter_readable_repositories(
+        user, [repository, public_repository]
+    )
+    assert [r.id for r in readable] == [public_repository.id]
+
+    assert await authz.can(user, AccessType.read, repository) is False
+
+
+@pytest.mark.asyncio
+async def test_filter_readable_repositories_member(
+    session: AsyncSession,
+    user: User,
+    repository: Repository,
+    public_repository: Repository,
+    user_organization: UserOrganization,
+) -> None:
+    authz = Authz(session)
+
+    readable = await authz.filter_readable_repositories(
+        user, [repository, public_repository]
+    )
+    assert {r.id for r in readable} == {repository.id, public_repository.id}
+
+    assert await authz.can(user, AccessType.read, repository) is True
+    # Not an admin
+    assert await authz.can(user, AccessType.write, repository) is False
+
+
+@pytest.mark.asyncio
+async def test_filter_readable_loads_memberships_once(
+    session: AsyncSession,
+    mocker: MockerFixture,
+    user: User,
+    repository: Repository,
+    public_repository: Repository,
+    issue: Issue,
+    user_organization: UserOrganization,
+) -> None:
+    reward = await IssueReward.create(
+        session, issue_id=issue.id, share_thousands=100, user_id=user.id
+    )
+    list_by_user_id = mocker.spy(user_organization_service, "list_by_user_id")
+    authz = Authz(session)
+
+    objects: list[Object] = [repository, reward, public_repository]
+    readable = await authz.filter_readable(user, objects)
+    assert readable == objects
+
+    assert await authz.can(user, AccessType.read, repository) is True
+    assert await authz.can(user, AccessType.write, repository) is False
+    list_by_user_id.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_filter_readable_issue_rewards(
+    session: AsyncSession,
+    user: User,
+    organization: Organization,
+    issue: Issue,
+    user_organization: UserOrganization,
+) -> None:
+    reward = await IssueReward.create(
+        session, issue_id=issue.id, share_thousands=100, github_username="someone"
+    )
+
+    # A member, but not an admin of the organization of the issue
+    assert await Authz(session).filter_readable(user, [reward]) == []
+
+    user_organization.is_admin = True
+    session.add(user_organization)
+    await session.commit()
+
+    assert await Authz(session).filter_readable(user, [reward]) == [reward]
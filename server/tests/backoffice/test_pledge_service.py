@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import pytest
+
+from polar.backoffice.pledge_service import bo_pledges_service
+from polar.kit.utils import utc_now
+from polar.models.issue import Issue
+from polar.models.organization import Organization
+from polar.models.pledge import Pledge
+from polar.models.repository import Repository
+from polar.pledge.schemas import PledgeState
+from polar.postgres import AsyncSession
+
+
+@pytest.mark.asyncio
+async def test_list_pledges_and_totals(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    issue: Issue,
+    pledging_organization: Organization,
+) -> None:
+    now = utc_now()
+    states = [
+        PledgeState.initiated,
+        PledgeState.created,
+        PledgeState.created,
+        PledgeState.pending,
+        PledgeState.refunded,
+    ]
+
+    pledges: list[Pledge] = []
+    for i, state in enumerate(states):
+        pledges.append(
+            await Pledge.create(
+                session=session,
+                by_organization_id=pledging_organization.id,
+                issue_id=issue.id,
+                repository_id=repository.id,
+                organization_id=organization.id,
+                amount=1000 * (i + 1),
+                fee=0,
+                state=state,
+                created_at=now - timedelta(days=10 - i),
+            )
+        )
+    await session.commit()
+
+    created_after = now - timedelta(days=11)
+
+    # Most recent first, without initiated pledges, in pages of 2
+    first_page = await bo_pledges_service.list_pledges(
+        session, created_after=created_after, limit=2
+    )
+    assert [p.id for p in first_page] == [pledges[4].id, pledges[3].id]
+
+    last = first_page[-1]
+    second_page = await bo_pledges_service.list_pledges(
+        session,
+        created_after=created_after,
+        before=(last.created_at, last.id),
+        limit=2,
+    )
+    assert [p.id for p in second_page] == [pledges[2].id, pledges[1].id]
+
+    filtered = await bo_pledges_service.list_pledges(
+        session, states=[PledgeState.created], created_after=created_after
+    )
+    assert {p.id for p in filtered} == {pledges[1].id, pledges[2].id}
+
+    totals = await bo_pledges_service.get_totals(session, created_after=created_after)
+    by_state = {t.state: (t.count, t.amount) for t in totals.by_state}
+    assert by_state == {
+        PledgeState.created: (2, 2000 + 3000),
+        PledgeState.pending: (1, 4000),
+        PledgeState.refunded: (1, 5000),
+    }
+
+    [by_organization] = [
+        t for t in totals.by_organization if t.organization_id == organization.id
+    ]
+    assert by_organization.count == 4
+    assert by_organization.amount == 14000
@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from polar.extension.service import extension_telemetry
+from polar.models.user import User
+from polar.postgres import AsyncSession
+
+
+@pytest.mark.asyncio
+async def test_flush(session: AsyncSession, user: User, user_second: User) -> None:
+    seen_at = datetime(2023, 8, 1, 12, 0, tzinfo=timezone.utc)
+
+    await extension_telemetry.record(user.id, seen_at, "0.1.0")
+    await extension_telemetry.record(user.id, seen_at, "0.2.0")
+    # Keeps the last known version
+    await extension_telemetry.record(user.id, seen_at)
+    await extension_telemetry.record(user_second.id, seen_at)
+
+    assert await extension_telemetry.flush(session) == 2
+
+    await session.refresh(user)
+    assert user.last_seen_at_extension == seen_at
+    assert user.last_version_extension == "0.2.0"
+
+    await session.refresh(user_second)
+    assert user_second.last_seen_at_extension == seen_at
+    assert user_second.last_version_extension is None
+
+    # Buffer is empty after a flush
+    assert await extension_telemetry.flush(session) == 0
@@ -0,0 +1,37 @@
+import json
+from typing import Any, Iterator
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select, text
+
+from polar.postgres import AsyncSession
+
+Plan = dict[str, Any]
+
+
+async def explain(session: AsyncSession, statement: Select[Any]) -> Plan:
+    """
+    Plan of the statement, with the default planner settings: on enough
+    analyzed data, the indexes in the plan are the ones the planner prefers.
+    """
+    # Parameters are rendered inline: text() would take the casts of expanded IN
+    # parameters, e.g. `:id_1_1::UUID`, for parameters of their own.
+    compiled = statement.compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True},
+    )
+    res = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    result = res.scalar_one()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+def iter_nodes(plan: Plan) -> Iterator[Plan]:
+    yield plan
+    for subplan in plan.get("Plans", []):
+        yield from iter_nodes(subplan)
+
+
+def index_names(plan: Plan) -> set[str]:
+    return {node["Index Name"] for node in iter_nodes(plan) if "Index Name" in node}
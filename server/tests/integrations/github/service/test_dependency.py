@@ -0,0 +1,133 @@
+import asyncio
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+from githubkit import Response
+from githubkit.exception import RequestFailed
+
+from polar.integrations.github.schemas import GitHubIssue
+from polar.integrations.github.service.dependency import github_dependency
+from polar.models.issue import Issue
+from polar.models.organization import Organization
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from tests.fixtures.random_objects import create_organization
+
+
+def request_failed(status_code: int) -> RequestFailed:
+    request = httpx.Request("GET", "https://api.github.com")
+    return RequestFailed(
+        Response(httpx.Response(status_code, request=request), Any)  # type: ignore
+    )
+
+
+def reference(owner: str, repo: str, number: int) -> GitHubIssue:
+    return GitHubIssue(raw="", owner=owner, repo=repo, number=number)
+
+
+@pytest.mark.asyncio
+async def test_resolve_external_issues_known(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    issue: Issue,
+) -> None:
+    # Names are matched lowercased
+    organization.name = organization.name.lower()
+    repository.name = repository.name.lower()
+    await session.commit()
+
+    client = MagicMock()
+    client.rest.repos.async_get = AsyncMock()
+    client.rest.issues.async_get = AsyncMock()
+
+    resolved = await github_dependency.resolve_external_issues(
+        session,
+        client=client,
+        dependencies=[
+            reference(organization.name, repository.name, issue.number),
+            # Same issue, referenced twice
+            reference(organization.name.upper(), repository.name, issue.number),
+        ],
+    )
+
+    assert [i.id for i in resolved] == [issue.id]
+    client.rest.repos.async_get.assert_not_awaited()
+    client.rest.issues.async_get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_resolve_external_issues_not_found(session: AsyncSession) -> None:
+    client = MagicMock()
+    client.rest.repos.async_get = AsyncMock(side_effect=request_failed(404))
+
+    resolved = await github_dependency.resolve_external_issues(
+        session,
+        client=client,
+        dependencies=[reference("unknown", "unknown", 1)],
+    )
+
+    assert resolved == []
+    client.rest.repos.async_get.assert_awaited_once_with("unknown", "unknown")
+
+
+@pytest.mark.asyncio
+async def test_resolve_external_issues_keeps_transferred_repository(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    issue: Issue,
+) -> None:
+    new_owner = await create_organization(session)
+
+    github_repo = MagicMock()
+    github_repo.id = repository.external_id
+    github_repo.name = repository.name
+    github_repo.owner.id = new_owner.external_id
+    client = MagicMock()
+    client.rest.repos.async_get = AsyncMock(
+        return_value=MagicMock(parsed_data=github_repo)
+    )
+
+    resolved = await github_dependency.resolve_external_issues(
+        session,
+        client=client,
+        dependencies=[reference(new_owner.name, repository.name, issue.number)],
+    )
+    await session.commit()
+
+    assert [i.id for i in resolved] == [issue.id]
+    await session.refresh(repository)
+    assert repository.organization_id == organization.id
+
+
+@pytest.mark.asyncio
+async def test_resolve_external_issues_cancels_pending_requests(
+    session: AsyncSession,
+) -> None:
+    cancelled = asyncio.Event()
+
+    async def pending(*args: Any) -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def failing(*args: Any) -> None:
+        await asyncio.sleep(0)
+        raise request_failed(500)
+
+    client = MagicMock()
+    client.rest.repos.async_get = MagicMock(side_effect=[pending(), failing()])
+
+    with pytest.raises(RequestFailed):
+        await github_dependency.resolve_external_issues(
+            session,
+            client=client,
+            dependencies=[reference("unknown", repo, 1) for repo in ("a", "b")],
+        )
+
+    assert cancelled.is_set()
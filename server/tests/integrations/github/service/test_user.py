@@ -0,0 +1,88 @@
+import secrets
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.integrations.github import client as github
+from polar.integrations.github.service.user import github_user as github_user_service
+from polar.models.user import User
+
+
+@pytest.mark.asyncio
+async def test_is_installation_admin_is_cached(
+    user: User,
+    mocker: MockerFixture,
+) -> None:
+    membership = MagicMock()
+    membership.parsed_data.role = "admin"
+    membership.parsed_data.state = "active"
+
+    client = MagicMock()
+    client.rest.orgs.async_get_membership_for_user = AsyncMock(return_value=membership)
+    mocker.patch(
+        "polar.integrations.github.client.get_app_installation_client",
+        return_value=client,
+    )
+
+    account = MagicMock(spec=github.rest.SimpleUser)
+    account.login = "polarsource"
+    github_user = MagicMock(spec=github.rest.PrivateUser)
+    github_user.login = user.username
+
+    installation_id = secrets.randbelow(100000)
+    for _ in range(2):
+        assert (
+            await github_user_service._is_installation_admin(
+                user=user,
+                github_user=github_user,
+                installation_id=installation_id,
+                account=account,
+            )
+            is True
+        )
+
+    client.rest.orgs.async_get_membership_for_user.assert_awaited_once_with(
+        "polarsource", user.username
+    )
+
+
+@pytest.mark.asyncio
+async def test_is_installation_admin_negative_is_not_cached(
+    user: User,
+    mocker: MockerFixture,
+) -> None:
+    member = MagicMock()
+    member.parsed_data.role = "member"
+    member.parsed_data.state = "active"
+    admin = MagicMock()
+    admin.parsed_data.role = "admin"
+    admin.parsed_data.state = "active"
+
+    client = MagicMock()
+    client.rest.orgs.async_get_membership_for_user = AsyncMock(
+        side_effect=[member, admin]
+    )
+    mocker.patch(
+        "polar.integrations.github.client.get_app_installation_client",
+        return_value=client,
+    )
+
+    account = MagicMock(spec=github.rest.SimpleUser)
+    account.login = "polarsource"
+    github_user = MagicMock(spec=github.rest.PrivateUser)
+    github_user.login = user.username
+
+    installation_id = secrets.randbelow(100000)
+    # Promoted between the two logins
+    results = [
+        await github_user_service._is_installation_admin(
+            user=user,
+            github_user=github_user,
+            installation_id=installation_id,
+            account=account,
+        )
+        for _ in range(2)
+    ]
+
+    assert results == [False, True]
@@ -42,6 +42,8 @@ async def test_installation_no_notifications(
     """
 
     async def in_process_enqueue_job(pool, name, *args, **kwargs) -> None:  # type: ignore  # noqa: E501
+        # Job options, like _job_id, are for arq
+        kwargs = {k: v for k, v in kwargs.items() if not k.startswith("_")}
         if name == "github.repo.sync.issues":
             return await tasks.repo.sync_repository_issues(
                 kwargs["polar_context"], *args, **kwargs
@@ -2,6 +2,7 @@ from unittest.mock import patch
 
 import pytest
 from pytest_mock import MockerFixture
+from sqlalchemy.exc import InvalidRequestError
 
 from polar.config import settings
 from polar.integrations.github.badge import GithubBadge
@@ -10,7 +11,7 @@ from polar.kit.utils import utc_now
 from polar.models.issue import Issue
 from polar.models.organization import Organization
 from polar.models.repository import Repository
-from polar.postgres import AsyncSession
+from polar.postgres import AsyncSession, AsyncSessionLocal
 from tests.fixtures.random_objects import create_issue
 
 BADGED_BODY = """Hello my issue
@@ -384,3 +385,38 @@ async def test_list_issues_to_remove_badge_from_auto(
     )
 
     assert issues == [i1, i2, i4]
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+async def test_stream_badge_candidates(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+) -> None:
+    i1 = await create_issue(session, organization, repository)
+    i2 = await create_issue(session, organization, repository)
+    i3 = await create_issue(session, organization, repository)
+
+    repository.pledge_badge_auto_embed = True
+    organization.onboarded_at = utc_now()
+    await organization.save(session)
+
+    statement = github_issue.badge_add_candidates_statement(
+        organization, repository, after=(i1.created_at, i1.id)
+    )
+    assert statement is not None
+
+    async with AsyncSessionLocal() as read_session:
+        chunks = [
+            chunk
+            async for chunk in github_issue.stream_badge_candidates(
+                read_session, statement, chunk_size=1
+            )
+        ]
+
+        assert [[i.id for i in chunk] for chunk in chunks] == [[i2.id], [i3.id]]
+
+        # Only the columns needed by the badge are loaded
+        with pytest.raises(InvalidRequestError):
+            chunks[0][0].title
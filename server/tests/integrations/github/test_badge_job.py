@@ -0,0 +1,152 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from githubkit.exception import RequestFailed
+from pytest_mock import MockerFixture
+
+from polar.integrations.github.badge import GithubBadge
+from polar.integrations.github.badge_job import (
+    LOCKED_RETRY_DELAY,
+    RATE_LIMITED_RETRY_DELAY,
+    BadgeAction,
+    BadgeJobProgress,
+    repository_badge_job,
+)
+from polar.kit.utils import utc_now
+from polar.models.issue import Issue
+from polar.models.organization import Organization
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from polar.redis import redis
+from tests.fixtures.random_objects import create_issue
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+@patch("polar.integrations.github.badge_job.CHUNK_SIZE", 2)
+async def test_embed_in_chunks(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    mocker: MockerFixture,
+) -> None:
+    repository.pledge_badge_auto_embed = True
+    organization.onboarded_at = utc_now()
+    await organization.save(session)
+    await repository.save(session)
+
+    issues = [await create_issue(session, organization, repository) for _ in range(3)]
+
+    embed = mocker.patch.object(GithubBadge, "embed", new_callable=AsyncMock)
+
+    job = repository_badge_job(BadgeAction.embed, organization, repository)
+    assert await job.run(session) is None
+
+    assert embed.await_count == 3
+    for issue in issues:
+        await session.refresh(issue)
+        assert issue.pledge_badge_ever_embedded
+        assert issue.pledge_badge_embedded_at is not None
+
+    assert await redis.get(job.checkpoint_key) is None
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+@patch("polar.integrations.github.badge_job.CHUNK_SIZE", 2)
+async def test_embed_resumes_after_rate_limit(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    mocker: MockerFixture,
+) -> None:
+    repository.pledge_badge_auto_embed = True
+    organization.onboarded_at = utc_now()
+    await organization.save(session)
+    await repository.save(session)
+
+    i1 = await create_issue(session, organization, repository)
+    i2 = await create_issue(session, organization, repository)
+    i3 = await create_issue(session, organization, repository)
+
+    embedded: list[Issue] = []
+
+    async def embed(badge: GithubBadge) -> None:
+        if badge.issue.id == i2.id and i2 not in embedded:
+            embedded.append(i2)
+            raise RequestFailed(MagicMock(status_code=403))
+        embedded.append(badge.issue)
+
+    mocker.patch.object(GithubBadge, "embed", autospec=True, side_effect=embed)
+
+    job = repository_badge_job(BadgeAction.embed, organization, repository)
+    assert await job.run(session) == RATE_LIMITED_RETRY_DELAY
+
+    await session.refresh(i1)
+    await session.refresh(i2)
+    assert i1.pledge_badge_ever_embedded
+    assert not i2.pledge_badge_ever_embedded
+
+    # Resumes from the checkpoint, without editing the first issue again
+    assert await job.run(session) is None
+    assert [i.id for i in embedded] == [i1.id, i2.id, i2.id, i3.id]
+
+    assert await redis.get(job.checkpoint_key) is None
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+@patch("polar.integrations.github.badge_job.CHUNK_SIZE", 2)
+async def test_embed_counts_failures_once_past_rate_limit(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    mocker: MockerFixture,
+) -> None:
+    repository.pledge_badge_auto_embed = True
+    organization.onboarded_at = utc_now()
+    await organization.save(session)
+    await repository.save(session)
+
+    i1 = await create_issue(session, organization, repository)
+    i2 = await create_issue(session, organization, repository)
+
+    rate_limited: list[Issue] = []
+
+    async def embed(badge: GithubBadge) -> None:
+        if badge.issue.id == i1.id:
+            raise RequestFailed(MagicMock(status_code=500))
+        if not rate_limited:
+            rate_limited.append(badge.issue)
+            raise RequestFailed(MagicMock(status_code=403))
+
+    mocker.patch.object(GithubBadge, "embed", autospec=True, side_effect=embed)
+
+    job = repository_badge_job(BadgeAction.embed, organization, repository)
+    publish = mocker.patch.object(job, "publish", new_callable=AsyncMock)
+
+    assert await job.run(session) == RATE_LIMITED_RETRY_DELAY
+    progress: BadgeJobProgress = publish.await_args_list[-1].args[0]
+    assert (progress.processed, progress.failed) == (0, 0)
+
+    # The failed issue is retried with the chunk, and counted once
+    assert await job.run(session) is None
+    progress = publish.await_args_list[-1].args[0]
+    assert progress.completed
+    assert (progress.processed, progress.updated, progress.failed) == (2, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_run_retries_when_locked(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+) -> None:
+    job = repository_badge_job(BadgeAction.embed, organization, repository)
+
+    lock = redis.lock(f"{job.checkpoint_key}:lock", timeout=60)
+    assert await lock.acquire(blocking=False)
+    try:
+        assert await job.run(session) == LOCKED_RETRY_DELAY
+    finally:
+        await lock.release()
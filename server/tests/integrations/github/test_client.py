@@ -0,0 +1,126 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.enums import Platforms
+from polar.integrations.github import client as github
+from polar.kit.utils import generate_uuid
+from polar.models.user import OAuthAccount, User
+from polar.postgres import AsyncSession, AsyncSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_refresh_user_token_single_flight(
+    session: AsyncSession,
+    user: User,
+    mocker: MockerFixture,
+) -> None:
+    oauth = await OAuthAccount.create(
+        session=session,
+        platform=Platforms.github,
+        access_token="old_access_token",
+        refresh_token="old_refresh_token",
+        expires_at=int(time.time()) + 60,
+        account_id=str(generate_uuid()),
+        account_email=user.email,
+        user_id=user.id,
+    )
+    await session.commit()
+
+    async def refresh_request(*args: object, **kwargs: object) -> MagicMock:
+        # Let the other callers pile up behind the ongoing refresh
+        await asyncio.sleep(0.1)
+        response = MagicMock()
+        response.parsed_data = github.RefreshAccessToken(
+            access_token="new_access_token",
+            expires_in=8 * 60 * 60,
+            refresh_token="new_refresh_token",
+            refresh_token_expires_in=6 * 30 * 24 * 60 * 60,
+            scope="",
+            token_type="bearer",
+        )
+        return response
+
+    arequest = AsyncMock(side_effect=refresh_request)
+    mocker.patch.object(github.GitHub, "arequest", arequest)
+
+    async def get_user_client() -> str:
+        # Concurrent requests come with their own session
+        async with AsyncSessionLocal() as request_session:
+            request_user = await request_session.get(User, user.id)
+            assert request_user
+            await github.get_user_client(request_session, request_user)
+            request_oauth = request_user.get_platform_oauth_account(Platforms.github)
+            assert request_oauth
+            return request_oauth.access_token
+
+    tokens = await asyncio.gather(*[get_user_client() for _ in range(5)])
+
+    arequest.assert_awaited_once()
+    assert tokens == ["new_access_token"] * 5
+
+    await session.refresh(oauth)
+    assert oauth.refresh_token == "new_refresh_token"
+    assert not github.token_expires_within(oauth, github.REFRESH_THRESHOLD_SECONDS)
+
+
+@pytest.mark.asyncio
+async def test_refresh_user_token_survives_cancelled_caller(
+    session: AsyncSession,
+    user: User,
+    mocker: MockerFixture,
+) -> None:
+    oauth = await OAuthAccount.create(
+        session=session,
+        platform=Platforms.github,
+        access_token="old_access_token",
+        refresh_token="old_refresh_token",
+        expires_at=int(time.time()) + 60,
+        account_id=str(generate_uuid()),
+        account_email=user.email,
+        user_id=user.id,
+    )
+    await session.commit()
+
+    requested = asyncio.Event()
+
+    async def refresh_request(*args: object, **kwargs: object) -> MagicMock:
+        requested.set()
+        await asyncio.sleep(0.1)
+        response = MagicMock()
+        response.parsed_data = github.RefreshAccessToken(
+            access_token="new_access_token",
+            expires_in=8 * 60 * 60,
+            refresh_token="new_refresh_token",
+            refresh_token_expires_in=6 * 30 * 24 * 60 * 60,
+            scope="",
+            token_type="bearer",
+        )
+        return response
+
+    mocker.patch.object(
+        github.GitHub, "arequest", AsyncMock(side_effect=refresh_request)
+    )
+
+    async def get_user_client() -> None:
+        async with AsyncSessionLocal() as request_session:
+            request_user = await request_session.get(User, user.id)
+            assert request_user
+            await github.get_user_client(request_session, request_user)
+
+    # The caller leading the refresh goes away, closing its session
+    leader = asyncio.ensure_future(get_user_client())
+    await requested.wait()
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    while user.id in github._refreshing:
+        await asyncio.sleep(0.01)
+
+    await session.refresh(oauth)
+    assert oauth.access_token == "new_access_token"
+    assert oauth.refresh_token == "new_refresh_token"
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from polar.integrations.github.crawl_scheduler import (
+    CrawlKind,
+    CrawlTier,
+    ScheduledCrawl,
+    crawl_budget,
+    crawl_scheduler,
+    get_freshness,
+)
+from polar.models.organization import Organization
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from tests.fixtures.random_objects import create_issue
+
+
+@pytest.mark.asyncio
+async def test_schedule_by_tier(
+    session: AsyncSession, organization: Organization, repository: Repository
+) -> None:
+    now = datetime.utcnow()
+
+    hot = await create_issue(session, organization, repository)
+    hot.pledged_amount_sum = 2000
+    hot.github_issue_fetched_at = now - timedelta(hours=1)
+    await hot.save(session)
+
+    # Fetched recently enough for its tier
+    fresh_hot = await create_issue(session, organization, repository)
+    fresh_hot.pledge_badge_currently_embedded = True
+    fresh_hot.github_issue_fetched_at = now - timedelta(minutes=1)
+    await fresh_hot.save(session)
+
+    active = await create_issue(session, organization, repository)
+    active.github_issue_fetched_at = now - timedelta(hours=2)
+    await active.save(session)
+
+    # Staler than all the others, but cold
+    cold = await create_issue(session, organization, repository)
+    cold.issue_closed_at = now - timedelta(days=90)
+    cold.issue_modified_at = now - timedelta(days=90)
+    await cold.save(session)
+
+    crawls = await crawl_scheduler.schedule(
+        session, CrawlKind.issues, organization, budget=10
+    )
+    assert [(c.issue_id, c.tier) for c in crawls] == [
+        (hot.id, CrawlTier.hot),
+        (active.id, CrawlTier.active),
+        (cold.id, CrawlTier.cold),
+    ]
+
+    crawls = await crawl_scheduler.schedule(
+        session, CrawlKind.issues, organization, budget=1
+    )
+    assert [c.issue_id for c in crawls] == [hot.id]
+
+
+@pytest.mark.asyncio
+async def test_schedule_hot_by_pledges(
+    session: AsyncSession, organization: Organization, repository: Repository
+) -> None:
+    now = datetime.utcnow()
+
+    stalest = await create_issue(session, organization, repository)
+    stalest.pledge_badge_currently_embedded = True
+    stalest.github_issue_fetched_at = now - timedelta(days=1)
+    await stalest.save(session)
+
+    most_pledged = await create_issue(session, organization, repository)
+    most_pledged.pledged_amount_sum = 5000
+    most_pledged.github_issue_fetched_at = now - timedelta(hours=1)
+    await most_pledged.save(session)
+
+    pledged = await create_issue(session, organization, repository)
+    pledged.pledged_amount_sum = 1000
+    pledged.github_issue_fetched_at = now - timedelta(hours=2)
+    await pledged.save(session)
+
+    crawls = await crawl_scheduler.schedule(
+        session, CrawlKind.issues, organization, budget=10
+    )
+    assert [c.issue_id for c in crawls] == [most_pledged.id, pledged.id, stalest.id]
+
+
+@pytest.mark.asyncio
+async def test_schedule_hands_back_cold_reservation(
+    session: AsyncSession, organization: Organization, repository: Repository
+) -> None:
+    active = [await create_issue(session, organization, repository) for _ in range(10)]
+
+    # A cold tier with nothing due doesn't hold back its share of the budget
+    crawls = await crawl_scheduler.schedule(
+        session, CrawlKind.issues, organization, budget=10
+    )
+    assert {c.issue_id for c in crawls} == {i.id for i in active}
+    assert {c.tier for c in crawls} == {CrawlTier.active}
+
+
+def test_get_freshness() -> None:
+    now = datetime.now(timezone.utc)
+    crawls = [
+        ScheduledCrawl(uuid4(), CrawlTier.hot, now - timedelta(hours=2)),
+        ScheduledCrawl(uuid4(), CrawlTier.hot, now - timedelta(hours=1)),
+        ScheduledCrawl(uuid4(), CrawlTier.cold, None),
+    ]
+
+    freshness = {f.tier: f for f in get_freshness(crawls, now)}
+    assert freshness[CrawlTier.hot].scheduled == 2
+    assert freshness[CrawlTier.hot].staleness == timedelta(hours=2)
+    assert freshness[CrawlTier.active].scheduled == 0
+    assert freshness[CrawlTier.active].staleness is None
+    assert freshness[CrawlTier.cold].never_fetched == 1
+    assert freshness[CrawlTier.cold].staleness is None
+
+
+def test_crawl_budget() -> None:
+    assert crawl_budget(CrawlKind.issues, None) == 100
+    assert crawl_budget(CrawlKind.issues, 40) == 40
+    assert crawl_budget(CrawlKind.timelines, 40) == 20
+    assert crawl_budget(CrawlKind.timelines, -10) == 0
@@ -0,0 +1,35 @@
+import secrets
+import time
+
+import pytest
+
+from polar.integrations.github.rate_limit import installation_rate_limits
+
+
+@pytest.mark.asyncio
+async def test_record_from_headers() -> None:
+    installation_id = secrets.randbelow(100000)
+    assert await installation_rate_limits.get(installation_id) is None
+
+    reset = int(time.time()) + 600
+    await installation_rate_limits.record(
+        installation_id,
+        {
+            "x-ratelimit-limit": "5000",
+            "x-ratelimit-remaining": "4321",
+            "x-ratelimit-used": "679",
+            "x-ratelimit-reset": str(reset),
+        },
+    )
+
+    rate_limit = await installation_rate_limits.get(installation_id)
+    assert rate_limit is not None
+    assert rate_limit.remaining == 4321
+    assert rate_limit.reset == reset
+
+
+@pytest.mark.asyncio
+async def test_record_without_headers() -> None:
+    installation_id = secrets.randbelow(100000)
+    await installation_rate_limits.record(installation_id, {})
+    assert await installation_rate_limits.get(installation_id) is None
@@ -0,0 +1,101 @@
+import time
+from typing import Any
+
+import pytest
+import stripe
+
+from polar.exceptions import ResourceNotFound
+from polar.integrations.stripe.webhook_events import stripe_webhook_events
+from polar.models.issue import Issue
+from polar.models.organization import Organization
+from polar.models.pledge import Pledge
+from polar.models.repository import Repository
+from polar.pledge.schemas import PledgeState
+from polar.pledge.service import pledge as pledge_service
+from polar.postgres import AsyncSession
+
+
+def payment_intent_succeeded_event(
+    event_id: str, payment_intent: dict[str, Any]
+) -> stripe.Event:
+    return stripe.Event.construct_from(
+        {
+            "id": event_id,
+            "object": "event",
+            "type": "payment_intent.succeeded",
+            "created": int(time.time()),
+            "data": {"object": payment_intent},
+        },
+        "sk_test",
+    )
+
+
+@pytest.mark.asyncio
+async def test_process_and_replay_apply_events_once(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    issue: Issue,
+) -> None:
+    pledge = await Pledge.create(
+        session=session,
+        issue_id=issue.id,
+        repository_id=repository.id,
+        organization_id=organization.id,
+        amount=12300,
+        fee=123,
+        by_organization_id=organization.id,
+        state=PledgeState.initiated,
+        payment_id="pi_webhook_events",
+    )
+
+    event = payment_intent_succeeded_event(
+        "evt_webhook_events",
+        {
+            "id": "pi_webhook_events",
+            "amount": 12300,
+            "latest_charge": "ch_webhook_events",
+        },
+    )
+
+    assert await stripe_webhook_events.process(session, event) is True
+
+    got = await pledge_service.get(session, pledge.id)
+    assert got is not None
+    assert got.state == PledgeState.created
+
+    # Redelivery: would raise if the pledge was marked as created again
+    assert await stripe_webhook_events.process(session, event) is False
+
+    # Replaying a range containing the event doesn't apply it again either
+    missed = payment_intent_succeeded_event(
+        "evt_webhook_events_missed",
+        {
+            "id": "pi_webhook_events_unknown",
+            "amount": 100,
+            "latest_charge": "ch_webhook_events_missed",
+        },
+    )
+    result = await stripe_webhook_events.replay(session, [event, missed], dry_run=True)
+    assert result.processed == 1
+    assert result.skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_process_failure_is_not_marked(session: AsyncSession) -> None:
+    event = payment_intent_succeeded_event(
+        "evt_webhook_events_failure",
+        {
+            "id": "pi_webhook_events_failure",
+            "amount": 100,
+            "latest_charge": "ch_webhook_events_failure",
+        },
+    )
+
+    # No pledge for this payment
+    with pytest.raises(ResourceNotFound):
+        await stripe_webhook_events.process(session, event)
+    await session.rollback()
+
+    # Still to be processed, by a redelivery or a replay
+    assert await stripe_webhook_events.is_processed(session, event["id"]) is False
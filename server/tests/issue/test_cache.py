@@ -0,0 +1,58 @@
+import uuid
+
+import pytest
+
+from polar.issue.cache import public_issues_cache
+from polar.models.organization import Organization
+from polar.models.repository import Repository
+from polar.repository.hooks import SyncCompletedHook, repository_issues_sync_completed
+
+
+@pytest.mark.asyncio
+async def test_invalidate_while_rendering() -> None:
+    organization_id = uuid.uuid4()
+    params = {"repo_name": None}
+
+    key = await public_issues_cache.key(organization_id, "public", params)
+    assert await public_issues_cache.get(key) is None
+
+    # Invalidated while the response was being rendered
+    await public_issues_cache.invalidate(organization_id)
+    await public_issues_cache.set(key, '{"stale": true}')
+
+    key = await public_issues_cache.key(organization_id, "public", params)
+    assert await public_issues_cache.get(key) is None
+
+    cached = await public_issues_cache.set(key, '{"stale": false}')
+    assert await public_issues_cache.get(key) == cached
+
+
+@pytest.mark.parametrize(
+    "header,matches",
+    [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"outdated", W/"abc"', True),
+        ('"outdated","abc"', True),
+        ("*", True),
+        (' "outdated" ', False),
+        ('"ab"', False),
+    ],
+)
+def test_if_none_match(header: str | None, matches: bool) -> None:
+    assert public_issues_cache._if_none_match(header, '"abc"') is matches
+
+
+@pytest.mark.asyncio
+async def test_invalidate_on_issues_sync_completed(
+    organization: Organization, repository: Repository
+) -> None:
+    params = {"repo_name": None}
+    key = await public_issues_cache.key(organization.id, "public", params)
+
+    await repository_issues_sync_completed.call(
+        SyncCompletedHook(repository=repository, organization=organization, synced=1)
+    )
+
+    assert await public_issues_cache.key(organization.id, "public", params) != key
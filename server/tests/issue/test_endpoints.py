@@ -328,3 +328,33 @@ async def test_confirm_solved(
     assert pledges_response.status_code == 200
     assert len(pledges_response.json()["items"]) == 1
     assert pledges_response.json()["items"][0]["state"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_issue_search_etag(
+    organization: Organization,
+    repository: Repository,
+    issue: Issue,
+    session: AsyncSession,
+) -> None:
+    repository.is_private = False
+    repository.is_archived = False
+    await repository.save(session)
+
+    url = f"/api/v1/issues/search?platform=github&organization_name={organization.name}"
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get(url)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = await ac.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        response = await ac.get(url, headers={"If-None-Match": f'"outdated", W/{etag}'})
+        assert response.status_code == 304
+
+        response = await ac.get(url, headers={"If-None-Match": '"outdated"'})
+        assert response.status_code == 200
+        assert response.json()["items"][0]["id"] == str(issue.id)
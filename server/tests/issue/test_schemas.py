@@ -0,0 +1,57 @@
+import uuid
+from typing import Any
+
+import pytest
+
+from polar.integrations.github import client as github
+from polar.issue.schemas import IssueCreate
+from polar.types import JSONAny
+from tests.fixtures.vcr import read_cassette
+
+
+def get(value: JSONAny, field: str) -> Any:
+    assert value is None or isinstance(value, dict)
+    return (value or {}).get(field)
+
+
+def pluck(values: JSONAny, field: str) -> list[Any]:
+    assert values is None or isinstance(values, list)
+    return [value[field] for value in values or []]
+
+
+@pytest.mark.parametrize(
+    "cassette",
+    [
+        "issues.opened",
+        "issues.opened_with_polar_label",
+        "issues.closed",
+        "issues.labeled",
+        "issues.edited_with_polar_label_no_badge_body",
+    ],
+)
+def test_from_github_payload(cassette: str) -> None:
+    payload = read_cassette(f"github/webhooks/{cassette}.json")["body"]
+    organization_id = uuid.uuid4()
+    repository_id = uuid.uuid4()
+
+    event = github.webhooks.parse_obj("issues", payload)
+    parsed = IssueCreate.from_github(
+        event.issue,  # type: ignore
+        organization_id=organization_id,
+        repository_id=repository_id,
+    )
+    raw = IssueCreate.from_github_payload(
+        payload["issue"],
+        organization_id=organization_id,
+        repository_id=repository_id,
+    )
+
+    # Nested GitHub objects keep all their raw fields, compare what we use
+    assert raw.dict(
+        exclude={"author", "labels", "assignee", "assignees", "milestone", "closed_by"}
+    ) == parsed.dict(
+        exclude={"author", "labels", "assignee", "assignees", "milestone", "closed_by"}
+    )
+    assert get(raw.author, "login") == get(parsed.author, "login")
+    assert pluck(raw.labels, "name") == pluck(parsed.labels, "name")
+    assert pluck(raw.assignees, "login") == pluck(parsed.assignees, "login")
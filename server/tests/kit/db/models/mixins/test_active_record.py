@@ -1,7 +1,16 @@
+import secrets
+from datetime import datetime
+from typing import Any
+
 import pytest
 
+from polar.enums import Platforms
 from polar.kit.db.models.mixins import ActiveRecordMixin
+from polar.models.issue import Issue
+from polar.models.organization import Organization
+from polar.models.repository import Repository
 from polar.postgres import AsyncSession
+from polar.repository.schemas import RepositoryCreate
 from tests.fixtures.database import TestModel
 
 
@@ -160,3 +169,75 @@ async def test_delete(session: AsyncSession) -> None:
     await created.delete(session)
     retrieved = await ActiveRecord.find(session, created.id)
     assert retrieved is None
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_skips_unchanged(
+    session: AsyncSession, organization: Organization
+) -> None:
+    create_schemas = [
+        RepositoryCreate(
+            platform=Platforms.github,
+            name=f"upsert_{i}",
+            organization_id=organization.id,
+            external_id=secrets.randbelow(100000),
+            is_private=True,
+        )
+        for i in range(2)
+    ]
+
+    created = await Repository.upsert_many(
+        session, create_schemas, constraints=[Repository.external_id]
+    )
+    assert [r.name for r in created] == ["upsert_0", "upsert_1"]
+    assert all(r.was_created and not r.was_updated for r in created)
+
+    create_schemas[1].is_private = False
+    upserted = await Repository.upsert_many(
+        session, create_schemas, constraints=[Repository.external_id]
+    )
+    # Returned in the input order, unchanged rows included
+    assert [r.id for r in upserted] == [r.id for r in created]
+    assert not upserted[0].was_created and not upserted[0].was_updated
+    assert not upserted[1].was_created and upserted[1].was_updated
+    assert upserted[1].is_private is False
+
+
+@pytest.mark.asyncio
+async def test_copy_upsert_many(
+    session: AsyncSession, organization: Organization, repository: Repository
+) -> None:
+    external_id = secrets.randbelow(100000)
+    rows: list[dict[str, Any]] = [
+        dict(
+            platform=Platforms.github,
+            external_id=external_id + i,
+            organization_id=organization.id,
+            repository_id=repository.id,
+            number=i,
+            title=f"copy_{i}",
+            labels=[{"name": "bug"}],
+            state=Issue.State.OPEN,
+            issue_created_at=datetime.now(),
+        )
+        for i in range(3)
+    ]
+
+    created = await Issue.copy_upsert_many(
+        session, rows, constraints=[Issue.external_id]
+    )
+    assert len(created.created) == 3
+    assert created.updated == []
+
+    rows[1]["title"] = "copy_updated"
+    # Duplicates are merged once
+    upserted = await Issue.copy_upsert_many(
+        session, rows + [rows[1]], constraints=[Issue.external_id]
+    )
+    assert upserted.created == []
+    assert len(upserted.updated) == 1
+
+    issue = await Issue.find(session, upserted.updated[0])
+    assert issue is not None
+    assert issue.title == "copy_updated"
+    assert issue.labels == [{"name": "bug"}]
@@ -0,0 +1,75 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, SecretStr
+
+from polar.currency.schemas import CurrencyAmount
+from polar.dashboard.schemas import (
+    Entry,
+    IssueDashboardRead,
+    IssueListResponse,
+    IssueStatus,
+    PaginationResponse,
+    Relationship,
+    RelationshipData,
+)
+from polar.enums import Platforms
+from polar.funding.schemas import Funding
+from polar.kit.responses import FastJSONResponse
+from polar.models.issue import Issue
+
+
+def test_render_matches_jsonable_encoder() -> None:
+    issue_id = uuid.uuid4()
+    entry: Entry[IssueDashboardRead] = Entry(
+        id=issue_id,
+        type="issue",
+        attributes=IssueDashboardRead(
+            id=issue_id,
+            platform=Platforms.github,
+            organization_id=uuid.uuid4(),
+            repository_id=uuid.uuid4(),
+            number=1,
+            title="Issue ☃",
+            author={"login": "someone"},
+            labels=[{"name": "bug"}],
+            closed_by=None,
+            reactions={"+1": 3},
+            state=Issue.State.OPEN,
+            state_reason=None,
+            issue_closed_at=None,
+            issue_modified_at=datetime(2023, 8, 1, 12, 30, tzinfo=timezone.utc),
+            issue_created_at=datetime(2023, 7, 1, 8, 0, 0, 123456),
+            comments=2,
+            progress=IssueStatus.backlog,
+            funding=Funding(
+                funding_goal=None,
+                pledges_sum=CurrencyAmount(currency="USD", amount=1000),
+            ),
+            pledge_badge_currently_embedded=True,
+        ),
+        relationships={
+            "pledges": Relationship(
+                data=[RelationshipData(type="pledge", id=uuid.uuid4())]
+            )
+        },
+    )
+    response = IssueListResponse(
+        # See polar.dashboard.endpoints, mypy doesn't bind the DataT of the subclass
+        data=[entry],  # type: ignore
+        included=[Entry(id="repo", type="repository", attributes={"name": "polar"})],
+        pagination=PaginationResponse(total_count=1, page=1, next_page=None),
+    )
+
+    rendered = FastJSONResponse(response).body
+    assert json.loads(rendered) == jsonable_encoder(response)
+
+
+def test_render_masks_secrets() -> None:
+    class Credentials(BaseModel):
+        token: SecretStr
+
+    rendered = FastJSONResponse(Credentials(token=SecretStr("secret"))).body
+    assert json.loads(rendered) == {"token": "**********"}
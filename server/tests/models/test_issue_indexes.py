@@ -0,0 +1,189 @@
+import secrets
+from datetime import datetime
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+from polar.dashboard.schemas import IssueListType, IssueSortBy, IssueStatus
+from polar.integrations.github.crawl_scheduler import (
+    CrawlKind,
+    CrawlTier,
+    crawl_scheduler,
+)
+from polar.integrations.github.service.issue import github_issue
+from polar.issue.service import issue as issue_service
+from polar.kit.utils import utc_now
+from polar.models.organization import Organization
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from tests.fixtures.query_plan import explain, index_names
+from tests.fixtures.random_objects import create_organization, create_repository
+
+# Issues seeded per repository, and repositories per organization. Enough for the
+# planner to prefer the indexes with its default settings.
+SEED_ISSUES = 1000
+SEED_REPOSITORIES = 5
+
+
+async def seed_issues(
+    session: AsyncSession, organization: Organization, repository: Repository
+) -> None:
+    await session.execute(
+        text(
+            """
+            INSERT INTO issues (
+                id, created_at, organization_id, repository_id, platform,
+                external_id, number, title, state, issue_created_at,
+                issue_modified_at, issue_closed_at, pledged_amount_sum,
+                pledge_badge_currently_embedded, pledge_badge_ever_embedded,
+                has_pledge_badge_label, positive_reactions_count,
+                total_engagement_count, github_issue_fetched_at, deleted_at
+            )
+            SELECT
+                gen_random_uuid(), now() - i * interval '1 hour',
+                :organization_id, :repository_id, 'github',
+                :external_id + i, i, 'issue ' || i,
+                CASE WHEN i % 3 = 0 THEN 'closed' ELSE 'open' END,
+                now() - i * interval '1 day', now() - i * interval '1 hour',
+                CASE WHEN i % 3 = 0 THEN now() END,
+                CASE WHEN i % 20 = 0 THEN 1000 ELSE 0 END,
+                i % 10 = 0, i % 10 = 0, false, 0, i % 50,
+                CASE WHEN i % 7 <> 0 THEN now() END,
+                CASE WHEN i % 50 = 0 THEN now() END
+            FROM generate_series(1, :issues) AS i
+            """
+        ),
+        {
+            "organization_id": organization.id,
+            "repository_id": repository.id,
+            "external_id": secrets.randbelow(1_000_000_000),
+            "issues": SEED_ISSUES,
+        },
+    )
+
+
+@pytest_asyncio.fixture(scope="function")
+async def seeded_issues(
+    session: AsyncSession, organization: Organization, repository: Repository
+) -> None:
+    organizations = [organization] + [
+        await create_organization(session) for _ in range(2)
+    ]
+    for seeded_organization in organizations:
+        repositories = [repository] if seeded_organization == organization else []
+        while len(repositories) < SEED_REPOSITORIES:
+            repositories.append(await create_repository(session, seeded_organization))
+        for seeded_repository in repositories:
+            await seed_issues(session, seeded_organization, seeded_repository)
+    await session.commit()
+    await session.execute(text("ANALYZE issues"))
+    await session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filters,index",
+    [
+        # The total count reads all the issues of the repository, whatever the sort
+        (dict(sort_by=IssueSortBy.newest), "ix_issues_repository_id"),
+        (dict(sort_by=IssueSortBy.issues_default), "ix_issues_repository_id"),
+        (dict(sort_by=IssueSortBy.recently_updated), "ix_issues_repository_id"),
+        (
+            dict(
+                sort_by=IssueSortBy.recently_updated,
+                include_statuses=[
+                    IssueStatus.backlog,
+                    IssueStatus.triaged,
+                    IssueStatus.in_progress,
+                    IssueStatus.pull_request,
+                ],
+            ),
+            "ix_issues_repository_id",
+        ),
+        (
+            dict(sort_by=IssueSortBy.issues_default, have_polar_badge=True),
+            "idx_issues_repository_id_issue_modified_at_badge_embedded",
+        ),
+    ],
+)
+async def test_dashboard_uses_indexes(
+    session: AsyncSession,
+    repository: Repository,
+    seeded_issues: None,
+    filters: dict[str, Any],
+    index: str,
+) -> None:
+    statement = issue_service.list_by_repository_type_and_status_statement(
+        [repository.id], IssueListType.issues, load_pledges=True, **filters
+    ).limit(100)
+
+    plan = await explain(session, statement)
+    assert index in index_names(plan)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", list(CrawlKind))
+@pytest.mark.parametrize(
+    "tier,indexes",
+    [
+        (CrawlTier.hot, {"idx_issues_organization_id_hot"}),
+        # Either index of the organization, they serve the tier alike
+        (
+            CrawlTier.active,
+            {
+                "ix_issues_organization_id",
+                "issues_organization_id_repository_id_number_key",
+            },
+        ),
+        (
+            CrawlTier.cold,
+            {
+                "ix_issues_organization_id",
+                "issues_organization_id_repository_id_number_key",
+            },
+        ),
+    ],
+)
+async def test_crawl_selection_uses_indexes(
+    session: AsyncSession,
+    organization: Organization,
+    seeded_issues: None,
+    kind: CrawlKind,
+    tier: CrawlTier,
+    indexes: set[str],
+) -> None:
+    statement = crawl_scheduler.due_statement(
+        kind, organization, tier, datetime.utcnow(), 100
+    )
+
+    plan = await explain(session, statement)
+    assert index_names(plan) & indexes
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+@pytest.mark.parametrize(
+    "statement_function",
+    [
+        github_issue.badge_add_candidates_statement,
+        github_issue.badge_remove_candidates_statement,
+    ],
+)
+async def test_badge_candidates_use_indexes(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    seeded_issues: None,
+    statement_function: Any,
+) -> None:
+    organization.onboarded_at = utc_now()
+    repository.pledge_badge_auto_embed = True
+
+    statement = statement_function(organization, repository)
+    assert statement is not None
+
+    plan = await explain(session, statement.limit(100))
+    assert "idx_issues_repository_id_created_at_id_not_deleted" in index_names(plan)
@@ -13,6 +13,7 @@ from polar.models.user_organization import UserOrganization
 from polar.notifications.notification import MaintainerPledgeCreatedNotification
 from polar.notifications.schemas import NotificationType
 from polar.notifications.service import NotificationsService, PartialNotification
+from polar.outbox.service import outbox
 from polar.pledge.schemas import PledgeState
 from polar.pledge.service import pledge as pledge_service
 from polar.postgres import AsyncSession
@@ -46,6 +47,10 @@ async def test_create_pledge_from_created(
         "trx-id",
     )
 
+    # Notifications are delivered through the outbox
+    assert m.call_count == 0
+    await outbox.dispatch()
+
     # Check notifictions
     assert m.call_count == 1
     m.assert_called_once_with(
@@ -118,6 +123,8 @@ async def test_deduplicate(
 
     assert errored is True
 
+    await outbox.dispatch()
+
     # Check notifictions
     assert spy.call_count == 1
 
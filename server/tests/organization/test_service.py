@@ -0,0 +1,26 @@
+import pytest
+
+from polar.organization.service import organization as organization_service
+from polar.postgres import AsyncSession
+from tests.fixtures.random_objects import create_organization
+
+
+@pytest.mark.asyncio
+async def test_list_installed_shards(session: AsyncSession) -> None:
+    created = {(await create_organization(session)).id for _ in range(10)}
+
+    installed = {o.id for o in await organization_service.list_installed(session)}
+    assert created <= installed
+
+    shards = [
+        {
+            o.id
+            for o in await organization_service.list_installed(
+                session, shard=shard, shards=3
+            )
+        }
+        for shard in range(3)
+    ]
+    # Every organization is in exactly one shard
+    assert set().union(*shards) == installed
+    assert sum(len(s) for s in shards) == len(installed)
@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from uuid import UUID, uuid4
+
+import pytest
+
+from polar.kit.utils import utc_now
+from polar.models.outbox_event import OutboxEvent
+from polar.outbox.hook import OutboxHook
+from polar.outbox.service import DispatchResult, outbox
+from polar.postgres import AsyncSession, sql
+
+
+@dataclass
+class Payload:
+    session: AsyncSession
+    id: UUID
+
+
+async def load(session: AsyncSession, id: UUID) -> Payload | None:
+    return Payload(session, id)
+
+
+test_hook: OutboxHook[Payload] = OutboxHook(
+    "tests.outbox.test_hook",
+    get_session=lambda p: p.session,
+    get_aggregate_id=lambda p: p.id,
+    load=load,
+)
+
+inline_calls: list[UUID] = []
+delivered: list[UUID] = []
+failures: dict[UUID, int] = {}
+
+
+async def inline_receiver(payload: Payload) -> None:
+    inline_calls.append(payload.id)
+
+
+async def deferred_receiver(payload: Payload) -> None:
+    if failures.get(payload.id, 0) > 0:
+        failures[payload.id] -= 1
+        raise Exception("receiver failed")
+    delivered.append(payload.id)
+
+
+test_hook.add(inline_receiver)
+test_hook.add_deferred(deferred_receiver)
+
+
+async def get_events(session: AsyncSession, aggregate_id: UUID) -> list[OutboxEvent]:
+    res = await session.execute(
+        sql.select(OutboxEvent)
+        .where(OutboxEvent.aggregate_id == aggregate_id)
+        .order_by(OutboxEvent.created_at)
+        .execution_options(populate_existing=True)
+    )
+    return list(res.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_dispatch(session: AsyncSession) -> None:
+    id = uuid4()
+    await test_hook.call(Payload(session, id))
+    await session.commit()
+
+    # Inline receivers run right away, deferred ones are recorded
+    assert inline_calls.count(id) == 1
+    assert delivered.count(id) == 0
+
+    [event] = await get_events(session, id)
+    assert event.hook == "tests.outbox.test_hook"
+    assert event.receiver.endswith("deferred_receiver")
+    assert event.delivered_at is None
+
+    await outbox.dispatch()
+    assert delivered.count(id) == 1
+
+    [event] = await get_events(session, id)
+    assert event.delivered_at is not None
+    assert event.attempts == 1
+
+    # Delivered events are not delivered again
+    await outbox.dispatch()
+    assert delivered.count(id) == 1
+
+
+@pytest.mark.asyncio
+async def test_dispatch_retry_and_ordering(session: AsyncSession) -> None:
+    id = uuid4()
+    failures[id] = 1
+
+    await test_hook.call(Payload(session, id))
+    await session.commit()
+    await test_hook.call(Payload(session, id))
+    await session.commit()
+
+    await outbox.dispatch()
+
+    # The first event failed, the second one waits for it
+    first, second = await get_events(session, id)
+    assert first.delivered_at is None
+    assert first.attempts == 1
+    assert first.last_error is not None
+    assert first.next_attempt_at > utc_now()
+    assert second.attempts == 0
+    assert delivered.count(id) == 0
+
+    # Make the retry due
+    await session.execute(
+        sql.update(OutboxEvent)
+        .where(OutboxEvent.id == first.id)
+        .values(next_attempt_at=utc_now())
+    )
+    await session.commit()
+
+    await outbox.dispatch()
+
+    first, second = await get_events(session, id)
+    assert first.delivered_at is not None
+    assert second.delivered_at is not None
+    assert first.attempts == 2
+    assert delivered.count(id) == 2
+
+
+@pytest.mark.asyncio
+async def test_record_in_callers_transaction(session: AsyncSession) -> None:
+    id = uuid4()
+    await test_hook.call(Payload(session, id))
+
+    # Not committed by the hook
+    await session.rollback()
+    assert await get_events(session, id) == []
+
+
+@pytest.mark.asyncio
+async def test_deliver_skips_reclaimed_event(session: AsyncSession) -> None:
+    id = uuid4()
+    await test_hook.call(Payload(session, id))
+    await session.commit()
+
+    [event] = await outbox.claim(session)
+    assert event.aggregate_id == id
+
+    # The lease expired and another dispatcher claimed the event
+    await session.execute(
+        sql.update(OutboxEvent)
+        .where(OutboxEvent.id == event.id)
+        .values(attempts=OutboxEvent.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+    result = DispatchResult()
+    await outbox.deliver(event, result)
+    assert result.delivered == 0
+    assert delivered.count(id) == 0
@@ -17,6 +17,7 @@ from polar.models.pledge import Pledge
 from polar.models.pledge_transaction import PledgeTransaction
 from polar.models.repository import Repository
 from polar.models.user import OAuthAccount, User
+from polar.outbox.service import outbox
 from polar.pledge.schemas import PledgeState, PledgeTransactionType
 from polar.pledge.service import pledge as pledge_service
 from polar.postgres import AsyncSession
@@ -42,6 +43,8 @@ async def test_mark_pending_by_pledge_id(
     assert got is not None
     assert got.state == PledgeState.pending
 
+    # Notifications are delivered through the outbox
+    await outbox.dispatch()
     pending_notif.assert_called_once()
 
 
@@ -95,6 +98,7 @@ async def test_mark_confirmation_pending_by_issue_id(
         PledgeState.confirmation_pending,
     ]
 
+    await outbox.dispatch()
     assert confirmation_pending_notif.call_count == 3
 
 
@@ -146,6 +150,7 @@ async def test_mark_pending_by_issue_id(
         PledgeState.pending,
     ]
 
+    await outbox.dispatch()
     assert pending_notif.call_count == 3
 
 
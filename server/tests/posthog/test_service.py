@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from polar.posthog import AnalyticsSink, Event, FileSink, Service
+
+
+class MemorySink(AnalyticsSink):
+    def __init__(self) -> None:
+        self.batches: list[list[Event]] = []
+
+    def send(self, events: list[Event]) -> None:
+        self.batches.append(events)
+
+
+@pytest.mark.asyncio
+async def test_capture_is_batched() -> None:
+    sink = MemorySink()
+    service = Service(sink, batch_size=2, flush_interval=60)
+
+    for i in range(5):
+        service.capture("user:1", "Event", {"i": i})
+
+    # Nothing is sent from the capturing call itself
+    assert sink.batches == []
+
+    await service.flush()
+
+    assert all(len(batch) <= 2 for batch in sink.batches)
+    assert sorted(e["properties"]["i"] for b in sink.batches for e in b) == list(
+        range(5)
+    )
+    assert service.stats.sent == 5
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_in_background() -> None:
+    sink = MemorySink()
+    service = Service(sink, batch_size=2, flush_interval=60)
+
+    service.capture("user:1", "Event")
+    service.capture("user:1", "Event")
+
+    for _ in range(10):
+        if sink.batches:
+            break
+        await asyncio.sleep(0.05)
+
+    assert [len(batch) for batch in sink.batches] == [2]
+
+
+@pytest.mark.asyncio
+async def test_flush_waits_for_batch_in_flight() -> None:
+    class SlowSink(MemorySink):
+        def send(self, events: list[Event]) -> None:
+            time.sleep(0.1)
+            super().send(events)
+
+    sink = SlowSink()
+    service = Service(sink, batch_size=2, flush_interval=60)
+
+    service.capture("user:1", "Event")
+    service.capture("user:1", "Event")
+
+    # The background task takes the batch, and is sending it
+    while service.buffer:
+        await asyncio.sleep(0.01)
+
+    await service.flush()
+
+    assert [len(batch) for batch in sink.batches] == [2]
+    assert service.stats.sent == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_is_bounded() -> None:
+    sink = MemorySink()
+    service = Service(sink, queue_size=3, batch_size=10, flush_interval=60)
+
+    for _ in range(5):
+        service.capture("user:1", "Event")
+
+    assert service.stats.enqueued == 3
+    assert service.stats.dropped == 2
+
+    await service.flush()
+    assert service.stats.sent == 3
+
+
+@pytest.mark.asyncio
+async def test_anonymous_events_are_sampled() -> None:
+    sink = MemorySink()
+    service = Service(sink, anonymous_sample_rate=0)
+
+    service.anonymous_event("Badge Load")
+    await service.flush()
+
+    assert sink.batches == []
+    assert service.stats.sampled_out == 1
+
+    service.anonymous_sample_rate = 1
+    service.anonymous_event("Badge Load")
+    await service.flush()
+
+    assert sink.batches[0][0]["properties"]["sample_rate"] == 1
+
+
+@pytest.mark.asyncio
+async def test_file_sink(tmp_path: Path) -> None:
+    path = tmp_path / "events.jsonl"
+    service = Service(FileSink(str(path)))
+
+    service.capture("user:1", "Event", {"org": "polarsource"})
+    await service.flush()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    event = json.loads(lines[0])
+    assert event["event"] == "Event"
+    assert event["properties"]["org"] == "polarsource"
@@ -0,0 +1,83 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.models.organization import Organization
+from polar.models.pull_request import PullRequest
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from polar.pull_request.hooks import PullRequestHook
+from polar.receivers.pull_request import pull_request_find_reverse_references
+from tests.fixtures.random_objects import create_issue
+
+
+@pytest.mark.asyncio
+async def test_pull_request_find_reverse_references(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    pull_request: PullRequest,
+    mocker: MockerFixture,
+) -> None:
+    enqueue_job = mocker.patch("polar.receivers.pull_request.enqueue_job")
+
+    first = await create_issue(session, organization, repository)
+    second = await create_issue(session, organization, repository)
+
+    pull_request.body = (
+        f"Fixes #{first.number}, see #{first.number} and "
+        f"https://github.com/{organization.name}/{repository.name}/issues/{second.number}"
+        " and https://github.com/someone/else/issues/1"
+    )
+    await pull_request.save(session)
+
+    await pull_request_find_reverse_references(PullRequestHook(session, pull_request))
+
+    assert sorted(c.args[1] for c in enqueue_job.call_args_list) == sorted(
+        [first.id, second.id]
+    )
+    assert pull_request.reverse_references_body_hash is not None
+
+    # Same body, no new crawls
+    enqueue_job.reset_mock()
+    await pull_request_find_reverse_references(PullRequestHook(session, pull_request))
+    assert enqueue_job.call_count == 0
+
+    # Body changed, crawl again
+    pull_request.body = f"Fixes #{second.number}"
+    await pull_request.save(session)
+
+    await pull_request_find_reverse_references(PullRequestHook(session, pull_request))
+    assert [c.args[1] for c in enqueue_job.call_args_list] == [second.id]
+
+
+@pytest.mark.asyncio
+async def test_pull_request_find_reverse_references_unsynced_issue(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    pull_request: PullRequest,
+    mocker: MockerFixture,
+) -> None:
+    enqueue_job = mocker.patch("polar.receivers.pull_request.enqueue_job")
+
+    first = await create_issue(session, organization, repository)
+    unsynced_number = first.number + 1
+
+    pull_request.body = f"Fixes #{first.number} and #{unsynced_number}"
+    await pull_request.save(session)
+
+    await pull_request_find_reverse_references(PullRequestHook(session, pull_request))
+    assert [c.args[1] for c in enqueue_job.call_args_list] == [first.id]
+    assert pull_request.reverse_references_body_hash is None
+
+    # The issue is synced, the same body is looked up again
+    enqueue_job.reset_mock()
+    second = await create_issue(session, organization, repository)
+    second.number = unsynced_number
+    await second.save(session)
+
+    await pull_request_find_reverse_references(PullRequestHook(session, pull_request))
+    assert sorted(c.args[1] for c in enqueue_job.call_args_list) == sorted(
+        [first.id, second.id]
+    )
+    assert pull_request.reverse_references_body_hash is not None
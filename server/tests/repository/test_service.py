@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import pytest
+
+from polar.models.organization import Organization
+from polar.models.pull_request import PullRequest
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from polar.repository.service import repository as repository_service
+from tests.fixtures.random_objects import create_issue
+
+
+@pytest.mark.asyncio
+async def test_get_repositories_synced_count(
+    session: AsyncSession,
+    organization: Organization,
+    repository: Repository,
+    public_repository: Repository,
+    pull_request: PullRequest,
+) -> None:
+    await create_issue(session, organization, repository)
+
+    auto_embedded = await create_issue(session, organization, repository)
+    auto_embedded.pledge_badge_embedded_at = datetime.now()
+    await auto_embedded.save(session)
+
+    label_embedded = await create_issue(session, organization, repository)
+    label_embedded.pledge_badge_embedded_at = datetime.now()
+    label_embedded.has_pledge_badge_label = True
+    await label_embedded.save(session)
+
+    closed = await create_issue(session, organization, repository)
+    closed.state = "closed"
+    await closed.save(session)
+
+    synced = await repository_service.get_repositories_synced_count(
+        session, organization
+    )
+
+    # Three open issues and one open pull request, without any
+    # issues x pull requests duplication.
+    assert synced[repository.id] == {
+        "synced_issues": 4,
+        "auto_embedded_issues": 1,
+        "label_embedded_issues": 1,
+        "pull_requests": 1,
+    }
+
+    assert synced[public_repository.id] == {
+        "synced_issues": 0,
+        "auto_embedded_issues": 0,
+        "label_embedded_issues": 0,
+        "pull_requests": 0,
+    }
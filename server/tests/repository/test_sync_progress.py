@@ -0,0 +1,61 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.models.issue import Issue
+from polar.models.organization import Organization
+from polar.models.repository import Repository
+from polar.redis import redis
+from polar.repository.hooks import SyncCompletedHook, SyncedHook
+from polar.repository.sync_progress import IssueSyncProgressService
+
+
+@pytest.mark.asyncio
+async def test_issue_sync_progress_is_coalesced(
+    organization: Organization,
+    repository: Repository,
+    issue: Issue,
+    mocker: MockerFixture,
+) -> None:
+    publish = mocker.patch("polar.repository.sync_progress.publish")
+
+    # One per process, they share the throttling
+    processes = [IssueSyncProgressService(redis) for _ in range(2)]
+    for p in processes:
+        # Only publish on page boundaries
+        p.interval_seconds = 3600
+        p.every_issues = 10
+    progress = processes[0]
+
+    published = [
+        await processes[synced % 2].synced(
+            SyncedHook(
+                repository=repository,
+                organization=organization,
+                record=issue,
+                synced=synced,
+            )
+        )
+        for synced in range(1, 26)
+    ]
+
+    # First issue, then every 10 issues
+    assert [i + 1 for i, p in enumerate(published) if p] == [1, 11, 21]
+    assert publish.call_count == 3
+
+    snapshot = await progress.get(repository.id)
+    assert snapshot is not None
+    assert snapshot.synced_issues == 21
+    assert snapshot.completed is False
+
+    await progress.completed(
+        SyncCompletedHook(repository=repository, organization=organization, synced=25)
+    )
+
+    assert publish.call_count == 4
+    assert publish.call_args.args[0] == "issue.sync.completed"
+    assert publish.call_args.args[1]["synced_issues"] == 25
+
+    snapshot = await progress.get(repository.id)
+    assert snapshot is not None
+    assert snapshot.synced_issues == 25
+    assert snapshot.completed is True
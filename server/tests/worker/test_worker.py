@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from arq.connections import ArqRedis
+from arq.worker import Worker
+from pytest_mock import MockerFixture
+
+from polar.worker import (
+    QUEUE_MAX_JOBS,
+    QueueName,
+    WorkerSettings,
+    enqueue_job,
+    run_worker_pools,
+    task,
+    worker_settings,
+)
+
+
+@task("test.worker.webhook", queue=QueueName.webhooks)
+async def webhook_task() -> None:
+    ...
+
+
+@pytest.mark.asyncio
+async def test_enqueue_job_routes_to_task_queue(mocker: MockerFixture) -> None:
+    arq_enqueue_job = mocker.patch.object(ArqRedis, "enqueue_job")
+
+    await enqueue_job("test.worker.webhook", 1)
+    assert arq_enqueue_job.call_args.kwargs["_queue_name"] == QueueName.webhooks.value
+
+    # Unknown tasks go to the default queue
+    await enqueue_job("test.worker.unknown", 1)
+    assert arq_enqueue_job.call_args.kwargs["_queue_name"] == QueueName.default.value
+
+
+def test_worker_settings() -> None:
+    crawls = worker_settings(QueueName.crawls)
+    assert crawls["queue_name"] == QueueName.crawls.value
+    assert crawls["max_jobs"] == QUEUE_MAX_JOBS[QueueName.crawls]
+    # Every pool can run any task, the crons are only run by the default pool
+    assert crawls["functions"] is WorkerSettings.functions
+    assert crawls["cron_jobs"] == []
+    assert worker_settings(QueueName.default)["cron_jobs"] is WorkerSettings.cron_jobs
+
+
+@pytest.mark.asyncio
+async def test_run_worker_pools_stops_when_a_pool_crashes(
+    mocker: MockerFixture,
+) -> None:
+    async def main(worker: Worker) -> None:
+        if worker.queue_name == QueueName.crawls.value:
+            raise RuntimeError("crashed")
+        await asyncio.Event().wait()
+
+    mocker.patch.object(Worker, "main", autospec=True, side_effect=main)
+    close = mocker.spy(Worker, "close")
+
+    with pytest.raises(RuntimeError, match="crashed"):
+        await asyncio.wait_for(
+            run_worker_pools([QueueName.default, QueueName.crawls]), timeout=5
+        )
+
+    assert close.call_count == 2